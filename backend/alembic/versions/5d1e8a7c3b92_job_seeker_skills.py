@@ -0,0 +1,109 @@
+"""job seeker skills
+
+Normalized skills table and the job_seeker_skills many-to-many links,
+backfilled from job_seekers.skills.
+
+Revision ID: 5d1e8a7c3b92
+Revises: 27f62e40fdb4
+Create Date: 2026-10-18 11:05:00.000000
+
+"""
+import re
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1e8a7c3b92'
+down_revision: Union[str, Sequence[str], None] = '27f62e40fdb4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Skill parsing as of this revision (app.utils.skills may change later)
+SKILL_SPLIT = re.compile(r'[,;\n|]')
+MAX_SKILL_LENGTH = 60
+MAX_PER_PROFILE = 50
+BATCH_SIZE = 1000
+
+job_seekers = sa.table('job_seekers', sa.column('id', sa.Integer), sa.column('skills', sa.Text))
+skills = sa.table(
+    'skills', sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('label', sa.String),
+    sa.column('created_at', sa.DateTime),
+)
+job_seeker_skills = sa.table(
+    'job_seeker_skills', sa.column('job_seeker_id', sa.Integer), sa.column('skill_id', sa.Integer)
+)
+
+
+def parse_skills(text):
+    """Comma/semicolon/newline separated skills -> {normalized name: label as first written}"""
+    parsed = {}
+    for part in SKILL_SPLIT.split(text or ''):
+        name = ' '.join(part.lower().split()).strip(' -*•·')
+        if name and len(name) <= MAX_SKILL_LENGTH and name not in parsed:
+            parsed[name] = ' '.join(part.split()).strip(' -*•·')
+    return parsed
+
+
+def backfill(connection):
+    """Link every profile to its skills, parsed from job_seekers.skills"""
+    seekers = connection.execute(
+        sa.select(job_seekers.c.id, job_seekers.c.skills)
+        .where(job_seekers.c.skills.isnot(None)).order_by(job_seekers.c.id)
+    ).all()
+    parsed = [(seeker_id, list(parse_skills(text).items())[:MAX_PER_PROFILE]) for seeker_id, text in seekers]
+
+    labels = {}
+    for _, seeker_skills in parsed:
+        for name, label in seeker_skills:
+            labels.setdefault(name, label[:MAX_SKILL_LENGTH])
+    existing = set(connection.execute(sa.select(skills.c.name)).scalars())
+    now = datetime.utcnow()
+    new = [{'name': name, 'label': label, 'created_at': now} for name, label in labels.items() if name not in existing]
+    if new:
+        connection.execute(sa.insert(skills), new)
+    skill_ids = dict(connection.execute(sa.select(skills.c.name, skills.c.id)).all())
+
+    links = []
+    for seeker_id, seeker_skills in parsed:
+        links += [{'job_seeker_id': seeker_id, 'skill_id': skill_ids[name]} for name, _ in seeker_skills]
+        if len(links) >= BATCH_SIZE:
+            connection.execute(sa.insert(job_seeker_skills), links)
+            links = []
+    if links:
+        connection.execute(sa.insert(job_seeker_skills), links)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'skills',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=60), nullable=False),
+        sa.Column('label', sa.String(length=60), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_table(
+        'job_seeker_skills',
+        sa.Column('job_seeker_id', sa.Integer(), nullable=False),
+        sa.Column('skill_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['job_seeker_id'], ['job_seekers.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['skill_id'], ['skills.id']),
+        sa.PrimaryKeyConstraint('job_seeker_id', 'skill_id'),
+    )
+    op.create_index(
+        'ix_job_seeker_skills_skill_id_job_seeker_id', 'job_seeker_skills', ['skill_id', 'job_seeker_id']
+    )
+    backfill(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_seeker_skills_skill_id_job_seeker_id', table_name='job_seeker_skills')
+    op.drop_table('job_seeker_skills')
+    op.drop_table('skills')
@@ -0,0 +1,123 @@
+"""initial schema
+
+Baseline matching the tables previously created by Base.metadata.create_all.
+Existing databases: run `alembic stamp 8247014a1acb` once, then upgrade.
+
+Revision ID: 8247014a1acb
+Revises: 
+Create Date: 2026-10-18 09:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8247014a1acb'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('full_name', sa.String(length=120), nullable=False),
+        sa.Column('role', sa.Enum('JOB_SEEKER', 'EMPLOYER', name='userrole'), nullable=False),
+        sa.Column('is_email_verified', sa.Boolean(), nullable=True),
+        sa.Column('email_verification_token', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'employers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('company_name', sa.String(length=120), nullable=False),
+        sa.Column('company_description', sa.Text(), nullable=True),
+        sa.Column('company_logo_url', sa.String(length=500), nullable=True),
+        sa.Column('company_website', sa.String(length=255), nullable=True),
+        sa.Column('phone', sa.String(length=15), nullable=True),
+        sa.Column('location', sa.String(length=120), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id'),
+    )
+
+    op.create_table(
+        'job_seekers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('skills', sa.Text(), nullable=True),
+        sa.Column('experience_years', sa.Integer(), nullable=True),
+        sa.Column('cv_url', sa.String(length=500), nullable=True),
+        sa.Column('phone', sa.String(length=15), nullable=True),
+        sa.Column('location', sa.String(length=120), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id'),
+    )
+
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('employer_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('requirements', sa.Text(), nullable=True),
+        sa.Column('salary_min', sa.Float(), nullable=True),
+        sa.Column('salary_max', sa.Float(), nullable=True),
+        sa.Column('location', sa.String(length=120), nullable=False),
+        sa.Column('job_type', sa.Enum('FULL_TIME', 'PART_TIME', 'CONTRACT', 'FREELANCE', 'INTERNSHIP', name='jobtype'), nullable=True),
+        sa.Column('is_active', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['employer_id'], ['employers.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_jobs_title', 'jobs', ['title'])
+    op.create_index('ix_jobs_location', 'jobs', ['location'])
+    op.create_index('ix_jobs_created_at', 'jobs', ['created_at'])
+
+    op.create_table(
+        'applications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('job_seeker_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Enum('APPLIED', 'REVIEWED', 'SHORTLISTED', 'REJECTED', 'ACCEPTED', name='applicationstatus'), nullable=True),
+        sa.Column('cover_letter', sa.Text(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('applied_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id']),
+        sa.ForeignKeyConstraint(['job_seeker_id'], ['job_seekers.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_applications_status', 'applications', ['status'])
+    op.create_index('ix_applications_applied_at', 'applications', ['applied_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('applications')
+    op.drop_table('jobs')
+    op.drop_table('job_seekers')
+    op.drop_table('employers')
+    op.drop_table('users')
+    sa.Enum(name='applicationstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='jobtype').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
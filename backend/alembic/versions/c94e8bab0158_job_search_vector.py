@@ -0,0 +1,44 @@
+"""job search vector
+
+Weighted tsvector over title/requirements/description with a GIN index
+(PostgreSQL only; other databases use the in-process search index).
+
+Revision ID: c94e8bab0158
+Revises: 8247014a1acb
+Create Date: 2026-10-18 09:41:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c94e8bab0158'
+down_revision: Union[str, Sequence[str], None] = '8247014a1acb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("""
+        ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(requirements, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED
+    """)
+    op.execute('CREATE INDEX IF NOT EXISTS ix_jobs_search_vector ON jobs USING GIN (search_vector)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('DROP INDEX IF EXISTS ix_jobs_search_vector')
+    op.execute('ALTER TABLE jobs DROP COLUMN IF EXISTS search_vector')
@@ -0,0 +1,30 @@
+"""jobs updated_at index
+
+Serves the max(updated_at) probe behind ETag / Last-Modified on GET /jobs.
+
+Revision ID: f82bfa25f63d
+Revises: fbb36ef87475
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f82bfa25f63d'
+down_revision: Union[str, Sequence[str], None] = 'fbb36ef87475'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_jobs_updated_at', 'jobs', ['updated_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_updated_at', table_name='jobs')
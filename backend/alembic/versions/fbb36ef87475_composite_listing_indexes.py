@@ -0,0 +1,37 @@
+"""composite listing indexes
+
+applications(job_id, status, applied_at) serves the employer listing
+(job_id IN employer jobs, optional status filter, ordered by applied_at);
+jobs(employer_id, created_at) serves the employer -> jobs subquery.
+
+Revision ID: fbb36ef87475
+Revises: c94e8bab0158
+Create Date: 2026-10-18 09:42:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fbb36ef87475'
+down_revision: Union[str, Sequence[str], None] = 'c94e8bab0158'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_applications_job_id_status_applied_at', 'applications',
+        ['job_id', 'status', 'applied_at']
+    )
+    op.create_index('ix_jobs_employer_id_created_at', 'jobs', ['employer_id', 'created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_employer_id_created_at', table_name='jobs')
+    op.drop_index('ix_applications_job_id_status_applied_at', table_name='applications')
@@ -1,32 +1,103 @@
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 from pyramid.config import Configurator
 from sqlalchemy.orm import scoped_session, sessionmaker
 from app.config import DatabaseConfig
 from app.models import Base
+from app.utils.query_counter import QueryCounter
+from app.utils.email_outbox import EmailOutboxWorker
+from app.utils.index_worker import IndexWorker
+from app.utils.fast_json import FastJSON
+from app.utils.db_routing import ReplicaRouter, RoutingSession
+from app.utils.schema_check import SchemaCheck
+from app.utils.startup import StartupReport
 import json
 from pyramid.httpexceptions import HTTPException
 
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+def cors_factory(handler, registry):
+    """CORS tween (must be module level so add_tween can resolve it)"""
+    def cors_handler(request):
+        response = handler(request)
+        response.headers.update({
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'POST,GET,OPTIONS,PUT,DELETE,PATCH',
+            'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-DB-Primary-Until',
+            'Access-Control-Expose-Headers': 'X-DB-Primary-Until',
+            'Access-Control-Max-Age': '3600'
+        })
+        return response
+    return cors_handler
+
 def main(global_config, **settings):
     """Pyramid application factory"""
+    report = StartupReport()
+    report.add('import', IMPORT_SECONDS)
     
     # Setup database
     engine = DatabaseConfig.get_engine(settings)
-    session_factory = scoped_session(sessionmaker(bind=engine))
+    QueryCounter.install(engine)
+    
+    # Optional read replica: GET/HEAD requests read from it until they write
+    replica = DatabaseConfig.get_replica_engine(settings)
+    if replica is not None:
+        QueryCounter.install(replica)
+        session_factory = scoped_session(sessionmaker(bind=engine, class_=RoutingSession))
+    else:
+        session_factory = scoped_session(sessionmaker(bind=engine))
+    report.mark('config')
+    
+    # Schema: stored fingerprint / Alembic revision check instead of create_all on every boot
+    schema_result = SchemaCheck.ensure(
+        engine, Base.metadata,
+        mode=DatabaseConfig.get_setting(settings, 'schema_check', 'fingerprint'),
+        revision=DatabaseConfig.get_setting(settings, 'schema_revision', None),
+    )
+    report.mark('db_probe', schema_result)
+    
+    # Background delivery of queued emails
+    if str(settings.get('email_outbox_worker', 'true')).lower() == 'true':
+        EmailOutboxWorker(engine).start()
     
-    # Create all tables
-    Base.metadata.create_all(engine)
+    # Build and sync the in-memory indexes (recommendations, ...) off the request path
+    index_worker = None
+    if str(settings.get('index_worker', 'true')).lower() == 'true':
+        index_worker = IndexWorker(engine).start()
     
     # Create Pyramid configuration
     config = Configurator(settings=settings)
     
+    # Bytes-level JSON renderer (orjson when installed) for every renderer='json' view
+    config.add_renderer('json', FastJSON.renderer_factory)
+    
+    debug_sql_count = str(settings.get('debug_sql_count', 'false')).lower() == 'true'
+    
     # Add database session to each request
     def add_dbsession(event):
         request = event.request
         request.dbsession = session_factory()
+        request.query_counter = QueryCounter().start()
+        ReplicaRouter.route(request, request.dbsession, replica)
         
         def cleanup(request):
             session_factory.remove()
+            request.query_counter.stop()
+        
+        def after_write(request, response):
+            ReplicaRouter.after_request(request, request.dbsession, response)
+        
+        def add_sql_count_header(request, response):
+            response.headers['X-SQL-Count'] = str(request.query_counter.count)
+            if replica is not None:
+                response.headers['X-DB-Bind'] = ReplicaRouter.bind_name(request.dbsession)
         
         request.add_finished_callback(cleanup)
+        if replica is not None:
+            request.add_response_callback(after_write)
+        if debug_sql_count:
+            request.add_response_callback(add_sql_count_header)
     
     config.add_subscriber(add_dbsession, 'pyramid.events.NewRequest')
     
@@ -39,6 +110,8 @@ def main(global_config, **settings):
         if isinstance(exc, HTTPException):
             response.status = exc.status
             error_detail = exc.detail if exc.detail else str(exc)
+            if 'Retry-After' in exc.headers:
+                response.headers['Retry-After'] = exc.headers['Retry-After']
         else:
             response.status = 500
             error_detail = str(exc)
@@ -49,21 +122,25 @@ def main(global_config, **settings):
     config.add_view(error_handler, context=Exception, renderer='json')
     
     # CORS middleware
-    def cors_factory(handler, registry):
-        def cors_handler(request):
-            response = handler(request)
-            response.headers.update({
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST,GET,OPTIONS,PUT,DELETE,PATCH',
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-                'Access-Control-Max-Age': '3600'
-            })
-            return response
-        return cors_handler
-    
     config.add_tween('app.cors_factory')
     
+    # Per-route latency / SQL metrics, Server-Timing header, /metrics
+    if str(settings.get('metrics', 'true')).lower() == 'true':
+        config.add_tween('app.utils.metrics.metrics_tween_factory')
+    
+    # Token buckets per IP / email on login and register (429 + Retry-After before bcrypt runs);
+    # under CORS and metrics so rejected requests still get CORS headers and are counted
+    if str(settings.get('rate_limit', 'true')).lower() == 'true':
+        config.add_tween('app.utils.rate_limit.rate_limit_tween_factory', under='app.cors_factory')
+    
     # Include view configuration
     config.include('app.views')
     
-    return config.make_wsgi_app()
+    config.registry.dbengine = engine
+    config.registry.dbreplica = replica
+    config.registry.index_worker = index_worker
+    config.registry.startup_report = report
+    app = config.make_wsgi_app()
+    report.mark('routes')
+    report.log()
+    return app
@@ -1,29 +1,89 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
 
+from app.utils.pool_stats import InstrumentedQueuePool
+
 class DatabaseConfig:
     """Database configuration"""
     
     @staticmethod
-    def get_engine(settings):
-        """Create SQLAlchemy engine"""
+    def get_connection_string(settings):
+        """Build database URL from settings (db_url overrides the db_* parts)"""
+        if settings.get('db_url'):
+            return settings['db_url']
+        
         db_user = settings.get('db_user', 'postgres')
         db_password = settings.get('db_password', 'password')
         db_host = settings.get('db_host', 'localhost')
         db_port = settings.get('db_port', '5432')
         db_name = settings.get('db_name', 'job_portal_db')
         
-        connection_string = f'postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}'
+        return f'postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}'
+    
+    @staticmethod
+    def get_env_connection_string():
+        """DATABASE_URL if set, otherwise the same DB_* variables as wsgi.py"""
+        return os.getenv('DATABASE_URL') or DatabaseConfig.get_connection_string({
+            'db_user': os.getenv('DB_USER', 'postgres'),
+            'db_password': os.getenv('DB_PASSWORD', 'password'),
+            'db_host': os.getenv('DB_HOST', 'localhost'),
+            'db_port': os.getenv('DB_PORT', '5432'),
+            'db_name': os.getenv('DB_NAME', 'job_portal_db'),
+        })
+    
+    @staticmethod
+    def get_setting(settings, name, default):
+        """settings[name], else the NAME environment variable, else default"""
+        value = settings.get(name)
+        if value is None or value == '':
+            value = os.environ.get(name.upper(), default)
+        return value
+    
+    @staticmethod
+    def get_pool_options(settings):
+        """
+        Connection pool options (per worker process):
+        db_pool_size, db_max_overflow, db_pool_timeout (s), db_pool_recycle (s),
+        db_pool_pre_ping, db_statement_timeout (ms, 0 = off; PostgreSQL only)
+        """
+        get = DatabaseConfig.get_setting
+        return {
+            'pool_size': int(get(settings, 'db_pool_size', 10)),
+            'max_overflow': int(get(settings, 'db_max_overflow', 5)),
+            'pool_timeout': float(get(settings, 'db_pool_timeout', 10)),
+            'pool_recycle': int(get(settings, 'db_pool_recycle', 1800)),
+            'pool_pre_ping': str(get(settings, 'db_pool_pre_ping', 'true')).lower() == 'true',
+            'statement_timeout': int(get(settings, 'db_statement_timeout', 30000)),
+        }
+    
+    @staticmethod
+    def get_engine(settings):
+        """Create SQLAlchemy engine with an instrumented, configurable pool"""
+        connection_string = DatabaseConfig.get_connection_string(settings)
+        url = make_url(connection_string)
+        options = DatabaseConfig.get_pool_options(settings)
+        statement_timeout = options.pop('statement_timeout')
         
-        engine = create_engine(
-            connection_string,
-            echo=settings.get('db_echo', False),
-            pool_size=20,
-            max_overflow=40
-        )
+        kwargs = {'echo': str(settings.get('db_echo', False)).lower() == 'true'}
+        # In-memory SQLite keeps its single-connection pool
+        if not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+            kwargs.update(options, poolclass=InstrumentedQueuePool)
+        if url.get_backend_name() == 'postgresql' and statement_timeout > 0:
+            kwargs['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+        
+        engine = create_engine(connection_string, **kwargs)
         return engine
     
+    @staticmethod
+    def get_replica_engine(settings):
+        """Engine for the read replica (db_replica_url / DB_REPLICA_URL), or None"""
+        replica_url = DatabaseConfig.get_setting(settings, 'db_replica_url', None)
+        if not replica_url:
+            return None
+        return DatabaseConfig.get_engine(dict(settings, db_url=replica_url))
+    
     @staticmethod
     def get_session(engine):
         """Create scoped session"""
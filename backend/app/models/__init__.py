@@ -1,7 +1,9 @@
-from .user import User
+from .user import Base, User
 from .job_seeker import JobSeeker
 from .employer import Employer
 from .job import Job
 from .application import Application
+from .email_outbox import EmailOutbox
+from .skill import Skill, job_seeker_skills
 
-__all__ = ['User', 'JobSeeker', 'Employer', 'Job', 'Application']
+__all__ = ['Base', 'User', 'JobSeeker', 'Employer', 'Job', 'Application', 'EmailOutbox', 'Skill', 'job_seeker_skills']
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from .user import Base
 from datetime import datetime
@@ -13,6 +13,9 @@ class ApplicationStatus(enum.Enum):
 
 class Application(Base):
     __tablename__ = 'applications'
+    __table_args__ = (
+        Index('ix_applications_job_id_status_applied_at', 'job_id', 'status', 'applied_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     job_id = Column(Integer, ForeignKey('jobs.id'), nullable=False)
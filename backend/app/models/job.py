@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Float, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Float, Enum, DDL, Index, event
 from sqlalchemy.orm import relationship
 from .user import Base
 from datetime import datetime
@@ -13,6 +13,9 @@ class JobType(enum.Enum):
 
 class Job(Base):
     __tablename__ = 'jobs'
+    __table_args__ = (
+        Index('ix_jobs_employer_id_created_at', 'employer_id', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     employer_id = Column(Integer, ForeignKey('employers.id'), nullable=False)
@@ -25,7 +28,7 @@ class Job(Base):
     job_type = Column(Enum(JobType), default=JobType.FULL_TIME)
     is_active = Column(Integer, default=1)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     employer = relationship("Employer", back_populates="jobs")
@@ -33,3 +36,15 @@ class Job(Base):
     
     def __repr__(self):
         return f"<Job {self.title} at {self.employer.company_name}>"
+
+# Full-text search (PostgreSQL only): generated tsvector + GIN index.
+# Not mapped on the model so SQLite create_all stays portable.
+event.listen(Job.__table__, 'after_create', DDL("""
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(requirements, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED;
+    CREATE INDEX IF NOT EXISTS ix_jobs_search_vector ON jobs USING GIN (search_vector);
+""").execute_if(dialect='postgresql'))
@@ -20,6 +20,7 @@ class JobSeeker(Base):
     # Relationships
     user = relationship("User", backref="job_seeker_profile")
     applications = relationship("Application", back_populates="job_seeker", cascade="all, delete-orphan")
+    skill_set = relationship("Skill", secondary="job_seeker_skills", passive_deletes=True)
     
     def __repr__(self):
         return f"<JobSeeker {self.user.email}>"
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Table, Index, event
+from .user import Base
+from datetime import datetime
+
+# Job seeker <-> skill links, parsed from JobSeeker.skills on profile update
+job_seeker_skills = Table(
+    'job_seeker_skills', Base.metadata,
+    Column('job_seeker_id', Integer, ForeignKey('job_seekers.id', ondelete='CASCADE'), primary_key=True),
+    Column('skill_id', Integer, ForeignKey('skills.id'), primary_key=True),
+    Index('ix_job_seeker_skills_skill_id_job_seeker_id', 'skill_id', 'job_seeker_id'),
+)
+
+class Skill(Base):
+    __tablename__ = 'skills'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(60), nullable=False, unique=True)  # Normalized: "power bi", "node.js"
+    label = Column(String(60), nullable=False)              # As first entered: "Power BI"
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Skill {self.name}>"
+
+@event.listens_for(job_seeker_skills, 'after_create')
+def _backfill_job_seeker_skills(target, connection, **kw):
+    """Tables created by create_all: link the skills existing profiles already have"""
+    from ..utils.skills import SkillIndex
+    SkillIndex.backfill(connection)
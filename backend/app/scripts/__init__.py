@@ -0,0 +1 @@
+# Command line entry points (see setup.py console_scripts)
@@ -0,0 +1,342 @@
+"""
+Production server: preloaded app, forked workers, threaded waitress.
+
+The master process imports the app and runs the factory once (schema
+check, route registration), binds the listening socket, then forks
+--workers processes that share it. Each worker serves with a waitress
+thread pool sized to its database pool (db_pool_size + db_max_overflow)
+so threads never queue on pool checkout, and starts its own email outbox
+worker and in-memory index builder after the fork. Workers write their
+request metrics to a shared directory (metrics_dir / METRICS_DIR, else a
+temporary one per server run), so /metrics on any worker covers them all.
+
+Signals (master):
+    SIGTERM / SIGINT  drain workers (stop accepting, finish in-flight
+                      requests up to --graceful-timeout) and exit
+    SIGHUP            re-read the ini file (or .env and the environment),
+                      re-run the app factory, fork a new set of workers,
+                      then drain the old ones
+Workers exit by themselves after --max-requests requests (plus up to
+--max-requests-jitter, so they don't all recycle at once) and the master
+forks a replacement. Code changes still need a full restart.
+
+--workers 0 (and platforms without fork, e.g. Windows) serve from a single
+threaded process.
+
+Usage:
+    job-portal-serve --port 6543 --workers 4
+    job-portal-serve --ini production.ini --workers 4 --max-requests 10000
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import signal
+import socket
+import sys
+import threading
+import time
+
+from dotenv import dotenv_values
+from waitress import create_server
+from waitress import wasyncore
+
+from ..config import DatabaseConfig
+from ..utils.metrics import Metrics
+
+log = logging.getLogger('app.serve')
+
+_dotenv_keys = set()    # variables set from .env rather than the real environment
+
+def load_env(reload: bool = False):
+    """
+    Apply .env to os.environ; the real environment wins. On reload the
+    variables that came from .env are refreshed too, so edits show up.
+    """
+    for key, value in dotenv_values().items():
+        if value is not None and (key not in os.environ or (reload and key in _dotenv_keys)):
+            os.environ[key] = value
+            _dotenv_keys.add(key)
+
+def load_settings(ini: str = None, reload: bool = False) -> dict:
+    """App settings from an ini file, else from the environment (like wsgi.py)"""
+    load_env(reload)
+    if ini:
+        from pyramid.paster import get_appsettings
+        return dict(get_appsettings(ini))
+    return {
+        'db_url': DatabaseConfig.get_env_connection_string(),
+        'db_echo': os.getenv('DB_ECHO', 'false'),
+        'frontend_url': os.getenv('FRONTEND_URL', 'http://localhost:3000'),
+    }
+
+def build_app(settings: dict):
+    """Run the factory in the master: no background threads and no open connections survive the fork"""
+    from .. import main as app_factory
+    app = app_factory({}, **dict(settings, email_outbox_worker='false', index_worker='false'))
+    app.registry.dbengine.dispose()
+    if app.registry.dbreplica is not None:
+        app.registry.dbreplica.dispose()
+    return app
+
+class CountingApp:
+    """WSGI wrapper that asks the worker to recycle after max_requests requests"""
+
+    def __init__(self, app, max_requests: int, on_limit):
+        self.app = app
+        self.max_requests = max_requests
+        self.on_limit = on_limit
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.count += 1
+            reached = self.count == self.max_requests
+        if reached:
+            self.on_limit()
+        return self.app(environ, start_response)
+
+class Worker:
+    """One serving process: waitress on the shared socket, graceful drain on SIGTERM"""
+
+    def __init__(self, app, sock, options, outbox: bool, indexes: bool):
+        self.app = app
+        self.sock = sock
+        self.options = options
+        self.outbox = outbox
+        self.indexes = indexes
+        self.draining = threading.Event()
+        self.server = None
+
+    def drain(self, reason: str):
+        if not self.draining.is_set():
+            log.info('Worker %s draining (%s)', os.getpid(), reason)
+            self.draining.set()
+            if self.server is not None:
+                self.server.pull_trigger()
+
+    def run(self) -> int:
+        from ..utils.email_outbox import EmailOutboxWorker
+        from ..utils.index_worker import IndexWorker
+        from ..utils.password import PasswordManager
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.drain('SIGTERM'))
+        signal.signal(signal.SIGINT, lambda signum, frame: self.drain('SIGINT'))
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        engine = self.app.registry.dbengine
+        outbox = EmailOutboxWorker(engine).start() if self.outbox else None
+        indexes = IndexWorker(engine).start() if self.indexes else None
+
+        limit = self.options.max_requests
+        if limit and self.options.max_requests_jitter:
+            limit += random.randint(0, self.options.max_requests_jitter)
+        wrapped = CountingApp(self.app, limit, lambda: self.drain(f'max requests {limit}'))
+
+        self.server = create_server(
+            wrapped, sockets=[self.sock], threads=self.options.threads,
+            connection_limit=self.options.connection_limit, ident='job-portal',
+        )
+        log.info('Worker %s serving with %s threads', os.getpid(), self.options.threads)
+
+        deadline = None
+        socket_map = self.server._map
+        while True:
+            wasyncore.loop(timeout=1.0, map=socket_map, use_poll=True, count=1)
+            if not self.draining.is_set():
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.options.graceful_timeout
+                self.server.accepting = False
+            # Close keep-alive connections once their current request is answered
+            for channel in list(self.server.active_channels.values()):
+                if not channel.requests:
+                    channel.will_close = True
+            if not self.server.active_channels or time.monotonic() >= deadline:
+                break
+
+        self.server.task_dispatcher.shutdown(cancel_pending=True, timeout=5)
+        Metrics.flush()
+        if outbox is not None:
+            outbox.stop(timeout=5)
+        if indexes is not None:
+            indexes.stop(timeout=5)
+        PasswordManager.shutdown()
+        engine.dispose()
+        log.info('Worker %s stopped after %s requests', os.getpid(), wrapped.count)
+        return 0
+
+class Master:
+    """Forks and supervises workers sharing one listening socket"""
+
+    def __init__(self, settings, options):
+        self.options = options
+        self.use_settings(settings)
+        self.workers = {}       # pid -> generation
+        self.generation = 0
+        self.stopping = False
+        self.reload = False
+
+    def use_settings(self, settings):
+        self.settings = settings
+        self.outbox = str(settings.get('email_outbox_worker', 'true')).lower() == 'true'
+        self.indexes = str(settings.get('index_worker', 'true')).lower() == 'true'
+
+    def spawn(self, app):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = self.generation
+            return
+        status = 1
+        try:
+            status = Worker(app, self.sock, self.options, self.outbox, self.indexes).run()
+        except Exception:
+            log.exception('Worker %s crashed', os.getpid())
+        finally:
+            os._exit(status)
+
+    def signal_workers(self, signum, generation=None):
+        for pid, worker_generation in list(self.workers.items()):
+            if generation is None or worker_generation == generation:
+                try:
+                    os.kill(pid, signum)
+                except ProcessLookupError:
+                    pass
+
+    def reap(self) -> list:
+        """Collect exited workers; returns their generations"""
+        exited = []
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                break
+            generation = self.workers.pop(pid, None)
+            if generation is not None:
+                exited.append(generation)
+                if os.waitstatus_to_exitcode(status) != 0 and not self.stopping:
+                    log.warning('Worker %s exited with status %s', pid, os.waitstatus_to_exitcode(status))
+        return exited
+
+    def run(self, app, sock) -> int:
+        self.sock = sock
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+
+        for _ in range(self.options.workers):
+            self.spawn(app)
+
+        while not self.stopping:
+            if self.reload:
+                self.reload = False
+                app = self.rolling_restart(app)
+            for generation in self.reap():
+                # Recycled or crashed: replace current-generation workers only
+                if generation == self.generation and not self.stopping:
+                    time.sleep(0.1)
+                    self.spawn(app)
+            time.sleep(0.2)
+
+        log.info('Master %s stopping %s workers', os.getpid(), len(self.workers))
+        self.signal_workers(signal.SIGTERM)
+        deadline = time.monotonic() + self.options.graceful_timeout + 10
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        self.signal_workers(signal.SIGKILL)
+        self.reap()
+        sock.close()
+        return 0
+
+    def rolling_restart(self, app):
+        """Settings are read again like at startup; the metrics directory stays so counters carry over"""
+        log.info('Master %s reloading', os.getpid())
+        try:
+            settings = dict(load_settings(self.options.ini, reload=True), metrics_dir=self.settings['metrics_dir'])
+            new_app = build_app(settings)
+        except Exception:
+            log.exception('Reload failed, keeping the running workers')
+            return app
+        self.use_settings(settings)
+        old_generation = self.generation
+        self.generation += 1
+        for _ in range(self.options.workers):
+            self.spawn(new_app)
+        self.signal_workers(signal.SIGTERM, old_generation)
+        return new_app
+
+    def handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def handle_reload(self, signum, frame):
+        self.reload = True
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.create_server((host, port), family=family, backlog=backlog)
+    sock.setblocking(False)
+    sock.set_inheritable(True)
+    return sock
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ini', help='Pyramid ini file (default: settings from environment / .env)')
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 6543)))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_WORKERS', 2)),
+                        help='forked worker processes (0 = serve from this process)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='threads per worker (default: db_pool_size + db_max_overflow)')
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('WEB_MAX_REQUESTS', 0)),
+                        help='recycle a worker after this many requests (0 = never)')
+    parser.add_argument('--max-requests-jitter', type=int, default=int(os.getenv('WEB_MAX_REQUESTS_JITTER', 0)))
+    parser.add_argument('--graceful-timeout', type=float, default=float(os.getenv('WEB_GRACEFUL_TIMEOUT', 30)))
+    parser.add_argument('--connection-limit', type=int, default=100, help='open connections per worker')
+    parser.add_argument('--backlog', type=int, default=1024)
+    return parser
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    if options.ini:
+        from pyramid.paster import setup_logging
+        setup_logging(options.ini)
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s [%(name)s] %(message)s')
+        for name in ('app.serve', 'app.utils.startup'):
+            logging.getLogger(name).setLevel(logging.INFO)
+
+    settings = load_settings(options.ini)
+    if options.threads is None:
+        pool = DatabaseConfig.get_pool_options(settings)
+        options.threads = pool['pool_size'] + pool['max_overflow']
+
+    if options.workers > 0 and hasattr(os, 'fork'):
+        configured_metrics_dir = DatabaseConfig.get_setting(settings, 'metrics_dir', '')
+        metrics_dir = Metrics.prepare_dir(configured_metrics_dir)
+        settings = dict(settings, metrics_dir=metrics_dir)
+
+    app = build_app(settings)
+    sock = bind(options.host, options.port, options.backlog)
+    log.info('Listening on http://%s:%s', options.host, options.port)
+
+    if options.workers <= 0 or not hasattr(os, 'fork'):
+        # Nobody would replace a recycled process
+        options.max_requests = 0
+        outbox = str(settings.get('email_outbox_worker', 'true')).lower() == 'true'
+        indexes = str(settings.get('index_worker', 'true')).lower() == 'true'
+        return Worker(app, sock, options, outbox, indexes).run()
+
+    try:
+        return Master(settings, options).run(app, sock)
+    finally:
+        if not configured_metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    sys.exit(main())
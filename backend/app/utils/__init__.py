@@ -1,5 +1,8 @@
 from .auth import AuthManager
 from .validators import Validators
 from .email import EmailService
+from .pagination import Pagination
+from .query_counter import QueryCounter
+from .fast_json import FastJSON
 
-__all__ = ['AuthManager', 'Validators', 'EmailService']
+__all__ = ['AuthManager', 'Validators', 'EmailService', 'Pagination', 'QueryCounter', 'FastJSON']
@@ -1,21 +1,28 @@
+import hmac
 import jwt
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from functools import wraps
 from pyramid.request import Request
 from pyramid.httpexceptions import HTTPUnauthorized, HTTPForbidden
 
+from ..models import Employer, JobSeeker
+
 class AuthManager:
     SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
     ALGORITHM = 'HS256'
     ACCESS_TOKEN_EXPIRE_HOURS = 24
     
     @staticmethod
-    def generate_token(user_id: int, role: str) -> str:
+    def generate_token(user_id: int, role: str, profile_id: int = None) -> str:
         """Generate JWT token"""
         payload = {
             'user_id': user_id,
             'role': role,
+            'profile_id': profile_id,
             'iat': datetime.utcnow(),
             'exp': datetime.utcnow() + timedelta(hours=AuthManager.ACCESS_TOKEN_EXPIRE_HOURS)
         }
@@ -41,6 +48,80 @@ class AuthManager:
             raise HTTPUnauthorized(detail='Missing or invalid authorization header')
         return auth_header[7:]  # Remove 'Bearer ' prefix
 
+class Principal:
+    """Authenticated caller: user id, role and Employer/JobSeeker profile id"""
+    
+    __slots__ = ('user_id', 'role', 'profile_id')
+    
+    def __init__(self, user_id: int, role: str, profile_id: int):
+        self.user_id = user_id
+        self.role = role
+        self.profile_id = profile_id
+    
+    def __repr__(self):
+        return f"<Principal user:{self.user_id} {self.role} profile:{self.profile_id}>"
+
+class PrincipalCache:
+    """
+    Per-process TTL/LRU cache of user_id -> Principal, used for tokens
+    issued before profile_id was added to the JWT claims.
+    """
+    
+    TTL_SECONDS = float(os.environ.get('PRINCIPAL_CACHE_TTL', 300))
+    MAX_ENTRIES = int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', 10000))
+    
+    _entries = OrderedDict()   # user_id -> (expires_at, Principal)
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def get(user_id: int):
+        with PrincipalCache._lock:
+            entry = PrincipalCache._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del PrincipalCache._entries[user_id]
+                return None
+            PrincipalCache._entries.move_to_end(user_id)
+            return entry[1]
+    
+    @staticmethod
+    def set(principal: Principal):
+        with PrincipalCache._lock:
+            PrincipalCache._entries[principal.user_id] = (time.monotonic() + PrincipalCache.TTL_SECONDS, principal)
+            PrincipalCache._entries.move_to_end(principal.user_id)
+            while len(PrincipalCache._entries) > PrincipalCache.MAX_ENTRIES:
+                PrincipalCache._entries.popitem(last=False)
+    
+    @staticmethod
+    def invalidate(user_id: int):
+        with PrincipalCache._lock:
+            PrincipalCache._entries.pop(user_id, None)
+    
+    @staticmethod
+    def lookup_profile_id(dbsession, user_id: int, role: str):
+        """Single query for the caller's Employer/JobSeeker id"""
+        model = Employer if role == 'employer' else JobSeeker
+        row = dbsession.query(model.id).filter_by(user_id=user_id).first()
+        return row[0] if row else None
+    
+    @staticmethod
+    def resolve(request, payload: dict) -> Principal:
+        """Build Principal from token claims, falling back to cache / database"""
+        user_id = payload['user_id']
+        role = payload['role']
+        if payload.get('profile_id') is not None:
+            return Principal(user_id, role, payload['profile_id'])
+        
+        principal = PrincipalCache.get(user_id)
+        if principal is None or principal.role != role:
+            profile_id = PrincipalCache.lookup_profile_id(request.dbsession, user_id, role)
+            if profile_id is None:
+                raise HTTPUnauthorized(detail='User profile not found')
+            principal = Principal(user_id, role, profile_id)
+            PrincipalCache.set(principal)
+        return principal
+
 def require_auth(func):
     """Decorator untuk protect endpoints yang perlu authentication"""
     @wraps(func)
@@ -48,8 +129,9 @@ def require_auth(func):
         try:
             token = AuthManager.get_token_from_header(request)
             payload = AuthManager.verify_token(token)
-            request.user_id = payload['user_id']
-            request.user_role = payload['role']
+            request.principal = PrincipalCache.resolve(request, payload)
+            request.user_id = request.principal.user_id
+            request.user_role = request.principal.role
         except HTTPUnauthorized:
             raise
         return func(request, *args, **kwargs)
@@ -67,3 +149,27 @@ def require_role(*roles):
             return func(request, *args, **kwargs)
         return wrapper
     return decorator
+
+def internal_trusted_addrs(settings) -> frozenset:
+    """Addresses allowed without a token (internal_trusted_addrs / INTERNAL_TRUSTED_ADDRS); empty by default"""
+    value = settings.get('internal_trusted_addrs') or os.environ.get('INTERNAL_TRUSTED_ADDRS', '')
+    return frozenset(addr.strip() for addr in value.split(',') if addr.strip())
+
+def require_internal(func):
+    """
+    Decorator untuk internal endpoints (pool stats, metrics): X-Internal-Token
+    matching the internal_token setting / INTERNAL_TOKEN env, or a caller
+    listed in internal_trusted_addrs. Loopback is not trusted implicitly: a
+    local reverse proxy makes every client look like 127.0.0.1.
+    """
+    @wraps(func)
+    def wrapper(request: Request, *args, **kwargs):
+        settings = request.registry.settings
+        expected = settings.get('internal_token') or os.environ.get('INTERNAL_TOKEN', '')
+        supplied = request.headers.get('X-Internal-Token', '')
+        if expected and supplied and hmac.compare_digest(supplied, expected):
+            return func(request, *args, **kwargs)
+        if request.remote_addr in internal_trusted_addrs(settings):
+            return func(request, *args, **kwargs)
+        raise HTTPForbidden(detail='Internal endpoint')
+    return wrapper
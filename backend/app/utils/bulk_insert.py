@@ -0,0 +1,87 @@
+import io
+from datetime import date, datetime
+from sqlalchemy import insert
+
+def _copy_text(value) -> str:
+    """Format one value for COPY ... FROM STDIN (text format)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        text = value.isoformat()
+    else:
+        text = str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+class BulkInsert:
+    """
+    Batched inserts that bypass the ORM unit of work:
+    COPY ... FROM STDIN on PostgreSQL (psycopg2), executemany elsewhere.
+    Rows are dicts keyed by column name and must all have the same keys.
+    """
+
+    @staticmethod
+    def uses_copy(connection) -> bool:
+        return connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2'
+
+    @staticmethod
+    def fill_defaults(table, rows: list) -> list:
+        """Apply Python-side column defaults, as a Core insert would (COPY skips them)"""
+        defaults = [
+            column for column in table.columns
+            if column.default is not None and (column.default.is_scalar or column.default.is_callable)
+        ]
+        for row in rows:
+            for column in defaults:
+                if row.get(column.key) is None:
+                    default = column.default
+                    row[column.key] = default.arg if default.is_scalar else default.arg(None)
+        return rows
+
+    @staticmethod
+    def copy(connection, table, rows: list):
+        """Stream rows into table with COPY FROM STDIN on the connection's transaction"""
+        rows = BulkInsert.fill_defaults(table, rows)
+        names = list(rows[0])
+        dialect = connection.dialect
+        processors = [table.c[name].type._cached_bind_processor(dialect) for name in names]
+
+        buffer = io.StringIO()
+        for row in rows:
+            values = []
+            for name, processor in zip(names, processors):
+                value = row[name]
+                values.append(_copy_text(processor(value) if processor else value))
+            buffer.write('\t'.join(values))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        preparer = dialect.identifier_preparer
+        columns = ', '.join(preparer.quote(name) for name in names)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(f'COPY {preparer.format_table(table)} ({columns}) FROM STDIN', buffer)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def insert(connection, table, rows: list, returning=None):
+        """
+        Insert rows in one batch. With returning (a column), returns its
+        values in row order when the driver supports it, otherwise None.
+        """
+        if not rows:
+            return []
+
+        if returning is None and BulkInsert.uses_copy(connection):
+            BulkInsert.copy(connection, table, rows)
+            return None
+
+        stmt = insert(table)
+        if returning is not None and connection.dialect.insert_executemany_returning_sort_by_parameter_order:
+            result = connection.execute(stmt.returning(returning, sort_by_parameter_order=True), rows)
+            return result.scalars().all()
+
+        connection.execute(stmt, rows)
+        return None
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+class CountCache:
+    """
+    Per-process cache of listing totals, keyed by normalized filter set.
+    Write views invalidate their namespace ('jobs', 'applications');
+    the TTL bounds staleness for writes made by other worker processes.
+    """
+
+    TTL_SECONDS = float(os.environ.get('COUNT_CACHE_TTL', 60))
+    MAX_ENTRIES = int(os.environ.get('COUNT_CACHE_MAX_ENTRIES', 10000))
+
+    _entries = {}                       # key -> (expires_at, value)
+    _generations = defaultdict(int)     # namespace -> invalidation counter
+    _lock = threading.Lock()
+
+    @staticmethod
+    def make_key(namespace: str, **filters) -> tuple:
+        """Normalize filters: drop empty values, case-fold strings, sort"""
+        items = []
+        for name, value in filters.items():
+            if value is None or value == '':
+                continue
+            if isinstance(value, str):
+                value = value.strip().lower()
+            items.append((name, value))
+        return (namespace, tuple(sorted(items)))
+
+    @staticmethod
+    def get(key: tuple):
+        entry = CountCache._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    @staticmethod
+    def get_or_count(key: tuple, count_fn) -> int:
+        """Return cached total for key, running count_fn on a miss"""
+        total = CountCache.get(key)
+        if total is not None:
+            return total
+
+        generation = CountCache._generations[key[0]]
+        total = count_fn()
+        CountCache.set(key, total, generation)
+        return total
+
+    @staticmethod
+    def set(key: tuple, total: int, generation: int = None):
+        with CountCache._lock:
+            # Skip totals computed before a concurrent invalidation
+            if generation is not None and generation != CountCache._generations[key[0]]:
+                return
+            CountCache._entries.pop(key, None)
+            while len(CountCache._entries) >= CountCache.MAX_ENTRIES:
+                CountCache._entries.pop(next(iter(CountCache._entries)))
+            CountCache._entries[key] = (time.monotonic() + CountCache.TTL_SECONDS, total)
+
+    @staticmethod
+    def generation(namespace: str) -> int:
+        return CountCache._generations[namespace]
+
+    @staticmethod
+    def invalidate(*namespaces):
+        """Drop cached totals after writes to these listings"""
+        with CountCache._lock:
+            for namespace in namespaces:
+                CountCache._generations[namespace] += 1
+            for key in [key for key in CountCache._entries if key[0] in namespaces]:
+                del CountCache._entries[key]
+
+    @staticmethod
+    def estimate(dbsession, query):
+        """
+        Planner row estimate for a query (PostgreSQL only).
+        Returns None when the database can't provide one.
+        """
+        bind = dbsession.get_bind()
+        if bind.dialect.name != 'postgresql':
+            return None
+
+        compiled = query.statement.compile(dialect=bind.dialect)
+        plan = dbsession.connection().exec_driver_sql(
+            'EXPLAIN (FORMAT JSON) ' + compiled.string, compiled.params
+        ).scalar()
+        return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,88 @@
+import hashlib
+import hmac
+import math
+import os
+import time
+from sqlalchemy.orm import Session
+
+from .auth import AuthManager
+
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+class RoutingSession(Session):
+    """
+    Session that reads from info['replica'] (when set) and writes to its
+    own bind, the primary. The first flush, DML statement or FOR UPDATE
+    select pins the session to the primary, so everything the request
+    reads afterwards sees its own writes.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        replica = self.info.get('replica')
+        if replica is None or self.info.get('primary'):
+            return super().get_bind(mapper, clause=clause, **kw)
+        if self._flushing or getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None:
+            self.info['primary'] = True
+            return super().get_bind(mapper, clause=clause, **kw)
+        return replica
+
+    def use_primary(self):
+        """Route the rest of this session to the primary"""
+        self.info['primary'] = True
+
+class ReplicaRouter:
+    """
+    Read-your-writes window carried by the client: after a write request
+    the response sets a signed expiry (cookie and X-DB-Primary-Until
+    header) STICKY_SECONDS ahead, and reads presenting it - as the cookie
+    or echoed in the header - go to the primary until then. Any worker
+    process can check it, and one client's write never moves other
+    clients' reads (e.g. everyone behind the same proxy address).
+    """
+
+    STICKY_SECONDS = float(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+    COOKIE_NAME = 'db_primary_until'
+    HEADER_NAME = 'X-DB-Primary-Until'
+
+    @staticmethod
+    def sign(expires_ms: int) -> str:
+        digest = hmac.new(AuthManager.SECRET_KEY.encode('utf-8'), str(expires_ms).encode('ascii'), hashlib.sha256)
+        return f'{expires_ms}.{digest.hexdigest()[:32]}'
+
+    @staticmethod
+    def is_sticky(token: str) -> bool:
+        """A token we signed that has not expired"""
+        expires, _, _ = (token or '').partition('.')
+        if not expires.isdigit() or not hmac.compare_digest(ReplicaRouter.sign(int(expires)), token):
+            return False
+        return int(expires) > time.time() * 1000
+
+    @staticmethod
+    def client_token(request) -> str:
+        return request.headers.get(ReplicaRouter.HEADER_NAME) or request.cookies.get(ReplicaRouter.COOKIE_NAME, '')
+
+    @staticmethod
+    def route(request, session, replica):
+        """Send a read request's session to the replica unless its client is in the sticky window"""
+        if replica is None:
+            return
+        if request.method in READ_METHODS and not ReplicaRouter.is_sticky(ReplicaRouter.client_token(request)):
+            session.info['replica'] = replica
+
+    @staticmethod
+    def after_request(request, session, response):
+        """Start the sticky window after any successful request that wrote"""
+        if response.status_int >= 400 or (request.method in READ_METHODS and not session.info.get('primary')):
+            return
+        seconds = ReplicaRouter.STICKY_SECONDS
+        token = ReplicaRouter.sign(int((time.time() + seconds) * 1000))
+        response.headers[ReplicaRouter.HEADER_NAME] = token
+        response.set_cookie(
+            ReplicaRouter.COOKIE_NAME, token, max_age=max(int(math.ceil(seconds)), 1), path='/',
+            httponly=True, samesite='Lax', secure=request.scheme == 'https',
+        )
+
+    @staticmethod
+    def bind_name(session) -> str:
+        """'replica' or 'primary', for the debug header"""
+        return 'replica' if session.info.get('replica') is not None and not session.info.get('primary') else 'primary'
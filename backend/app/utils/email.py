@@ -4,10 +4,14 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 
+from ..models import EmailOutbox
+
 class EmailService:
     
     SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
     SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
+    SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true'
+    SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', 10))
     SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'your-email@gmail.com')
     SENDER_PASSWORD = os.environ.get('SENDER_PASSWORD', 'your-app-password')
     
@@ -16,38 +20,68 @@ class EmailService:
         """Generate random email verification token"""
         return secrets.token_urlsafe(32)
     
+    @staticmethod
+    def build_verification_email(token: str, frontend_url: str) -> tuple:
+        """Return (subject, html body) for the verification email"""
+        verification_link = f"{frontend_url}/verify-email?token={token}"
+        
+        subject = "Verify Your Email - Job Portal System"
+        body = f"""
+        <html>
+            <body>
+                <h2>Email Verification</h2>
+                <p>Thank you for registering on Job Portal System!</p>
+                <p>Please click the link below to verify your email:</p>
+                <a href="{verification_link}" style="background-color: #4CAF50; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
+                    Verify Email
+                </a>
+                <p>Or copy and paste this link: {verification_link}</p>
+                <p>This link will expire in 24 hours.</p>
+                <p>Best regards,<br/>Job Portal Team</p>
+            </body>
+        </html>
+        """
+        return subject, body
+    
+    @staticmethod
+    def build_message(recipient_email: str, subject: str, body: str) -> MIMEMultipart:
+        """Build MIME message from the configured sender"""
+        message = MIMEMultipart('alternative')
+        message['Subject'] = subject
+        message['From'] = EmailService.SENDER_EMAIL
+        message['To'] = recipient_email
+        message.attach(MIMEText(body, 'html'))
+        return message
+    
+    @staticmethod
+    def connect() -> smtplib.SMTP:
+        """Open SMTP connection (STARTTLS + login when configured)"""
+        server = smtplib.SMTP(EmailService.SMTP_SERVER, EmailService.SMTP_PORT, timeout=EmailService.SMTP_TIMEOUT)
+        if EmailService.SMTP_USE_TLS:
+            server.starttls()
+        if EmailService.SENDER_PASSWORD:
+            server.login(EmailService.SENDER_EMAIL, EmailService.SENDER_PASSWORD)
+        return server
+    
+    @staticmethod
+    def queue_verification_email(dbsession, recipient_email: str, token: str, frontend_url: str):
+        """
+        Add verification email to the outbox in the caller's transaction.
+        Delivered by EmailOutboxWorker after commit.
+        """
+        subject, body = EmailService.build_verification_email(token, frontend_url)
+        outbox = EmailOutbox(recipient=recipient_email, subject=subject, body_html=body)
+        dbsession.add(outbox)
+        return outbox
+    
     @staticmethod
     def send_verification_email(recipient_email: str, token: str, frontend_url: str) -> bool:
-        """Send email verification link"""
+        """Send email verification link synchronously"""
         try:
-            verification_link = f"{frontend_url}/verify-email?token={token}"
-            
-            subject = "Verify Your Email - Job Portal System"
-            body = f"""
-            <html>
-                <body>
-                    <h2>Email Verification</h2>
-                    <p>Thank you for registering on Job Portal System!</p>
-                    <p>Please click the link below to verify your email:</p>
-                    <a href="{verification_link}" style="background-color: #4CAF50; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
-                        Verify Email
-                    </a>
-                    <p>Or copy and paste this link: {verification_link}</p>
-                    <p>This link will expire in 24 hours.</p>
-                    <p>Best regards,<br/>Job Portal Team</p>
-                </body>
-            </html>
-            """
-            
-            message = MIMEMultipart('alternative')
-            message['Subject'] = subject
-            message['From'] = EmailService.SENDER_EMAIL
-            message['To'] = recipient_email
-            message.attach(MIMEText(body, 'html'))
+            subject, body = EmailService.build_verification_email(token, frontend_url)
+            message = EmailService.build_message(recipient_email, subject, body)
             
-            with smtplib.SMTP(EmailService.SMTP_SERVER, EmailService.SMTP_PORT) as server:
-                server.starttls()
-                server.login(EmailService.SENDER_EMAIL, EmailService.SENDER_PASSWORD)
+            with EmailService.connect() as server:
                 server.send_message(message)
             
             return True
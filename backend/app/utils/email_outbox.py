@@ -0,0 +1,213 @@
+import logging
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+
+from ..models import EmailOutbox
+from ..models.email_outbox import EmailStatus
+from .email import EmailService
+
+log = logging.getLogger(__name__)
+
+class EmailOutboxWorker:
+    """
+    Background delivery of queued emails.
+
+    Claims due outbox rows in batches (SKIP LOCKED on PostgreSQL, so several
+    worker processes can run side by side), sends them over one reused SMTP
+    connection and reschedules failures with exponential backoff.
+
+    A claim is a lease: next_attempt_at pushed CLAIM_LEASE seconds ahead.
+    Slow SMTP can make a batch outlive it, so once half the lease is spent
+    the unsent rows are renewed; rows whose lease value changed meanwhile
+    were claimed by another worker and are skipped.
+    """
+
+    BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
+    POLL_INTERVAL = float(os.environ.get('EMAIL_POLL_INTERVAL', 5))
+    MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 8))
+    BACKOFF_BASE = float(os.environ.get('EMAIL_BACKOFF_BASE', 30))
+    BACKOFF_MAX = float(os.environ.get('EMAIL_BACKOFF_MAX', 3600))
+    CLAIM_LEASE = float(os.environ.get('EMAIL_CLAIM_LEASE', 300))
+    SMTP_IDLE_TIMEOUT = float(os.environ.get('SMTP_IDLE_TIMEOUT', 60))
+
+    _wakeup = threading.Event()
+
+    def __init__(self, engine, smtp_factory=None):
+        self.session_factory = sessionmaker(bind=engine)
+        self.smtp_factory = smtp_factory or EmailService.connect
+        self.smtp = None
+        self.smtp_last_used = 0.0
+        self.thread = None
+        self.stopping = threading.Event()
+
+    @staticmethod
+    def wake():
+        """Signal workers in this process that new mail was committed"""
+        EmailOutboxWorker._wakeup.set()
+
+    def start(self):
+        """Run the delivery loop in a daemon thread"""
+        self.thread = threading.Thread(target=self.run_forever, name='email-outbox', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        EmailOutboxWorker._wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self.close_smtp()
+
+    def run_forever(self):
+        while not self.stopping.is_set():
+            try:
+                sent = self.run_once()
+            except Exception:
+                log.exception('Email outbox delivery failed')
+                sent = 0
+
+            # Full batch: more may be waiting, loop straight away
+            if sent < self.BATCH_SIZE:
+                if time.monotonic() - self.smtp_last_used > self.SMTP_IDLE_TIMEOUT:
+                    self.close_smtp()
+                EmailOutboxWorker._wakeup.wait(self.POLL_INTERVAL)
+                EmailOutboxWorker._wakeup.clear()
+
+    def run_once(self) -> int:
+        """Deliver one batch of due emails. Returns number of rows processed."""
+        batch, lease_until = self.claim_batch()
+        if not batch:
+            return 0
+
+        renew_at = time.monotonic() + self.CLAIM_LEASE / 2
+        results = {}
+        i = 0
+        while i < len(batch):
+            if time.monotonic() >= renew_at:
+                # Record what is sent so far, then extend the lease on the rest
+                self.record_results(results, lease_until)
+                results = {}
+                pending = [row[0] for row in batch[i:]]
+                lease_until, owned = self.renew_lease(pending, lease_until)
+                renew_at = time.monotonic() + self.CLAIM_LEASE / 2
+                if len(owned) < len(pending):
+                    log.warning('Email outbox lease lost on %s rows', len(pending) - len(owned))
+                    batch[i:] = [row for row in batch[i:] if row[0] in owned]
+                    if i == len(batch):
+                        break
+
+            outbox_id, recipient, subject, body = batch[i]
+            i += 1
+            try:
+                self.send(recipient, subject, body)
+                results[outbox_id] = None
+            except Exception as e:
+                log.warning('Email %s to %s failed: %s', outbox_id, recipient, e)
+                results[outbox_id] = str(e)
+
+        self.record_results(results, lease_until)
+        return len(batch)
+
+    def claim_batch(self) -> tuple:
+        """Lease due rows by pushing next_attempt_at forward, then release the DB connection; (rows, lease)"""
+        dbsession = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            rows = dbsession.query(EmailOutbox) \
+                .filter(EmailOutbox.status == EmailStatus.PENDING, EmailOutbox.next_attempt_at <= now) \
+                .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id) \
+                .limit(self.BATCH_SIZE) \
+                .with_for_update(skip_locked=True) \
+                .all()
+
+            lease_until = now + timedelta(seconds=self.CLAIM_LEASE)
+            batch = []
+            for row in rows:
+                row.next_attempt_at = lease_until
+                batch.append((row.id, row.recipient, row.subject, row.body_html))
+            dbsession.commit()
+            return batch, lease_until
+        except Exception:
+            dbsession.rollback()
+            raise
+        finally:
+            dbsession.close()
+
+    def renew_lease(self, outbox_ids: list, lease_until: datetime) -> tuple:
+        """Push the lease forward on rows still holding ours; (new lease, ids renewed)"""
+        dbsession = self.session_factory()
+        try:
+            rows = dbsession.query(EmailOutbox) \
+                .filter(EmailOutbox.id.in_(outbox_ids), EmailOutbox.status == EmailStatus.PENDING,
+                        EmailOutbox.next_attempt_at == lease_until) \
+                .with_for_update(skip_locked=True) \
+                .all()
+            lease_until = datetime.utcnow() + timedelta(seconds=self.CLAIM_LEASE)
+            for row in rows:
+                row.next_attempt_at = lease_until
+            dbsession.commit()
+            return lease_until, {row.id for row in rows}
+        except Exception:
+            dbsession.rollback()
+            raise
+        finally:
+            dbsession.close()
+
+    def record_results(self, results: dict, lease_until: datetime):
+        """Mark sent / reschedule failed rows that still hold our lease"""
+        if not results:
+            return
+        dbsession = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            rows = dbsession.query(EmailOutbox) \
+                .filter(EmailOutbox.id.in_(list(results)), EmailOutbox.next_attempt_at == lease_until) \
+                .all()
+            for row in rows:
+                error = results[row.id]
+                row.attempts += 1
+                if error is None:
+                    row.status = EmailStatus.SENT
+                    row.sent_at = now
+                    row.last_error = None
+                elif row.attempts >= self.MAX_ATTEMPTS:
+                    row.status = EmailStatus.FAILED
+                    row.last_error = error
+                else:
+                    delay = min(self.BACKOFF_BASE * 2 ** (row.attempts - 1), self.BACKOFF_MAX)
+                    row.next_attempt_at = now + timedelta(seconds=delay)
+                    row.last_error = error
+            dbsession.commit()
+        except Exception:
+            dbsession.rollback()
+            raise
+        finally:
+            dbsession.close()
+
+    def send(self, recipient: str, subject: str, body: str):
+        """Send over the pooled connection, reconnecting once if it went stale"""
+        message = EmailService.build_message(recipient, subject, body)
+        for attempt in range(2):
+            if self.smtp is None:
+                self.smtp = self.smtp_factory()
+            try:
+                self.smtp.send_message(message)
+                self.smtp_last_used = time.monotonic()
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self.close_smtp()
+                if attempt:
+                    raise
+
+    def close_smtp(self):
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except Exception:
+            pass
+        self.smtp = None
@@ -0,0 +1,144 @@
+import os
+from collections import Counter
+from sqlalchemy import String, case, cast, func, literal, literal_column, tuple_, union_all
+
+from ..models import Job
+from ..models.job import JobType
+from .count_cache import CountCache
+
+class Facets:
+    """
+    Facet counts (job_type, location, salary band) for a filtered job
+    query, computed in one statement: GROUP BY GROUPING SETS on
+    PostgreSQL, a UNION ALL of per-facet GROUP BYs elsewhere. The empty
+    grouping set / branch carries the total, so the listing's count
+    comes for free. Results are cached in CountCache under the normalized
+    filter key, so job writes invalidate them with the totals.
+    """
+
+    NAMES = ('job_type', 'location', 'salary')
+    # Upper bounds of the salary bands (salary_min, else salary_max)
+    SALARY_BANDS = tuple(
+        int(bound) for bound in os.environ.get('FACET_SALARY_BANDS', '5000000,10000000,20000000,50000000').split(',')
+    )
+    LOCATION_LIMIT = int(os.environ.get('FACET_LOCATION_LIMIT', 20))
+    GROUPING_SETS_DIALECTS = ('postgresql', 'mssql', 'oracle')
+
+    @staticmethod
+    def parse(value: str) -> tuple:
+        """'location, job_type' -> ('job_type', 'location'); ValueError for unknown names"""
+        names = {name.strip().lower() for name in (value or '').split(',') if name.strip()}
+        unknown = names.difference(Facets.NAMES)
+        if unknown:
+            raise ValueError(f'Unknown facets: {", ".join(sorted(unknown))} (use {", ".join(Facets.NAMES)})')
+        return tuple(name for name in Facets.NAMES if name in names)
+
+    @staticmethod
+    def salary_band():
+        """
+        Band index: -1 = no salary, 0 = below the first bound, ..., len(bounds) = above the last.
+        Inlined constants, not bind parameters: the expression must match itself in GROUP BY.
+        """
+        salary = func.coalesce(Job.salary_min, Job.salary_max)
+        whens = [(salary.is_(None), literal_column('-1'))]
+        whens += [(salary < literal_column(str(bound)), literal_column(str(i))) for i, bound in enumerate(Facets.SALARY_BANDS)]
+        return case(*whens, else_=literal_column(str(len(Facets.SALARY_BANDS))))
+
+    @staticmethod
+    def expressions(names) -> dict:
+        columns = {'job_type': Job.job_type, 'location': Job.location, 'salary': Facets.salary_band()}
+        return {name: columns[name] for name in names}
+
+    @staticmethod
+    def band(index: int) -> dict:
+        bounds = Facets.SALARY_BANDS
+        if index < 0:
+            return {'value': 'unspecified', 'min': None, 'max': None}
+        low = bounds[index - 1] if index > 0 else 0
+        high = bounds[index] if index < len(bounds) else None
+        value = f'{low}-{high}' if high is not None else f'{low}+'
+        return {'value': value, 'min': low, 'max': high}
+
+    @staticmethod
+    def format(counts: dict) -> dict:
+        """{name: Counter(raw value -> count)} -> response lists"""
+        facets = {}
+        for name, counter in counts.items():
+            if name == 'job_type':
+                facets[name] = [
+                    {'value': (value.value if isinstance(value, JobType) else JobType[value].value), 'count': count}
+                    for value, count in counter.most_common() if value is not None
+                ]
+            elif name == 'location':
+                ranked = sorted(counter.items(), key=lambda item: (-item[1], item[0] or ''))
+                facets[name] = [{'value': value, 'count': count} for value, count in ranked[:Facets.LOCATION_LIMIT]]
+            else:
+                facets[name] = [dict(Facets.band(int(value)), count=count) for value, count in sorted(
+                    counter.items(), key=lambda item: (int(item[0]) < 0, int(item[0]))
+                )]
+        return facets
+
+    @staticmethod
+    def compute(dbsession, query, names, ids=None) -> tuple:
+        """(total, facets) for a filtered Job query; ids restricts rows in Python (broad in-process search)"""
+        exprs = Facets.expressions(names)
+        counts = {name: Counter() for name in names}
+        connection = dbsession.connection()
+
+        if ids is not None:
+            total = 0
+            rows = connection.execute(query.with_entities(Job.id, *exprs.values()).statement)
+            for row in rows:
+                if row[0] in ids:
+                    total += 1
+                    for name, value in zip(names, row[1:]):
+                        counts[name][value] += 1
+            return total, Facets.format(counts)
+
+        if connection.dialect.name in Facets.GROUPING_SETS_DIALECTS:
+            grouping = func.grouping(*exprs.values()).label('grouping')
+            stmt = query.with_entities(*exprs.values(), grouping, func.count().label('count')) \
+                .group_by(func.grouping_sets(*[tuple_(expr) for expr in exprs.values()], tuple_())) \
+                .order_by(None).statement
+            total = 0
+            # grouping() has one bit per expression, set when it is not grouped in the row
+            all_bits = (1 << len(names)) - 1
+            for row in connection.execute(stmt):
+                if row.grouping == all_bits:
+                    total = row.count
+                    continue
+                for i, name in enumerate(names):
+                    if not row.grouping & (1 << (len(names) - 1 - i)):
+                        counts[name][row[i]] += row.count
+            return total, Facets.format(counts)
+
+        branches = [
+            query.with_entities(literal(name).label('facet'), cast(expr, String).label('value'), func.count().label('count'))
+            .group_by(expr).order_by(None).statement
+            for name, expr in exprs.items()
+        ]
+        branches.append(
+            query.with_entities(literal('').label('facet'), cast(None, String).label('value'), func.count().label('count'))
+            .order_by(None).statement
+        )
+        total = 0
+        for facet, value, count in connection.execute(union_all(*branches)):
+            if facet == '':
+                total = count
+            else:
+                counts[facet][value] += count
+        return total, Facets.format(counts)
+
+    @staticmethod
+    def get_or_compute(dbsession, query, names, count_key: tuple, ids=None) -> dict:
+        """Facets for the normalized filter set, cached with (and seeding) the listing total"""
+        key = (count_key[0], count_key[1] + (('facets', names),))
+        facets = CountCache.get(key)
+        if facets is not None:
+            return facets
+        generation = CountCache.generation(count_key[0])
+        total, facets = Facets.compute(dbsession, query, names, ids)
+        CountCache.set(key, facets, generation)
+        if CountCache.get(count_key) is None:
+            CountCache.set(count_key, total, generation)
+        return facets
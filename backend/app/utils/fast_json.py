@@ -0,0 +1,58 @@
+import enum
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+def _default(value):
+    """Serialize the non-JSON types list rows carry (enums, timestamps, numerics)"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, '__json__'):
+        return value.__json__(None)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+class FastJSON:
+    """
+    JSON renderer writing bytes directly (orjson when installed, stdlib json
+    otherwise). List endpoints hand it plain row dicts from column selects,
+    so enums and datetimes are converted here instead of per ORM object.
+    """
+
+    BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+
+    @staticmethod
+    def use_orjson() -> bool:
+        return orjson is not None and FastJSON.BACKEND in ('auto', 'orjson')
+
+    @staticmethod
+    def dumps(value) -> bytes:
+        if FastJSON.use_orjson():
+            return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(value, default=_default, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def renderer_factory(info):
+        """Pyramid renderer factory; registered as the 'json' renderer"""
+        def render(value, system):
+            request = system.get('request')
+            if request is not None:
+                response = request.response
+                if response.content_type == response.default_content_type:
+                    response.content_type = 'application/json'
+            return FastJSON.dumps(value)
+        return render
+
+    @staticmethod
+    def rows_to_dicts(rows) -> list:
+        """Column-select rows to dicts keyed by column label"""
+        return [row._asdict() for row in rows]
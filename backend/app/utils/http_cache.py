@@ -0,0 +1,56 @@
+import hashlib
+import os
+from datetime import timezone
+from pyramid.httpexceptions import HTTPNotModified
+
+class HttpCache:
+    """ETag / Last-Modified validators and Cache-Control for public read endpoints"""
+
+    MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 30))
+    S_MAXAGE = int(os.environ.get('HTTP_CACHE_S_MAXAGE', 60))
+
+    @staticmethod
+    def make_etag(*parts) -> str:
+        """Stable hash of the values a response body is derived from"""
+        raw = '|'.join('' if part is None else str(part) for part in parts)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def last_modified(*timestamps):
+        """Latest non-null timestamp as aware UTC, truncated to HTTP date precision"""
+        timestamps = [ts for ts in timestamps if ts is not None]
+        if not timestamps:
+            return None
+        return max(timestamps).replace(microsecond=0, tzinfo=timezone.utc)
+
+    @staticmethod
+    def apply(response, etag: str, last_modified):
+        response.etag = etag
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.cache_control.public = True
+        response.cache_control.max_age = HttpCache.MAX_AGE
+        response.cache_control.s_maxage = HttpCache.S_MAXAGE
+
+    @staticmethod
+    def conditional(request, etag: str, last_modified=None):
+        """
+        Set validators on request.response. Returns an HTTPNotModified
+        response when the client's copy is current, otherwise None.
+        Without last_modified (list responses, where removed rows do not
+        move the date) only If-None-Match can answer 304.
+        """
+        HttpCache.apply(request.response, etag, last_modified)
+
+        if 'If-None-Match' in request.headers:
+            fresh = etag in request.if_none_match
+        else:
+            since = request.if_modified_since
+            fresh = since is not None and last_modified is not None and last_modified <= since
+
+        if not fresh:
+            return None
+
+        not_modified = HTTPNotModified()
+        HttpCache.apply(not_modified, etag, last_modified)
+        return not_modified
@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from pyramid.httpexceptions import HTTPServiceUnavailable
+
+log = logging.getLogger(__name__)
+
+class IndexWorker:
+    """
+    Background maintenance of the per-process in-memory indexes.
+
+    One daemon thread per index class builds the index for the engine at
+    worker start, then applies its updated_at watermark sync every
+    SYNC_SECONDS (and a full rebuild every REBUILD_SECONDS, where the class
+    sets one), so requests only read memory. An index class provides
+    _indexes (engine -> index), _lock, build(engine), sync(engine, index)
+    and SYNC_SECONDS; its indexes carry synced_at and built_at.
+    """
+
+    RETRY_AFTER = 5
+
+    _workers = weakref.WeakKeyDictionary()   # engine -> IndexWorker running in this process
+
+    def __init__(self, engine, index_classes=None):
+        self.engine = engine
+        self.index_classes = tuple(index_classes) if index_classes is not None else IndexWorker.default_classes()
+        self.ready = {cls: threading.Event() for cls in self.index_classes}
+        self.threads = []
+        self.stopping = threading.Event()
+        self.pid = os.getpid()
+
+    @staticmethod
+    def default_classes() -> tuple:
+        from .recommend import Recommender
+        from .skills import SkillIndex
+        from .suggest import JobSuggest
+        return (Recommender, SkillIndex, JobSuggest)
+
+    def start(self):
+        """Build and maintain each index in its own daemon thread"""
+        IndexWorker._workers[self.engine] = self
+        for cls in self.index_classes:
+            thread = threading.Thread(target=self.run_forever, args=(cls,), name=f'index-{cls.__name__}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        if IndexWorker._workers.get(self.engine) is self:
+            del IndexWorker._workers[self.engine]
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Block until every index has been built once (benchmarks, warm-up)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for event in self.ready.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not event.wait(remaining):
+                return False
+        return True
+
+    def run_forever(self, cls):
+        while not self.stopping.is_set():
+            try:
+                self.run_once(cls)
+            except Exception:
+                log.exception('%s index maintenance failed', cls.__name__)
+            self.stopping.wait(cls.SYNC_SECONDS)
+
+    def run_once(self, cls):
+        """Build (or rebuild) the index, else apply changes since its watermark"""
+        index = cls._indexes.get(self.engine)
+        rebuild_seconds = getattr(cls, 'REBUILD_SECONDS', 0)
+        if index is None or (rebuild_seconds and time.monotonic() - index.built_at >= rebuild_seconds):
+            started = time.perf_counter()
+            fresh = cls.build(self.engine)
+            if index is not None:
+                # Commits applied to the old index while building are re-read by the overlap sync
+                cls.sync(self.engine, fresh)
+            cls._indexes[self.engine] = fresh
+            self.ready[cls].set()
+            log.info('%s index built in %.1fs', cls.__name__, time.perf_counter() - started)
+        elif time.monotonic() - index.synced_at >= cls.SYNC_SECONDS:
+            cls.sync(self.engine, index)
+
+    @staticmethod
+    def running(engine) -> bool:
+        """A worker maintains this engine's indexes in this process (threads don't survive fork)"""
+        worker = IndexWorker._workers.get(engine)
+        return worker is not None and worker.pid == os.getpid() and not worker.stopping.is_set()
+
+    @staticmethod
+    def current(cls, engine):
+        """
+        The index requests read. While a worker maintains it this never
+        touches the database: 503 + Retry-After until the first build is
+        done. Without a worker (scripts, benchmarks, index_worker = false)
+        it is built on first use and synced inline.
+        """
+        index = cls._indexes.get(engine)
+        if IndexWorker.running(engine):
+            if index is None:
+                raise HTTPServiceUnavailable(
+                    detail='Index is warming up, please retry', headers={'Retry-After': str(IndexWorker.RETRY_AFTER)}
+                )
+            return index
+
+        if index is None:
+            with cls._lock:
+                index = cls._indexes.get(engine)
+                if index is None:
+                    index = cls.build(engine)
+                    cls._indexes[engine] = index
+            return index
+        if time.monotonic() - index.synced_at >= cls.SYNC_SECONDS:
+            cls.sync(engine, index)
+        return index
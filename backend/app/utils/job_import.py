@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+import os
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..models import Job
+from ..models.job import JobType
+from .bulk_insert import BulkInsert
+from .search import JobSearch
+from .validators import Validators
+
+TEXT_FIELDS = ('title', 'description', 'requirements', 'location', 'job_type')
+SALARY_FIELDS = ('salary_min', 'salary_max')
+
+class JobImport:
+    """
+    Streaming bulk job import for POST /jobs/bulk.
+
+    Records are parsed one line at a time, validated, and inserted in chunks
+    of CHUNK_SIZE rows, each chunk in its own transaction. Memory is bounded
+    by the chunk size and the capped error list, not by the upload size.
+    """
+
+    CHUNK_SIZE = int(os.environ.get('JOB_IMPORT_CHUNK_SIZE', 500))
+    MAX_ERRORS = int(os.environ.get('JOB_IMPORT_MAX_ERRORS', 1000))
+
+    CONTENT_TYPES = {
+        'text/csv': 'csv',
+        'application/csv': 'csv',
+        'application/x-ndjson': 'ndjson',
+        'application/ndjson': 'ndjson',
+        'application/jsonl': 'ndjson',
+        'application/json': 'ndjson',
+    }
+
+    @staticmethod
+    def detect_format(request):
+        """csv / ndjson from ?format= or Content-Type; None when unsupported"""
+        fmt = request.GET.get('format')
+        if fmt:
+            return fmt.lower() if fmt.lower() in ('csv', 'ndjson') else None
+        return JobImport.CONTENT_TYPES.get(request.content_type)
+
+    @staticmethod
+    def iter_records(stream, fmt: str):
+        """Yield (row number, record, parse error) from a binary stream"""
+        if fmt == 'csv':
+            reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+            for number, record in enumerate(reader, start=1):
+                yield number, record, None
+            return
+
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line), None
+            except ValueError as e:
+                yield number, None, f'Invalid JSON: {e}'
+
+    @staticmethod
+    def to_row(record, employer_id: int) -> tuple:
+        """Validate one record; returns (jobs row dict, None) or (None, errors)"""
+        if not isinstance(record, dict):
+            return None, {'row': 'Expected an object'}
+
+        errors = {}
+        data = {}
+        for field in TEXT_FIELDS:
+            value = record.get(field)
+            if value is None:
+                value = ''
+            elif not isinstance(value, str):
+                errors[field] = 'Must be a string'
+                value = ''
+            data[field] = value.strip()
+        for field in SALARY_FIELDS:
+            value = record.get(field)
+            if value is None or value == '':
+                data[field] = None
+                continue
+            try:
+                data[field] = float(value)
+            except (TypeError, ValueError):
+                errors[field] = 'Must be a number'
+                data[field] = None
+
+        errors.update(Validators.validate_job_data(data))
+        job_type = (data['job_type'] or 'FULL_TIME').upper()
+        if job_type not in JobType.__members__:
+            errors['job_type'] = f'Must be one of: {", ".join(t.value for t in JobType)}'
+        if errors:
+            return None, errors
+
+        return {
+            'employer_id': employer_id,
+            'title': data['title'],
+            'description': data['description'],
+            'requirements': data['requirements'],
+            'salary_min': data['salary_min'],
+            'salary_max': data['salary_max'],
+            'location': data['location'],
+            'job_type': JobType[job_type],
+            'is_active': 1,
+        }, None
+
+    @staticmethod
+    def run(dbsession, stream, fmt: str, employer_id: int) -> dict:
+        """Import every record from stream; returns the per-row report"""
+        report = {'created': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+        chunk = []
+        try:
+            for number, record, parse_error in JobImport.iter_records(stream, fmt):
+                if parse_error:
+                    JobImport.add_error(report, number, {'row': parse_error})
+                    continue
+                row, errors = JobImport.to_row(record, employer_id)
+                if errors:
+                    JobImport.add_error(report, number, errors)
+                    continue
+                chunk.append((number, row))
+                if len(chunk) >= JobImport.CHUNK_SIZE:
+                    JobImport.insert_chunk(dbsession, chunk, report)
+                    chunk = []
+        except (csv.Error, UnicodeDecodeError) as e:
+            report['aborted'] = f'Could not read upload: {e}'
+
+        if chunk:
+            JobImport.insert_chunk(dbsession, chunk, report)
+        return report
+
+    @staticmethod
+    def add_error(report: dict, number: int, errors: dict):
+        report['failed'] += 1
+        if len(report['errors']) < JobImport.MAX_ERRORS:
+            report['errors'].append({'row': number, 'errors': errors})
+        else:
+            report['errors_truncated'] = True
+
+    @staticmethod
+    def insert_chunk(dbsession, chunk: list, report: dict):
+        """Insert one chunk in its own transaction; on failure retry row by row to pin the errors"""
+        try:
+            JobImport.insert_rows(dbsession, [row for _, row in chunk])
+            report['created'] += len(chunk)
+            return
+        except SQLAlchemyError:
+            dbsession.rollback()
+
+        for number, row in chunk:
+            try:
+                JobImport.insert_rows(dbsession, [row])
+                report['created'] += 1
+            except SQLAlchemyError as e:
+                dbsession.rollback()
+                JobImport.add_error(report, number, {'database': str(getattr(e, 'orig', None) or e)})
+
+    @staticmethod
+    def insert_rows(dbsession, rows: list):
+        """Batch insert and commit, keeping the in-process search index current"""
+        uses_tsvector = JobSearch.uses_tsvector(dbsession)
+        ids = BulkInsert.insert(
+            dbsession.connection(), Job.__table__, rows, returning=None if uses_tsvector else Job.id
+        )
+        if ids is not None:
+            JobSearch.stage_changes(dbsession, {
+                job_id: (row['title'], row['requirements'], row['description'])
+                for job_id, row in zip(ids, rows)
+            })
+        dbsession.commit()
+        if ids is None and not uses_tsvector:
+            JobSearch.invalidate(JobSearch.index_engine(dbsession))
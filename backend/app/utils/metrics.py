@@ -0,0 +1,293 @@
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from ..config import DatabaseConfig
+from .pool_stats import InstrumentedQueuePool
+
+log = logging.getLogger(__name__)
+
+class RouteStats:
+    """Latency histogram plus DB time / statement totals for one route and method"""
+
+    __slots__ = ('count', 'duration_sum', 'db_sum', 'statements_sum', 'buckets')
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.duration_sum = 0.0
+        self.db_sum = 0.0
+        self.statements_sum = 0
+        self.buckets = [0] * (bucket_count + 1)
+
+class Metrics:
+    """
+    Request metrics collected by the metrics tween and rendered in
+    Prometheus text format at /metrics.
+
+    Counters live in each process. With a metrics directory (setting
+    metrics_dir / METRICS_DIR; serve.py sets one up for its forked
+    workers) every worker also writes its totals to
+    DIR/metrics-<pid>-<start>.json every FLUSH_SECONDS from a background
+    thread, and /metrics sums the files, so any worker answers for all of
+    them. Files of exited workers are kept so counters never go backwards;
+    their pool gauges are dropped.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+    POOL_COUNTERS = ('checkouts', 'timeouts', 'wait_total_ms')
+    POOL_GAUGES = ('checked_out', 'overflow')
+
+    _routes = {}                    # (route, method) -> RouteStats
+    _statuses = defaultdict(int)    # (route, method, status) -> requests
+    _lock = threading.Lock()
+
+    _dir = ''
+    _engine = None
+    _path = None                    # this process's file in _dir
+    _flusher_pid = None
+
+    @staticmethod
+    def configure(directory: str, engine=None):
+        """Share totals through directory ('' = this process only)"""
+        Metrics._dir = directory or ''
+        Metrics._engine = engine
+
+    @staticmethod
+    def prepare_dir(directory: str = '') -> str:
+        """Empty metrics directory for a new server run (a temporary one when not given)"""
+        if not directory:
+            return tempfile.mkdtemp(prefix='job-portal-metrics-')
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+            os.remove(path)
+        return directory
+
+    @staticmethod
+    def observe(route: str, method: str, status: int, duration: float, db_duration: float, statements: int):
+        slot = len(Metrics.BUCKETS)
+        for i, bound in enumerate(Metrics.BUCKETS):
+            if duration <= bound:
+                slot = i
+                break
+        key = (route, method)
+        with Metrics._lock:
+            stats = Metrics._routes.get(key)
+            if stats is None:
+                stats = Metrics._routes[key] = RouteStats(len(Metrics.BUCKETS))
+            stats.count += 1
+            stats.duration_sum += duration
+            stats.db_sum += db_duration
+            stats.statements_sum += statements
+            stats.buckets[slot] += 1
+            Metrics._statuses[(route, method, status)] += 1
+        if Metrics._dir and Metrics._flusher_pid != os.getpid():
+            Metrics.start_flusher()
+
+    @staticmethod
+    def reset():
+        with Metrics._lock:
+            Metrics._routes.clear()
+            Metrics._statuses.clear()
+
+    @staticmethod
+    def start_flusher():
+        """One flush thread per process, started by its first request (threads don't survive fork)"""
+        with Metrics._lock:
+            if Metrics._flusher_pid == os.getpid():
+                return
+            Metrics._flusher_pid = os.getpid()
+            Metrics._path = os.path.join(Metrics._dir, f'metrics-{os.getpid()}-{time.time_ns()}.json')
+
+        def run():
+            while True:
+                time.sleep(Metrics.FLUSH_SECONDS)
+                try:
+                    Metrics.flush()
+                except OSError:
+                    log.warning('Writing %s failed', Metrics._path, exc_info=True)
+
+        threading.Thread(target=run, name='metrics-flush', daemon=True).start()
+
+    @staticmethod
+    def flush():
+        """Write this process's totals to its file (atomically: readers never see half a file)"""
+        path = Metrics._path
+        if path is None or Metrics._flusher_pid != os.getpid():
+            return
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(Metrics.snapshot(Metrics._engine), f)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def snapshot(engine=None) -> dict:
+        """This process's totals: {'pid', 'routes': {route\tmethod: [...]}, 'statuses', 'pool'}"""
+        with Metrics._lock:
+            routes = {f'{route}\t{method}': [stats.count, stats.duration_sum, stats.db_sum, stats.statements_sum,
+                                              list(stats.buckets)]
+                      for (route, method), stats in Metrics._routes.items()}
+            statuses = {f'{route}\t{method}\t{status}': count
+                        for (route, method, status), count in Metrics._statuses.items()}
+        pool = None
+        if engine is not None:
+            stats = InstrumentedQueuePool.snapshot(engine)
+            if 'checkouts' in stats:
+                pool = {name: stats[name] for name in Metrics.POOL_COUNTERS + Metrics.POOL_GAUGES}
+                pool['histogram'] = stats['checkout_latency_histogram']
+        return {'pid': os.getpid(), 'routes': routes, 'statuses': statuses, 'pool': pool}
+
+    @staticmethod
+    def alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @staticmethod
+    def collect(engine=None) -> list:
+        """This process's snapshot plus the other workers' files in the metrics directory"""
+        snapshots = [Metrics.snapshot(engine)]
+        if not Metrics._dir:
+            return snapshots
+        for path in glob.glob(os.path.join(Metrics._dir, 'metrics-*.json')):
+            if path == Metrics._path:
+                continue
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue    # removed or replaced while reading
+            if snapshot.get('pool') and not Metrics.alive(snapshot['pid']):
+                for name in Metrics.POOL_GAUGES:
+                    snapshot['pool'][name] = 0
+            snapshots.append(snapshot)
+        return snapshots
+
+    @staticmethod
+    def merge(snapshots: list) -> dict:
+        routes, statuses, pool = {}, defaultdict(int), None
+        for snapshot in snapshots:
+            for key, (count, duration_sum, db_sum, statements_sum, buckets) in snapshot['routes'].items():
+                total = routes.setdefault(key, [0, 0.0, 0.0, 0, [0] * len(buckets)])
+                total[0] += count
+                total[1] += duration_sum
+                total[2] += db_sum
+                total[3] += statements_sum
+                total[4] = [a + b for a, b in zip(total[4], buckets)]
+            for key, count in snapshot['statuses'].items():
+                statuses[key] += count
+            if snapshot.get('pool'):
+                if pool is None:
+                    pool = defaultdict(int, histogram=defaultdict(int))
+                for name in Metrics.POOL_COUNTERS + Metrics.POOL_GAUGES:
+                    pool[name] += snapshot['pool'][name]
+                for name, count in snapshot['pool']['histogram'].items():
+                    pool['histogram'][name] += count
+        return {'routes': routes, 'statuses': statuses, 'pool': pool, 'workers': len(snapshots)}
+
+    @staticmethod
+    def render(engine=None) -> str:
+        """Prometheus text exposition of the request (and pool) metrics, summed over workers"""
+        merged = Metrics.merge(Metrics.collect(engine))
+        routes = sorted((tuple(key.split('\t')), value) for key, value in merged['routes'].items())
+        statuses = sorted((tuple(key.split('\t')), count) for key, count in merged['statuses'].items())
+
+        lines = [
+            '# HELP http_requests_total Requests by route, method and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        for (route, method, status), count in statuses:
+            lines.append(f'http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP http_request_duration_seconds Request latency by route.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (route, method), (count, duration_sum, _, _, buckets) in routes:
+            labels = f'route="{route}",method="{method}"'
+            running = 0
+            for bound, hits in zip(Metrics.BUCKETS, buckets):
+                running += hits
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {duration_sum:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines += [
+            '# HELP http_request_db_seconds_total Time spent executing SQL, by route.',
+            '# TYPE http_request_db_seconds_total counter',
+        ]
+        for (route, method), (_, _, db_sum, _, _) in routes:
+            lines.append(f'http_request_db_seconds_total{{route="{route}",method="{method}"}} {db_sum:.6f}')
+
+        lines += [
+            '# HELP http_request_sql_statements_total SQL statements executed, by route.',
+            '# TYPE http_request_sql_statements_total counter',
+        ]
+        for (route, method), (_, _, _, statements, _) in routes:
+            lines.append(f'http_request_sql_statements_total{{route="{route}",method="{method}"}} {statements}')
+
+        pool = merged['pool']
+        if pool is not None:
+            lines += [
+                '# TYPE db_pool_checked_out gauge',
+                f'db_pool_checked_out {pool["checked_out"]}',
+                '# TYPE db_pool_overflow gauge',
+                f'db_pool_overflow {pool["overflow"]}',
+                '# TYPE db_pool_checkout_timeouts_total counter',
+                f'db_pool_checkout_timeouts_total {pool["timeouts"]}',
+                '# TYPE db_pool_checkout_seconds histogram',
+            ]
+            for name, count in pool['histogram'].items():
+                bound = '+Inf' if name == 'le_inf' else str(int(name[3:-2]) / 1000)
+                lines.append(f'db_pool_checkout_seconds_bucket{{le="{bound}"}} {count}')
+            lines.append(f'db_pool_checkout_seconds_sum {pool["wait_total_ms"] / 1000:.6f}')
+            lines.append(f'db_pool_checkout_seconds_count {pool["checkouts"]}')
+
+        lines.append(f'# pid {os.getpid()}, {merged["workers"]} worker snapshot(s)')
+        return '\n'.join(lines) + '\n'
+
+# Known methods only, so arbitrary verbs can't grow the label set
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+def _record(request, status: int, start: float) -> tuple:
+    duration = time.perf_counter() - start
+    counter = getattr(request, 'query_counter', None)
+    db_duration = counter.duration if counter is not None else 0.0
+    statements = counter.count if counter is not None else 0
+    route = getattr(request, 'matched_route', None)
+    method = request.method if request.method in METHODS else 'OTHER'
+    Metrics.observe(route.name if route is not None else 'unmatched', method, status,
+                    duration, db_duration, statements)
+    return duration, db_duration, statements
+
+def metrics_tween_factory(handler, registry):
+    """
+    Time every request; record latency, SQL time and statement count
+    per route and add a Server-Timing header.
+    """
+    Metrics.configure(DatabaseConfig.get_setting(registry.settings, 'metrics_dir', ''), registry.dbengine)
+
+    def metrics_tween(request):
+        start = time.perf_counter()
+        try:
+            response = handler(request)
+        except Exception:
+            _record(request, 500, start)
+            raise
+
+        duration, db_duration, statements = _record(request, response.status_int, start)
+        response.headers['Server-Timing'] = (
+            f'db;dur={db_duration * 1000:.1f};desc="{statements} queries", app;dur={duration * 1000:.1f}'
+        )
+        return response
+    return metrics_tween
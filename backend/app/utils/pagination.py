@@ -0,0 +1,58 @@
+import base64
+import os
+from datetime import datetime
+from sqlalchemy import tuple_
+
+class Pagination:
+
+    DEFAULT_PER_PAGE = 10
+    MAX_PER_PAGE = int(os.environ.get('MAX_PER_PAGE', 100))
+
+    @staticmethod
+    def get_per_page(request) -> int:
+        """Read per_page from query string, clamped to the server-side cap"""
+        per_page = int(request.GET.get('per_page', Pagination.DEFAULT_PER_PAGE))
+        return max(1, min(per_page, Pagination.MAX_PER_PAGE))
+
+    @staticmethod
+    def get_page(request) -> int:
+        """Read page number from query string (offset mode)"""
+        return max(1, int(request.GET.get('page', 1)))
+
+    @staticmethod
+    def encode_cursor(sort_value: datetime, row_id: int) -> str:
+        """Encode (timestamp, id) position as opaque cursor string"""
+        raw = f"{sort_value.isoformat()}|{row_id}".encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """Decode opaque cursor string back to (timestamp, id)"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+            sort_value, row_id = raw.split('|', 1)
+            return datetime.fromisoformat(sort_value), int(row_id)
+        except Exception:
+            raise ValueError('Invalid cursor')
+
+    @staticmethod
+    def keyset_page(query, sort_column, id_column, cursor, per_page):
+        """
+        Fetch one page ordered by (sort_column, id_column) descending.
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        """
+        if cursor:
+            sort_value, row_id = Pagination.decode_cursor(cursor)
+            query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+
+        rows = query.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            last = rows[-1]
+            next_cursor = Pagination.encode_cursor(
+                getattr(last, sort_column.key), getattr(last, id_column.key)
+            )
+        return rows, next_cursor
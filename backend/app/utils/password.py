@@ -1,15 +1,98 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 import bcrypt
+from pyramid.httpexceptions import HTTPServiceUnavailable
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
 
 class PasswordManager:
-    
+    """
+    bcrypt hashing, run in a bounded process pool so a login burst can't
+    tie up request threads. HASH_POOL_SIZE=0 hashes inline.
+    """
+
+    ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    POOL_SIZE = int(os.environ.get('HASH_POOL_SIZE', os.cpu_count() or 2))
+    MAX_PENDING = int(os.environ.get('HASH_MAX_PENDING', 4 * (os.cpu_count() or 2)))
+    TIMEOUT = float(os.environ.get('HASH_TIMEOUT', 5))
+    RETRY_AFTER = 1
+
+    _executor = None
+    _executor_pid = None
+    _pending = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_executor():
+        """Lazily create the pool (per process, so it is safe after fork)"""
+        if PasswordManager._executor is not None and PasswordManager._executor_pid == os.getpid():
+            return PasswordManager._executor
+        with PasswordManager._lock:
+            if PasswordManager._executor is None or PasswordManager._executor_pid != os.getpid():
+                PasswordManager._executor = ProcessPoolExecutor(
+                    max_workers=PasswordManager.POOL_SIZE,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                PasswordManager._executor_pid = os.getpid()
+                PasswordManager._pending = threading.BoundedSemaphore(PasswordManager.MAX_PENDING)
+        return PasswordManager._executor
+
+    @staticmethod
+    def _run(func, *args):
+        """Run func in the pool; 503 when the queue is full or the call times out"""
+        if PasswordManager.POOL_SIZE <= 0:
+            return func(*args)
+
+        executor = PasswordManager._get_executor()
+        pending = PasswordManager._pending
+        if not pending.acquire(blocking=False):
+            raise HTTPServiceUnavailable(
+                detail='Server busy, please retry', headers={'Retry-After': str(PasswordManager.RETRY_AFTER)}
+            )
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            pending.release()
+            raise
+        # Slot frees when the work finishes, even if this request stopped waiting
+        future.add_done_callback(lambda _: pending.release())
+        try:
+            return future.result(timeout=PasswordManager.TIMEOUT)
+        except FutureTimeoutError:
+            raise HTTPServiceUnavailable(
+                detail='Password hashing timed out', headers={'Retry-After': str(PasswordManager.RETRY_AFTER)}
+            )
+
+    @staticmethod
+    def shutdown():
+        if PasswordManager._executor is not None and PasswordManager._executor_pid == os.getpid():
+            PasswordManager._executor.shutdown(wait=False, cancel_futures=True)
+        PasswordManager._executor = None
+
     @staticmethod
     def hash_password(password: str) -> str:
         """Hash password using bcrypt"""
-        salt = bcrypt.gensalt(rounds=12)
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+        hashed = PasswordManager._run(_hashpw, password.encode('utf-8'), PasswordManager.ROUNDS)
         return hashed.decode('utf-8')
-    
+
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """Verify plain password against hashed password"""
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return PasswordManager._run(_checkpw, plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        """True when the stored hash was made with a different cost factor"""
+        try:
+            return int(hashed_password.split('$')[2]) != PasswordManager.ROUNDS
+        except (IndexError, ValueError):
+            return True
+
+atexit.register(PasswordManager.shutdown)
@@ -0,0 +1,77 @@
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+class PoolStats:
+    """Checkout latency histogram and wait counters for one connection pool"""
+
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.buckets = [0] * (len(self.BUCKETS_MS) + 1)
+
+    def observe(self, seconds: float, timed_out: bool = False):
+        ms = seconds * 1000
+        slot = len(self.BUCKETS_MS)
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if ms <= bound:
+                slot = i
+                break
+        with self.lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.buckets[slot] += 1
+
+    def snapshot(self, pool) -> dict:
+        with self.lock:
+            # Cumulative, like Prometheus buckets
+            histogram, running = {}, 0
+            for bound, count in zip(self.BUCKETS_MS + ('inf',), self.buckets):
+                running += count
+                histogram[f'le_{bound}ms' if bound != 'inf' else 'le_inf'] = running
+            return {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_total_ms': round(self.wait_total * 1000, 3),
+                'wait_avg_ms': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'checkout_latency_histogram': histogram,
+            }
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout (queue wait plus any new connect)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.observe(time.perf_counter() - start)
+        return connection
+
+    @staticmethod
+    def snapshot(engine) -> dict:
+        """Live stats for an engine's pool; plain status for other pool classes"""
+        pool = engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            return dict(pool.stats.snapshot(pool), pool=type(pool).__name__)
+        return {'pool': type(pool).__name__, 'status': pool.status()}
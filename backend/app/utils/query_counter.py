@@ -0,0 +1,65 @@
+import contextvars
+import time
+from sqlalchemy import event
+
+class QueryCounter:
+    """
+    Count SQL statements (and time spent in them) while the counter is active.
+
+    Every request gets one (request.query_counter); tests can also wrap
+    calls directly:
+
+        with QueryCounter() as counter:
+            testapp.get('/applications', headers=headers)
+        assert counter.count <= 3, counter.statements
+    """
+
+    _active = contextvars.ContextVar('active_query_counters', default=())
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+        self._token = None
+
+    @staticmethod
+    def install(engine):
+        """Attach the statement hooks to an engine (idempotent)"""
+        if not event.contains(engine, 'before_cursor_execute', QueryCounter._before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', QueryCounter._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', QueryCounter._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counters = QueryCounter._active.get()
+        if not counters:
+            return
+        for counter in counters:
+            counter.count += 1
+            counter.statements.append(statement)
+        if context is not None:
+            context._query_counter_start = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_query_counter_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        for counter in QueryCounter._active.get():
+            counter.duration += elapsed
+
+    def start(self):
+        self._token = QueryCounter._active.set(QueryCounter._active.get() + (self,))
+        return self
+
+    def stop(self):
+        if self._token is not None:
+            QueryCounter._active.reset(self._token)
+            self._token = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from pyramid.httpexceptions import HTTPTooManyRequests
+from pyramid.interfaces import IRoutesMapper
+from pyramid.path import DottedNameResolver
+
+from ..config import DatabaseConfig
+
+log = logging.getLogger(__name__)
+
+def parse_limit(value: str) -> tuple:
+    """'10/60' -> (capacity 10, refill 10 tokens per 60 seconds); '' or '0' -> None (no limit)"""
+    if not value or value.strip() in ('0', 'off'):
+        return None
+    capacity, _, period = value.partition('/')
+    capacity, period = float(capacity), float(period or 60)
+    return capacity, capacity / period
+
+class MemoryBucketStore:
+    """Token buckets in this process: every worker limits on its own"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()    # key -> (tokens, monotonic time), least recently used first
+        self.lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        """Take one token; 0.0 when allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self.buckets[key] = (tokens, now)
+            # Evicting a bucket refills it: only keys idle the longest go
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+class RedisBucketStore:
+    """Token buckets shared by every worker and host, in Redis (pip install redis)"""
+
+    # Atomic refill + take; Redis' clock so workers agree on elapsed time
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str = None):
+        import redis
+        self.client = redis.Redis.from_url(url or os.environ.get('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0'))
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        return float(self.script(keys=[f'ratelimit:{key}'], args=[capacity, rate]))
+
+class RateLimiter:
+    """
+    Token-bucket admission control for the CPU-heavy auth endpoints
+    (bcrypt on login and register). Each POST takes a token from the
+    client IP's bucket and from the email's bucket before the view runs;
+    an empty bucket answers 429 with Retry-After.
+    """
+
+    # route name -> {scope: (capacity, refill per second)}; 'capacity/seconds' in the environment
+    RULES = {
+        'auth_login': {
+            'ip': parse_limit(os.environ.get('RATE_LIMIT_LOGIN_IP', '30/60')),
+            'email': parse_limit(os.environ.get('RATE_LIMIT_LOGIN_EMAIL', '10/300')),
+        },
+        'auth_register': {
+            'ip': parse_limit(os.environ.get('RATE_LIMIT_REGISTER_IP', '10/600')),
+            'email': parse_limit(os.environ.get('RATE_LIMIT_REGISTER_EMAIL', '3/600')),
+        },
+    }
+    MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100000))
+    # Reverse proxies in front of the app: client IP is this many entries from the end of X-Forwarded-For
+    PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', 0))
+
+    @staticmethod
+    def create_store(backend: str):
+        """memory, redis, or a dotted path to a store class with take(key, capacity, rate)"""
+        if backend == 'memory':
+            return MemoryBucketStore(RateLimiter.MAX_KEYS)
+        if backend == 'redis':
+            return RedisBucketStore()
+        return DottedNameResolver().resolve(backend)()
+
+    @staticmethod
+    def client_ip(request) -> str:
+        if RateLimiter.PROXY_HOPS > 0:
+            forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+            if len(forwarded) >= RateLimiter.PROXY_HOPS:
+                return forwarded[-RateLimiter.PROXY_HOPS]
+        return request.remote_addr or ''
+
+    @staticmethod
+    def request_email(request) -> str:
+        """Normalized email from the JSON body; '' when there is none (the view rejects the request)"""
+        try:
+            email = json.loads(request.body).get('email')
+        except (ValueError, AttributeError):
+            return ''
+        return email.strip().lower() if isinstance(email, str) else ''
+
+    @staticmethod
+    def bucket_keys(request, route_name: str, rules: dict) -> list:
+        """[(key, limit)]: IP first, so a flood from one address never touches victims' email buckets"""
+        keys = []
+        if rules.get('ip'):
+            keys.append((f'{route_name}:ip:{RateLimiter.client_ip(request)}', rules['ip']))
+        if rules.get('email'):
+            email = RateLimiter.request_email(request)
+            if email:
+                digest = hashlib.sha1(email.encode('utf-8')).hexdigest()
+                keys.append((f'{route_name}:email:{digest}', rules['email']))
+        return keys
+
+    @staticmethod
+    def too_many_requests(wait: float):
+        retry_after = max(1, math.ceil(wait))
+        response = HTTPTooManyRequests(headers={'Retry-After': str(retry_after)})
+        response.content_type = 'application/json'
+        response.body = json.dumps({'error': f'Too many attempts, retry in {retry_after} seconds'}).encode('utf-8')
+        return response
+
+def rate_limit_tween_factory(handler, registry):
+    """
+    Apply RateLimiter.RULES to POSTs before the view runs (the route is
+    matched here; GETs pass straight through). A shared store that fails
+    falls back to per-process buckets rather than failing logins.
+    """
+    store = RateLimiter.create_store(DatabaseConfig.get_setting(registry.settings, 'rate_limit_backend', 'memory'))
+    fallback = store if isinstance(store, MemoryBucketStore) else MemoryBucketStore(RateLimiter.MAX_KEYS)
+
+    def rate_limit_tween(request):
+        if request.method != 'POST':
+            return handler(request)
+        route = registry.getUtility(IRoutesMapper)(request)['route']
+        rules = RateLimiter.RULES.get(route.name) if route is not None else None
+        if not rules:
+            return handler(request)
+
+        for key, (capacity, rate) in RateLimiter.bucket_keys(request, route.name, rules):
+            try:
+                wait = store.take(key, capacity, rate)
+            except Exception:
+                log.warning('Rate limit store failed, using per-process buckets', exc_info=True)
+                wait = fallback.take(key, capacity, rate)
+            if wait > 0:
+                request.matched_route = route    # metrics label
+                return RateLimiter.too_many_requests(wait)
+        return handler(request)
+    return rate_limit_tween
@@ -0,0 +1,346 @@
+import math
+import os
+import re
+import threading
+import time
+import weakref
+from array import array
+from collections import Counter
+from datetime import timedelta
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..models import Job
+from ..models.job import JobType
+from .index_worker import IndexWorker
+from .search import JobSearch, TOKEN_PATTERN, tokenize
+
+try:
+    import numpy
+except ImportError:  # optional: vectorized scoring
+    numpy = None
+
+# Requirements carry most of the skills; the title adds role words
+FIELD_WEIGHTS = {'title': 0.6, 'requirements': 1.0}
+
+PHRASE_SPLIT = re.compile(r'[,;\n/|]')
+
+# Seniority words in job titles -> (min, max) years of experience; None = open-ended
+LEVELS = {
+    'intern': (0, 1), 'internship': (0, 1), 'magang': (0, 1), 'junior': (0, 2), 'entry': (0, 2),
+    'senior': (4, None), 'sr': (4, None), 'lead': (6, None), 'manager': (5, None),
+    'principal': (8, None), 'head': (8, None), 'director': (10, None),
+}
+NO_MAX = 127
+
+def skill_terms(text: str) -> Counter:
+    """Word tokens plus whole skill phrases ('power bi', 'node.js', 'c#') from a comma list"""
+    if not text:
+        return Counter()
+    terms = Counter(tokenize(text))
+    for phrase in PHRASE_SPLIT.split(text.lower()):
+        phrase = ' '.join(phrase.split())
+        if phrase and len(phrase) <= 40 and not TOKEN_PATTERN.fullmatch(phrase):
+            terms[phrase] += 1
+    return terms
+
+def experience_range(title: str, job_type) -> tuple:
+    """(min, max) years implied by the title's seniority words / internship type"""
+    if job_type == JobType.INTERNSHIP:
+        return 0, 1
+    low, high = 0, NO_MAX
+    for word in tokenize(title):
+        level = LEVELS.get(word)
+        if level is not None:
+            low = max(low, level[0])
+            high = min(high, level[1] if level[1] is not None else NO_MAX)
+    return low, max(high, low)
+
+def normalize_location(location: str) -> str:
+    return ' '.join((location or '').lower().split())
+
+class RecommendIndex:
+    """
+    Sparse term vectors of active jobs (title + requirements), stored
+    column-wise: one posting list (rows, weights) per term, appendable so
+    new and updated jobs are indexed without a rebuild. An update appends a
+    fresh row and marks the old one dead; compact() drops dead rows once
+    they pile up.
+
+    Weighting is SMART lnc.ltc: job vectors are log tf, cosine-normalized
+    (no idf, so adding a job never changes the others); the seeker's query
+    vector carries the idf. Scoring only touches the posting lists of the
+    seeker's skill terms, vectorized with NumPy when installed.
+    """
+
+    COMPACT_RATIO = 0.25
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.terms = {}                 # term -> term id
+        self.post_rows = []             # term id -> array('i') of rows
+        self.post_weights = []          # term id -> array('f') of weights
+        self.row_job = array('i')       # row -> job id
+        self.row_min_years = array('b')
+        self.row_max_years = array('b')
+        self.row_location = array('i')  # row -> location id
+        self.row_signature = array('q') # row -> hash of the indexed fields
+        self.alive = bytearray()        # row -> 1 while current
+        self.job_row = {}               # job id -> current row
+        self.locations = {'remote': 0}
+        self.watermark = None           # newest jobs.updated_at applied
+        self.synced_at = 0.0
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.job_row)
+
+    def idf(self, term_id: int) -> float:
+        return math.log((1 + len(self.job_row)) / (1 + len(self.post_rows[term_id]))) + 1
+
+    def add(self, job_id: int, title: str, requirements: str, location: str, job_type):
+        """Index (or re-index) one active job; unchanged jobs are left alone"""
+        signature = hash((title, requirements, location, job_type))
+        row = self.job_row.get(job_id)
+        if row is not None and self.row_signature[row] == signature:
+            return
+
+        weights = {}
+        for field, text in (('title', title), ('requirements', requirements)):
+            field_weight = FIELD_WEIGHTS[field]
+            for term, tf in skill_terms(text).items():
+                weights[term] = weights.get(term, 0.0) + field_weight * (1 + math.log(tf))
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        low, high = experience_range(title, job_type)
+
+        with self.lock:
+            self.remove(job_id)
+            row = len(self.row_job)
+            for term, weight in weights.items():
+                term_id = self.terms.get(term)
+                if term_id is None:
+                    term_id = self.terms[term] = len(self.post_rows)
+                    self.post_rows.append(array('i'))
+                    self.post_weights.append(array('f'))
+                self.post_rows[term_id].append(row)
+                self.post_weights[term_id].append(weight / norm)
+
+            location_id = self.locations.setdefault(normalize_location(location), len(self.locations))
+            self.row_job.append(job_id)
+            self.row_min_years.append(min(low, NO_MAX))
+            self.row_max_years.append(min(high, NO_MAX))
+            self.row_location.append(location_id)
+            self.row_signature.append(signature)
+            self.alive.append(1)
+            self.job_row[job_id] = row
+
+    def remove(self, job_id: int):
+        with self.lock:
+            row = self.job_row.pop(job_id, None)
+            if row is None:
+                return
+            self.alive[row] = 0
+            if len(self.alive) - len(self.job_row) > self.COMPACT_RATIO * len(self.alive) + 1000:
+                self.compact()
+
+    def compact(self):
+        """Drop dead rows from every posting list and renumber rows"""
+        with self.lock:
+            new_row = array('i', [-1]) * len(self.alive)
+            next_row = 0
+            for row, alive in enumerate(self.alive):
+                if alive:
+                    new_row[row] = next_row
+                    next_row += 1
+            for term_id, rows in enumerate(self.post_rows):
+                weights = self.post_weights[term_id]
+                kept = [(new_row[row], weight) for row, weight in zip(rows, weights) if new_row[row] >= 0]
+                self.post_rows[term_id] = array('i', (row for row, _ in kept))
+                self.post_weights[term_id] = array('f', (weight for _, weight in kept))
+            keep = [row for row, alive in enumerate(self.alive) if alive]
+            self.row_job = array('i', (self.row_job[row] for row in keep))
+            self.row_min_years = array('b', (self.row_min_years[row] for row in keep))
+            self.row_max_years = array('b', (self.row_max_years[row] for row in keep))
+            self.row_location = array('i', (self.row_location[row] for row in keep))
+            self.row_signature = array('q', (self.row_signature[row] for row in keep))
+            self.alive = bytearray(b'\x01') * len(keep)
+            self.job_row = {job_id: row for row, job_id in enumerate(self.row_job)}
+
+    def query_vector(self, skills: str) -> list:
+        """[(term id, weight)] for a seeker's skills: log tf x idf, L2-normalized"""
+        vector = [(self.terms[term], (1 + math.log(tf)) * self.idf(self.terms[term]))
+                  for term, tf in skill_terms(skills).items() if term in self.terms]
+        norm = math.sqrt(sum(w * w for _, w in vector)) or 1.0
+        return [(term_id, weight / norm) for term_id, weight in vector]
+
+    def top(self, skills: str, location: str, experience_years: int, k: int) -> list:
+        """[(job id, score)] best first: cosine x location boost x experience fit"""
+        with self.lock:
+            query = self.query_vector(skills)
+            if not query:
+                return []
+            location_id = self.locations.get(normalize_location(location), -1)
+            years = max(0, min(int(experience_years or 0), NO_MAX))
+            if numpy is not None:
+                return self._top_numpy(query, location_id, years, k)
+            return self._top_python(query, location_id, years, k)
+
+    def _top_numpy(self, query, location_id, years, k):
+        views = []
+        try:
+            scores = numpy.zeros(len(self.alive), dtype=numpy.float32)
+            for term_id, weight in query:
+                rows = numpy.frombuffer(self.post_rows[term_id], dtype=numpy.int32)
+                weights = numpy.frombuffer(self.post_weights[term_id], dtype=numpy.float32)
+                views += [rows, weights]
+                scores[rows] += weights * weight
+
+            alive = numpy.frombuffer(self.alive, dtype=numpy.uint8)
+            views.append(alive)
+            candidates = numpy.flatnonzero((scores > 0) & (alive == 1))
+            if not len(candidates):
+                return []
+            scores = scores[candidates]
+
+            locations = numpy.frombuffer(self.row_location, dtype=numpy.int32)[candidates]
+            scores *= numpy.where((locations == location_id) | (locations == 0), 1 + Recommender.LOCATION_BOOST, 1.0)
+            min_years = numpy.frombuffer(self.row_min_years, dtype=numpy.int8)[candidates].astype(numpy.float32)
+            max_years = numpy.frombuffer(self.row_max_years, dtype=numpy.int8)[candidates].astype(numpy.float32)
+            gap = numpy.maximum(min_years - years, 0) * Recommender.UNDER_PENALTY + \
+                numpy.maximum(years - max_years, 0) * Recommender.OVER_PENALTY
+            scores /= 1 + gap
+
+            if len(candidates) > k:
+                best = numpy.argpartition(-scores, k - 1)[:k]
+            else:
+                best = numpy.arange(len(candidates))
+            job_ids = numpy.frombuffer(self.row_job, dtype=numpy.int32)[candidates[best]]
+            ranked = sorted(zip(job_ids.tolist(), scores[best].tolist()), key=lambda item: (-item[1], -item[0]))
+            return [(job_id, round(score, 4)) for job_id, score in ranked]
+        finally:
+            # Release the buffer exports before the arrays can be appended to again
+            del views[:]
+            scores = rows = weights = alive = None
+
+    def _top_python(self, query, location_id, years, k):
+        scores = {}
+        for term_id, weight in query:
+            for row, doc_weight in zip(self.post_rows[term_id], self.post_weights[term_id]):
+                scores[row] = scores.get(row, 0.0) + doc_weight * weight
+        ranked = []
+        for row, score in scores.items():
+            if not self.alive[row]:
+                continue
+            if self.row_location[row] in (location_id, 0):
+                score *= 1 + Recommender.LOCATION_BOOST
+            gap = max(self.row_min_years[row] - years, 0) * Recommender.UNDER_PENALTY + \
+                max(years - self.row_max_years[row], 0) * Recommender.OVER_PENALTY
+            ranked.append((self.row_job[row], round(score / (1 + gap), 4)))
+        ranked.sort(key=lambda item: (-item[1], -item[0]))
+        return ranked[:k]
+
+class Recommender:
+    """
+    Per-process job recommendation indexes, one per engine, built and
+    kept in sync by the IndexWorker thread. Commits in this process update
+    the index right away; changes from other processes are picked up by
+    updated_at every SYNC_SECONDS.
+    """
+
+    LOCATION_BOOST = float(os.environ.get('RECOMMEND_LOCATION_BOOST', 0.25))
+    UNDER_PENALTY = float(os.environ.get('RECOMMEND_UNDER_PENALTY', 0.25))    # per missing year
+    OVER_PENALTY = float(os.environ.get('RECOMMEND_OVER_PENALTY', 0.1))       # per year above the range
+    SYNC_SECONDS = float(os.environ.get('RECOMMEND_SYNC_SECONDS', 10))
+    # Re-read this far behind the watermark: transactions commit out of updated_at order
+    SYNC_OVERLAP = timedelta(seconds=float(os.environ.get('RECOMMEND_SYNC_OVERLAP', 60)))
+    MAX_LIMIT = 100
+
+    _indexes = weakref.WeakKeyDictionary()   # engine -> RecommendIndex
+    _lock = threading.Lock()
+
+    COLUMNS = (Job.id, Job.title, Job.requirements, Job.location, Job.job_type, Job.is_active, Job.updated_at)
+
+    @staticmethod
+    def apply_rows(index: RecommendIndex, rows):
+        for row in rows:
+            if row.is_active:
+                index.add(row.id, row.title, row.requirements, row.location, row.job_type)
+            else:
+                index.remove(row.id)
+            if row.updated_at is not None and (index.watermark is None or row.updated_at > index.watermark):
+                index.watermark = row.updated_at
+
+    @staticmethod
+    def build(engine) -> RecommendIndex:
+        index = RecommendIndex()
+        stmt = select(*Recommender.COLUMNS).where(Job.is_active == 1)
+        with engine.connect() as conn:
+            result = conn.execution_options(yield_per=10000).execute(stmt)
+            for batch in result.partitions():
+                Recommender.apply_rows(index, batch)
+        index.synced_at = time.monotonic()
+        return index
+
+    @staticmethod
+    def get_index(dbsession) -> RecommendIndex:
+        """Index for this session's primary engine (see IndexWorker.current)"""
+        return IndexWorker.current(Recommender, JobSearch.index_engine(dbsession))
+
+    @staticmethod
+    def sync(engine, index: RecommendIndex):
+        """Apply jobs changed since the watermark (other workers, bulk imports)"""
+        index.synced_at = time.monotonic()
+        stmt = select(*Recommender.COLUMNS)
+        if index.watermark is not None:
+            stmt = stmt.where(Job.updated_at >= index.watermark - Recommender.SYNC_OVERLAP)
+        with engine.connect() as conn:
+            Recommender.apply_rows(index, conn.execute(stmt))
+
+    @staticmethod
+    def invalidate(engine):
+        Recommender._indexes.pop(engine, None)
+
+    @staticmethod
+    def recommend(dbsession, seeker, limit: int) -> list:
+        """[(job id, score)] for a JobSeeker, best first"""
+        if not seeker.skills:
+            return []
+        index = Recommender.get_index(dbsession)
+        return index.top(seeker.skills, seeker.location, seeker.experience_years, limit)
+
+    @staticmethod
+    def forget(dbsession, job_ids):
+        """Drop jobs the database no longer returns as active (deleted by another process)"""
+        index = Recommender._indexes.get(JobSearch.index_engine(dbsession))
+        if index is not None:
+            for job_id in job_ids:
+                index.remove(job_id)
+
+@event.listens_for(Session, 'after_flush')
+def _stage_recommend_changes(session, flush_context):
+    """Remember flushed job changes until the transaction commits"""
+    staged = session.info.setdefault('recommend_changes', {})
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, Job):
+            staged[obj.id] = (obj.title, obj.requirements, obj.location, obj.job_type, obj.is_active)
+    for obj in session.deleted:
+        if isinstance(obj, Job):
+            staged[obj.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def _apply_recommend_changes(session):
+    staged = session.info.pop('recommend_changes', None)
+    if not staged:
+        return
+    index = Recommender._indexes.get(JobSearch.index_engine(session))
+    if index is None:
+        return
+    for job_id, fields in staged.items():
+        if fields is None or not fields[-1]:
+            index.remove(job_id)
+        else:
+            index.add(job_id, *fields[:-1])
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_recommend_changes(session):
+    session.info.pop('recommend_changes', None)
@@ -0,0 +1,180 @@
+import hashlib
+import os
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+# Kept out of Base.metadata so migrations and autogenerate ignore it
+schema_metadata = MetaData()
+schema_fingerprint = Table(
+    'schema_fingerprint', schema_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('fingerprint', String(64), nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+)
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'alembic')
+
+# Arbitrary constant key for pg_advisory_xact_lock so concurrent boots run DDL one at a time
+DDL_LOCK_KEY = 7300218
+
+class SchemaCheck:
+    """
+    Boot-time schema handling, selected by the schema_check setting:
+
+    - fingerprint (default): one SELECT of the stored model fingerprint; when
+      it differs, create the missing tables (under a lock on PostgreSQL) and
+      refuse to start if an existing table no longer matches the models
+    - alembic: one SELECT of alembic_version; refuse to start unless it is
+      the expected head (schema_revision setting, else the migration scripts)
+    - create_all: always run create_all (catalog queries per table)
+    - none: no schema work at all
+    """
+
+    MODES = ('fingerprint', 'alembic', 'create_all', 'none')
+
+    @staticmethod
+    def table_digests(metadata, dialect) -> dict:
+        """{table name: sha256 over its CREATE TABLE and CREATE INDEX DDL}"""
+        digests = {}
+        for table in metadata.sorted_tables:
+            digest = hashlib.sha256(table.name.encode('utf-8'))
+            digest.update(str(CreateTable(table).compile(dialect=dialect)).encode('utf-8'))
+            for index in sorted(table.indexes, key=lambda ix: ix.name or ''):
+                digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode('utf-8'))
+            digests[table.name] = digest.hexdigest()
+        return digests
+
+    @staticmethod
+    def fingerprint(metadata, dialect) -> str:
+        """
+        sha256 over every table digest plus the after_create hooks: DDL
+        hooks by statement, function hooks by qualified name (a change to a
+        hook's body alone does not change the fingerprint)
+        """
+        digest = hashlib.sha256()
+        for table_digest in SchemaCheck.table_digests(metadata, dialect).values():
+            digest.update(table_digest.encode('utf-8'))
+        for table in metadata.sorted_tables:
+            for listener in table.dispatch.after_create:
+                statement = getattr(listener, 'statement', None)
+                if statement is None:
+                    statement = f'{listener.__module__}.{listener.__qualname__}'
+                digest.update(str(statement).encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def stored_fingerprints(engine) -> dict:
+        """{id: fingerprint}: id 1 is the whole schema, the rest one per table; {} when missing"""
+        try:
+            with engine.connect() as conn:
+                return dict(conn.execute(select(schema_fingerprint.c.id, schema_fingerprint.c.fingerprint)).all())
+        except SQLAlchemyError:
+            return {}
+
+    @staticmethod
+    def changed_tables(conn, metadata, existing: set, digests: dict, known: set) -> list:
+        """
+        Existing tables that no longer match the models. Checked against the
+        stored table digests; a database without them (created before they
+        were stored) only gets its column and index names compared
+        """
+        changed = []
+        inspector = inspect(conn)
+        for table in metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            if known:
+                if digests[table.name] not in known:
+                    changed.append(table.name)
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            if not set(table.columns.keys()) <= columns or not {ix.name for ix in table.indexes} <= indexes:
+                changed.append(table.name)
+        return changed
+
+    @staticmethod
+    def lock(conn):
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': DDL_LOCK_KEY})
+
+    @staticmethod
+    def create_all(engine, metadata):
+        """create_all, serialised across processes on PostgreSQL"""
+        with engine.begin() as conn:
+            SchemaCheck.lock(conn)
+            metadata.create_all(conn)
+
+    @staticmethod
+    def create_missing(engine, metadata, expected: str, known: set) -> list:
+        """
+        Create the tables the database lacks and store the new fingerprint;
+        raises instead when an existing table changed, since create_all
+        cannot alter it. Returns the names of the created tables
+        """
+        digests = SchemaCheck.table_digests(metadata, engine.dialect)
+        with engine.begin() as conn:
+            SchemaCheck.lock(conn)
+            existing = set(inspect(conn).get_table_names())
+            changed = SchemaCheck.changed_tables(conn, metadata, existing, digests, known)
+            if changed:
+                raise RuntimeError(
+                    f'Tables {", ".join(changed)} differ from the models; '
+                    'run "alembic upgrade head" before starting workers'
+                )
+            missing = [table for table in metadata.sorted_tables if table.name not in existing]
+            metadata.create_all(conn, tables=missing)
+
+            schema_metadata.create_all(conn)
+            now = datetime.utcnow()
+            conn.execute(schema_fingerprint.delete())
+            conn.execute(schema_fingerprint.insert(), [
+                {'id': id, 'fingerprint': fingerprint, 'updated_at': now}
+                for id, fingerprint in enumerate([expected, *digests.values()], start=1)
+            ])
+        return [table.name for table in missing]
+
+    @staticmethod
+    def alembic_head() -> str:
+        from alembic.config import Config
+        from alembic.script import ScriptDirectory
+        config = Config()
+        config.set_main_option('script_location', ALEMBIC_DIR)
+        return ScriptDirectory.from_config(config).get_current_head()
+
+    @staticmethod
+    def ensure(engine, metadata, mode: str = 'fingerprint', revision: str = None) -> str:
+        """Apply the boot mode; returns what happened (for the startup report)"""
+        if mode not in SchemaCheck.MODES:
+            raise ValueError(f'schema_check must be one of {", ".join(SchemaCheck.MODES)}')
+
+        if mode == 'none':
+            return 'skipped'
+
+        if mode == 'create_all':
+            SchemaCheck.create_all(engine, metadata)
+            return 'create_all'
+
+        if mode == 'alembic':
+            expected = revision or SchemaCheck.alembic_head()
+            try:
+                with engine.connect() as conn:
+                    current = conn.execute(text('SELECT version_num FROM alembic_version')).scalar()
+            except SQLAlchemyError:
+                current = None
+            if current != expected:
+                raise RuntimeError(
+                    f'Database schema is at revision {current}, code expects {expected}; '
+                    'run "alembic upgrade head" before starting workers'
+                )
+            return f'alembic {current}'
+
+        expected = SchemaCheck.fingerprint(metadata, engine.dialect)
+        stored = SchemaCheck.stored_fingerprints(engine)
+        if stored.get(1) == expected:
+            return 'fingerprint match'
+        known = {fingerprint for id, fingerprint in stored.items() if id != 1}
+        created = SchemaCheck.create_missing(engine, metadata, expected, known)
+        return f'fingerprint changed, created {len(created)} tables'
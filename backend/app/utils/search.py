@@ -0,0 +1,216 @@
+import math
+import re
+import threading
+import weakref
+from collections import defaultdict
+from sqlalchemy import event, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from ..models import Job
+
+# Field weights, kept in line with setweight() A/B/C of jobs.search_vector
+FIELD_WEIGHTS = {'title': 1.0, 'requirements': 0.4, 'description': 0.2}
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the
+to was were will with we you your our us
+""".split())
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens without stopwords"""
+    if not text:
+        return []
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+class InvertedIndex:
+    """
+    In-process inverted index over job title/requirements/description.
+    Used when the database has no full-text support (SQLite).
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)   # term -> {job_id: weighted tf}
+        self.doc_terms = {}                 # job_id -> set of terms
+        self.lock = threading.RLock()
+
+    def add(self, job_id: int, title: str, requirements: str, description: str):
+        """Index (or re-index) a single job"""
+        weights = defaultdict(float)
+        for field, text in (('title', title), ('requirements', requirements), ('description', description)):
+            for term in tokenize(text):
+                weights[term] += FIELD_WEIGHTS[field]
+
+        with self.lock:
+            self.remove(job_id)
+            for term, weight in weights.items():
+                self.postings[term][job_id] = weight
+            self.doc_terms[job_id] = set(weights)
+
+    def remove(self, job_id: int):
+        """Drop a job from the index"""
+        with self.lock:
+            for term in self.doc_terms.pop(job_id, ()):
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(job_id, None)
+                    if not posting:
+                        del self.postings[term]
+
+    def search(self, q: str) -> list:
+        """Return job ids matching all query terms, best match first"""
+        terms = list(dict.fromkeys(tokenize(q)))
+        if not terms:
+            return []
+
+        with self.lock:
+            postings = [self.postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return []
+
+            # Intersect starting from the rarest term
+            postings.sort(key=len)
+            matches = set(postings[0])
+            for posting in postings[1:]:
+                matches.intersection_update(posting)
+                if not matches:
+                    return []
+
+            total_docs = len(self.doc_terms) or 1
+            scores = {}
+            for posting in postings:
+                idf = math.log(1 + total_docs / len(posting))
+                for job_id in matches:
+                    scores[job_id] = scores.get(job_id, 0.0) + math.log1p(posting[job_id]) * idf
+
+        return sorted(scores, key=lambda job_id: (-scores[job_id], -job_id))
+
+class JobSearch:
+    """Full-text job search: tsvector on PostgreSQL, inverted index elsewhere"""
+
+    _indexes = weakref.WeakKeyDictionary()   # engine -> InvertedIndex
+    _lock = threading.Lock()
+
+    MAX_IN_LIST = 1000
+
+    @staticmethod
+    def index_engine(session):
+        """The session's primary engine: replica reads and primary writes share one index"""
+        return session.bind if session.bind is not None else session.get_bind()
+
+    @staticmethod
+    def uses_tsvector(dbsession) -> bool:
+        return dbsession.get_bind().dialect.name == 'postgresql'
+
+    @staticmethod
+    def get_index(dbsession) -> InvertedIndex:
+        """Return the in-process index for this engine, building it on first use"""
+        engine = JobSearch.index_engine(dbsession)
+        index = JobSearch._indexes.get(engine)
+        if index is not None:
+            return index
+
+        with JobSearch._lock:
+            index = JobSearch._indexes.get(engine)
+            if index is None:
+                index = InvertedIndex()
+                stmt = select(Job.id, Job.title, Job.requirements, Job.description)
+                with engine.connect() as conn:
+                    for row in conn.execute(stmt):
+                        index.add(row.id, row.title, row.requirements, row.description)
+                JobSearch._indexes[engine] = index
+        return index
+
+    @staticmethod
+    def invalidate(engine):
+        """Force a rebuild on next search (after bulk writes that bypass the ORM)"""
+        JobSearch._indexes.pop(engine, None)
+
+    @staticmethod
+    def stage_changes(dbsession, changes: dict):
+        """
+        Queue index updates for jobs written outside the unit of work
+        ({job_id: (title, requirements, description) or None}); applied on commit.
+        """
+        dbsession.info.setdefault('search_index_changes', {}).update(changes)
+
+    @staticmethod
+    def filter_matches(query, dbsession, q: str) -> tuple:
+        """
+        Restrict a Job query to full-text matches of q: (query, ids). ids is
+        None when the database applies the match; otherwise it is the set of
+        matching ids the caller must filter by (broad in-process matches,
+        too many for an IN list).
+        """
+        if JobSearch.uses_tsvector(dbsession):
+            vector = literal_column('jobs.search_vector')
+            return query.filter(vector.op('@@')(func.websearch_to_tsquery('english', q))), None
+        ranked_ids = JobSearch.get_index(dbsession).search(q)
+        if len(ranked_ids) <= JobSearch.MAX_IN_LIST:
+            return query.filter(Job.id.in_(ranked_ids)), None
+        return query, set(ranked_ids)
+
+    @staticmethod
+    def search_page(query, dbsession, q: str, offset: int, limit: int, loader_options=(), total=None) -> tuple:
+        """
+        Apply full-text search to a filtered Job query.
+        Returns (total, jobs) ordered by relevance; pass a cached total to skip counting.
+        """
+        if JobSearch.uses_tsvector(dbsession):
+            vector = literal_column('jobs.search_vector')
+            ts_query = func.websearch_to_tsquery('english', q)
+            query = query.filter(vector.op('@@')(ts_query))
+            if total is None:
+                total = query.count()
+            jobs = query.options(*loader_options) \
+                .order_by(func.ts_rank_cd(vector, ts_query).desc(), Job.id.desc()) \
+                .offset(offset).limit(limit).all()
+            return total, jobs
+
+        ranked_ids = JobSearch.get_index(dbsession).search(q)
+        if not ranked_ids:
+            return 0, []
+
+        # Let the database apply the remaining filters, keep index ranking.
+        # Broad matches scan the filtered ids instead of sending a huge IN list.
+        id_query = query.with_entities(Job.id)
+        if len(ranked_ids) <= JobSearch.MAX_IN_LIST:
+            id_query = id_query.filter(Job.id.in_(ranked_ids))
+        allowed = set(dbsession.connection().execute(id_query.statement).scalars())
+        ranked_ids = [job_id for job_id in ranked_ids if job_id in allowed]
+        page_ids = ranked_ids[offset:offset + limit]
+
+        jobs = query.options(*loader_options).filter(Job.id.in_(page_ids)).all() if page_ids else []
+        position = {job_id: i for i, job_id in enumerate(page_ids)}
+        jobs.sort(key=lambda job: position[job.id])
+        return len(ranked_ids), jobs
+
+@event.listens_for(Session, 'after_flush')
+def _stage_index_changes(session, flush_context):
+    """Remember flushed job changes until the transaction commits"""
+    staged = session.info.setdefault('search_index_changes', {})
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, Job):
+            staged[obj.id] = (obj.title, obj.requirements, obj.description)
+    for obj in session.deleted:
+        if isinstance(obj, Job):
+            staged[obj.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def _apply_index_changes(session):
+    staged = session.info.pop('search_index_changes', None)
+    if not staged:
+        return
+    index = JobSearch._indexes.get(JobSearch.index_engine(session))
+    if index is None:
+        return
+    for job_id, fields in staged.items():
+        if fields is None:
+            index.remove(job_id)
+        else:
+            index.add(job_id, *fields)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_index_changes(session):
+    session.info.pop('search_index_changes', None)
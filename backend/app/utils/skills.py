@@ -0,0 +1,387 @@
+import os
+import re
+import threading
+import time
+import weakref
+from datetime import timedelta
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import JobSeeker, Skill, job_seeker_skills
+from .index_worker import IndexWorker
+from .search import JobSearch
+
+SKILL_SPLIT = re.compile(r'[,;\n|]')
+NONZERO_BYTE = re.compile(rb'[^\x00]')
+MAX_SKILL_LENGTH = 60
+MAX_EXPERIENCE = 50
+
+def normalize_skill(name: str) -> str:
+    """'  Power  BI ' -> 'power bi'; bullets and dashes around the name are dropped"""
+    return ' '.join(name.lower().split()).strip(' -*•·')
+
+def parse_skills(text: str) -> dict:
+    """Comma/semicolon/newline separated skills -> {normalized name: label as first written}"""
+    parsed = {}
+    for part in SKILL_SPLIT.split(text or ''):
+        name = normalize_skill(part)
+        if name and len(name) <= MAX_SKILL_LENGTH and name not in parsed:
+            parsed[name] = ' '.join(part.split()).strip(' -*•·')
+    return parsed
+
+def set_bit(bitmap: bytearray, position: int):
+    byte = position >> 3
+    if byte >= len(bitmap):
+        bitmap.extend(bytes(max(byte + 1, len(bitmap) * 2) - len(bitmap)))
+    bitmap[byte] |= 1 << (position & 7)
+
+def clear_bit(bitmap: bytearray, position: int):
+    byte = position >> 3
+    if byte < len(bitmap):
+        bitmap[byte] &= ~(1 << (position & 7)) & 0xFF
+
+def has_bit(bitmap: bytearray, position: int) -> bool:
+    byte = position >> 3
+    return byte < len(bitmap) and bitmap[byte] >> (position & 7) & 1 == 1
+
+def bits_desc(bits: int, skip: int, take: int) -> list:
+    """Positions of set bits, highest first, after skipping `skip` of them"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')[::-1]
+    last = len(data) - 1
+    positions = []
+    for match in NONZERO_BYTE.finditer(data):
+        byte = data[match.start()]
+        if skip:
+            count = byte.bit_count()
+            if skip >= count:
+                skip -= count
+                continue
+        base = (last - match.start()) << 3
+        for bit in range(7, -1, -1):
+            if byte >> bit & 1:
+                if skip:
+                    skip -= 1
+                    continue
+                positions.append(base + bit)
+                if len(positions) >= take:
+                    return positions
+    return positions
+
+class CandidateIndex:
+    """
+    In-process inverted index: skill id -> job seekers having it.
+
+    Posting lists start as sets and switch to bitmaps (bit = seeker id)
+    once a set would take more memory than the bitmap, so common skills
+    like "python" cost N/8 bytes and intersect as one big-integer AND in
+    C. Rare skills stay sets; an AND led by one is answered by probing the
+    other postings for each of its members. OR ranks by match count with
+    bit-sliced counters (at_least[c] = seekers matching c or more skills).
+    Experience filters use one "at least y years" bitmap per year.
+    """
+
+    SPARSE_MIN = 256            # sets at least this large may switch to a bitmap
+    SPARSE_BYTES_PER_ID = 64    # rough memory of one set member (int object + table slot)
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = {}              # skill id -> set or bytearray
+        self.seeker_skills = {}         # seeker id -> tuple of skill ids
+        self.experience = {}            # seeker id -> years (capped at MAX_EXPERIENCE)
+        self.at_least_years = [bytearray() for _ in range(MAX_EXPERIENCE + 1)]
+        self.max_id = 0
+        self.watermark = None           # newest job_seekers.updated_at applied
+        self.synced_at = 0.0
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.seeker_skills)
+
+    def bitmap_bytes(self) -> int:
+        return (self.max_id >> 3) + 1
+
+    def add_to_posting(self, skill_id: int, seeker_id: int):
+        posting = self.postings.get(skill_id)
+        if posting is None:
+            posting = self.postings[skill_id] = set()
+        if isinstance(posting, set):
+            posting.add(seeker_id)
+            if len(posting) >= self.SPARSE_MIN and \
+                    len(posting) * self.SPARSE_BYTES_PER_ID > self.bitmap_bytes():
+                bitmap = bytearray(self.bitmap_bytes())
+                for member in posting:
+                    set_bit(bitmap, member)
+                self.postings[skill_id] = bitmap
+        else:
+            set_bit(posting, seeker_id)
+
+    def remove_from_posting(self, skill_id: int, seeker_id: int):
+        posting = self.postings.get(skill_id)
+        if isinstance(posting, set):
+            posting.discard(seeker_id)
+        elif posting is not None:
+            clear_bit(posting, seeker_id)
+
+    def set_seeker(self, seeker_id: int, skill_ids, experience_years):
+        """Index (or re-index) one seeker; skill_ids None keeps the current skills"""
+        with self.lock:
+            self.max_id = max(self.max_id, seeker_id)
+            old = self.seeker_skills.get(seeker_id, ())
+            if skill_ids is None:
+                skill_ids = old
+            skill_ids = tuple(sorted(set(skill_ids)))
+            for skill_id in set(old).difference(skill_ids):
+                self.remove_from_posting(skill_id, seeker_id)
+            for skill_id in set(skill_ids).difference(old):
+                self.add_to_posting(skill_id, seeker_id)
+            self.seeker_skills[seeker_id] = skill_ids
+
+            years = max(0, min(int(experience_years or 0), MAX_EXPERIENCE))
+            old_years = self.experience.get(seeker_id, 0)
+            for year in range(years + 1, old_years + 1):
+                clear_bit(self.at_least_years[year], seeker_id)
+            for year in range(old_years + 1, years + 1):
+                set_bit(self.at_least_years[year], seeker_id)
+            self.experience[seeker_id] = years
+
+    def remove(self, seeker_id: int):
+        with self.lock:
+            if seeker_id in self.seeker_skills:
+                self.set_seeker(seeker_id, (), 0)
+                del self.seeker_skills[seeker_id]
+                del self.experience[seeker_id]
+
+    def posting_size(self, posting) -> int:
+        return len(posting) if isinstance(posting, set) else len(posting) * 8
+
+    def as_int(self, posting) -> int:
+        if isinstance(posting, set):
+            bitmap = bytearray(self.bitmap_bytes())
+            for member in posting:
+                set_bit(bitmap, member)
+            posting = bitmap
+        return int.from_bytes(posting, 'little')
+
+    def search(self, skill_ids: list, match_all: bool, min_experience: int, offset: int, limit: int) -> tuple:
+        """(total, [(seeker id, matched skill count)]): most matches first, then newest seeker"""
+        min_experience = max(0, min(int(min_experience or 0), MAX_EXPERIENCE))
+        with self.lock:
+            postings = [self.postings.get(skill_id) for skill_id in dict.fromkeys(skill_ids)]
+            if match_all and (not postings or any(p is None for p in postings)):
+                return 0, []
+            postings = sorted((p for p in postings if p is not None), key=self.posting_size)
+            if not postings:
+                return 0, []
+
+            smallest = postings[0]
+            if match_all and isinstance(smallest, set):
+                # Probe the larger postings for each member of the rarest skill
+                rest = postings[1:]
+                matched = sorted((
+                    seeker_id for seeker_id in smallest
+                    if self.experience.get(seeker_id, 0) >= min_experience
+                    and all(seeker_id in p if isinstance(p, set) else has_bit(p, seeker_id) for p in rest)
+                ), reverse=True)
+                return len(matched), [(seeker_id, len(postings)) for seeker_id in matched[offset:offset + limit]]
+
+            bitmaps = [self.as_int(p) for p in postings]
+            if match_all:
+                bits = bitmaps[0]
+                for bitmap in bitmaps[1:]:
+                    bits &= bitmap
+                levels = [(len(bitmaps), bits)]
+            else:
+                # at_least[c]: seekers with c or more of the requested skills
+                at_least = [0] * (len(bitmaps) + 2)
+                for bitmap in bitmaps:
+                    for count in range(len(bitmaps), 1, -1):
+                        at_least[count] |= at_least[count - 1] & bitmap
+                    at_least[1] |= bitmap
+                levels = [(count, at_least[count] & ~at_least[count + 1]) for count in range(len(bitmaps), 0, -1)]
+
+            if min_experience:
+                years = int.from_bytes(self.at_least_years[min_experience], 'little')
+                levels = [(count, bits & years) for count, bits in levels]
+
+            total = 0
+            page = []
+            for count, bits in levels:
+                size = bits.bit_count()
+                if len(page) < limit and offset < total + size:
+                    skip = max(offset - total, 0)
+                    page += [(seeker_id, count) for seeker_id in bits_desc(bits, skip, limit - len(page))]
+                total += size
+            return total, page
+
+class SkillIndex:
+    """
+    Normalized skills (skills / job_seeker_skills tables) and the
+    per-process candidate index, one per engine, built and synced by the
+    IndexWorker. Commits in this process update the index right away;
+    profile changes from other processes are picked up by updated_at every
+    SYNC_SECONDS.
+    """
+
+    MAX_PER_PROFILE = int(os.environ.get('SKILLS_MAX_PER_PROFILE', 50))
+    MAX_PER_QUERY = 20
+    SYNC_SECONDS = float(os.environ.get('CANDIDATE_SYNC_SECONDS', 10))
+    # Re-read this far behind the watermark: transactions commit out of updated_at order
+    SYNC_OVERLAP = timedelta(seconds=float(os.environ.get('CANDIDATE_SYNC_OVERLAP', 60)))
+    BATCH_SIZE = 1000
+
+    _indexes = weakref.WeakKeyDictionary()   # engine -> CandidateIndex
+    _lock = threading.Lock()
+
+    @staticmethod
+    def resolve(dbsession, names) -> dict:
+        """{normalized name: Skill} for names already in the skills table"""
+        names = list(names)
+        if not names:
+            return {}
+        return {skill.name: skill for skill in dbsession.query(Skill).filter(Skill.name.in_(names))}
+
+    @staticmethod
+    def get_or_create(dbsession, parsed: dict) -> list:
+        """Skill rows for {name: label}, inserting new names (a concurrent insert of the same name wins)"""
+        skills = SkillIndex.resolve(dbsession, parsed)
+        for name, label in parsed.items():
+            if name in skills:
+                continue
+            try:
+                with dbsession.begin_nested():
+                    skill = Skill(name=name, label=label[:MAX_SKILL_LENGTH])
+                    dbsession.add(skill)
+            except IntegrityError:
+                skill = dbsession.query(Skill).filter_by(name=name).one()
+            skills[name] = skill
+        return [skills[name] for name in parsed]
+
+    @staticmethod
+    def assign(dbsession, seeker, text: str):
+        """Set seeker.skills and its normalized skill links"""
+        parsed = parse_skills(text)
+        if len(parsed) > SkillIndex.MAX_PER_PROFILE:
+            raise ValueError(f'At most {SkillIndex.MAX_PER_PROFILE} skills allowed')
+        seeker.skills = text
+        seeker.skill_set = SkillIndex.get_or_create(dbsession, parsed)
+        if seeker.id is not None:
+            staged = dbsession.info.setdefault('candidate_skills', {})
+            staged[seeker.id] = [skill.id for skill in seeker.skill_set]
+
+    @staticmethod
+    def backfill(connection):
+        """Create links for every profile from its skills text (migration / new table)"""
+        skill_ids = dict(connection.execute(select(Skill.name, Skill.id)).all())
+        seekers = connection.execute(
+            select(JobSeeker.id, JobSeeker.skills).where(JobSeeker.skills.isnot(None)).order_by(JobSeeker.id)
+        ).all()
+        links = []
+        for seeker_id, text in seekers:
+            parsed = parse_skills(text)
+            for name, label in list(parsed.items())[:SkillIndex.MAX_PER_PROFILE]:
+                if name not in skill_ids:
+                    skill_ids[name] = connection.execute(
+                        insert(Skill).values(name=name, label=label[:MAX_SKILL_LENGTH])
+                    ).inserted_primary_key[0]
+                links.append({'job_seeker_id': seeker_id, 'skill_id': skill_ids[name]})
+            if len(links) >= SkillIndex.BATCH_SIZE:
+                connection.execute(insert(job_seeker_skills), links)
+                links = []
+        if links:
+            connection.execute(insert(job_seeker_skills), links)
+
+    @staticmethod
+    def apply_seekers(index: CandidateIndex, conn, rows):
+        """Re-index changed seekers (id, experience_years, updated_at) with their current links"""
+        rows = list(rows)
+        for start in range(0, len(rows), SkillIndex.BATCH_SIZE):
+            batch = rows[start:start + SkillIndex.BATCH_SIZE]
+            links = {row.id: [] for row in batch}
+            for seeker_id, skill_id in conn.execute(
+                select(job_seeker_skills.c.job_seeker_id, job_seeker_skills.c.skill_id)
+                .where(job_seeker_skills.c.job_seeker_id.in_(list(links)))
+            ):
+                links[seeker_id].append(skill_id)
+            for row in batch:
+                index.set_seeker(row.id, links[row.id], row.experience_years)
+                if row.updated_at is not None and (index.watermark is None or row.updated_at > index.watermark):
+                    index.watermark = row.updated_at
+
+    @staticmethod
+    def build(engine) -> CandidateIndex:
+        index = CandidateIndex()
+        with engine.connect() as conn:
+            skills = {}
+            result = conn.execution_options(yield_per=10000).execute(
+                select(job_seeker_skills.c.job_seeker_id, job_seeker_skills.c.skill_id)
+            )
+            for seeker_id, skill_id in result:
+                skills.setdefault(seeker_id, []).append(skill_id)
+            result = conn.execution_options(yield_per=10000).execute(
+                select(JobSeeker.id, JobSeeker.experience_years, JobSeeker.updated_at)
+            )
+            for row in result:
+                index.set_seeker(row.id, skills.pop(row.id, ()), row.experience_years)
+                if row.updated_at is not None and (index.watermark is None or row.updated_at > index.watermark):
+                    index.watermark = row.updated_at
+        index.synced_at = time.monotonic()
+        return index
+
+    @staticmethod
+    def get_index(dbsession) -> CandidateIndex:
+        """Index for this session's primary engine (see IndexWorker.current)"""
+        return IndexWorker.current(SkillIndex, JobSearch.index_engine(dbsession))
+
+    @staticmethod
+    def sync(engine, index: CandidateIndex):
+        """Apply profiles changed since the watermark (other workers)"""
+        index.synced_at = time.monotonic()
+        stmt = select(JobSeeker.id, JobSeeker.experience_years, JobSeeker.updated_at)
+        if index.watermark is not None:
+            stmt = stmt.where(JobSeeker.updated_at >= index.watermark - SkillIndex.SYNC_OVERLAP)
+        with engine.connect() as conn:
+            SkillIndex.apply_seekers(index, conn, conn.execute(stmt).all())
+
+    @staticmethod
+    def invalidate(engine):
+        SkillIndex._indexes.pop(engine, None)
+
+    @staticmethod
+    def forget(dbsession, seeker_ids):
+        """Drop seekers the database no longer has (deleted by another process)"""
+        index = SkillIndex._indexes.get(JobSearch.index_engine(dbsession))
+        if index is not None:
+            for seeker_id in seeker_ids:
+                index.remove(seeker_id)
+
+@event.listens_for(Session, 'after_flush')
+def _stage_candidate_changes(session, flush_context):
+    """Remember flushed profile changes until the transaction commits"""
+    staged = session.info.setdefault('candidate_changes', {})
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, JobSeeker):
+            staged[obj.id] = obj.experience_years or 0
+    for obj in session.deleted:
+        if isinstance(obj, JobSeeker):
+            staged[obj.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def _apply_candidate_changes(session):
+    staged = session.info.pop('candidate_changes', None)
+    skills = session.info.pop('candidate_skills', None) or {}
+    if not staged:
+        return
+    index = SkillIndex._indexes.get(JobSearch.index_engine(session))
+    if index is None:
+        return
+    for seeker_id, experience_years in staged.items():
+        if experience_years is None:
+            index.remove(seeker_id)
+        else:
+            index.set_seeker(seeker_id, skills.get(seeker_id), experience_years)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_candidate_changes(session):
+    session.info.pop('candidate_changes', None)
+    session.info.pop('candidate_skills', None)
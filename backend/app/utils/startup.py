@@ -0,0 +1,39 @@
+import logging
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+class StartupReport:
+    """Wall time per boot phase of one worker process (import, config, DB probe, routes)"""
+
+    def __init__(self):
+        self.last = time.perf_counter()
+        self.phases = {}
+        self.details = {}
+
+    def add(self, phase: str, seconds: float, detail: str = None):
+        self.phases[phase] = round(seconds * 1000, 3)
+        if detail is not None:
+            self.details[phase] = detail
+
+    def mark(self, phase: str, detail: str = None):
+        """Close the phase that began at the previous mark"""
+        now = time.perf_counter()
+        self.add(phase, now - self.last, detail)
+        self.last = now
+
+    def total_ms(self) -> float:
+        return round(sum(self.phases.values()), 3)
+
+    def as_dict(self) -> dict:
+        return {
+            'pid': os.getpid(),
+            'total_ms': self.total_ms(),
+            'phases_ms': dict(self.phases),
+            'details': dict(self.details),
+        }
+
+    def log(self):
+        log.info('Worker %s started in %.1f ms (%s)', os.getpid(), self.total_ms(),
+                 ', '.join(f'{phase} {ms:.1f} ms' for phase, ms in self.phases.items()))
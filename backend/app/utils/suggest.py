@@ -0,0 +1,291 @@
+import heapq
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left, insort
+from datetime import timedelta
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..models import Job
+from .index_worker import IndexWorker
+from .search import JobSearch
+
+MAX_VALUE_LENGTH = 200
+
+def normalize_value(value: str) -> str:
+    """'  Senior  Python Developer ' -> 'senior python developer'"""
+    return ' '.join((value or '').split()).casefold()[:MAX_VALUE_LENGTH]
+
+class PrefixIndex:
+    """
+    Distinct values of one job field, counted over active jobs. Every
+    word start of a value is an entry in a sorted array, so 'dev' finds
+    'Senior Python Developer'; a prefix is a bisect range. Ranges too wide
+    to scan keep a top-N, updated in place as counts change.
+    """
+
+    def __init__(self, scan_limit: int, cache_size: int):
+        self.scan_limit = scan_limit
+        self.cache_size = cache_size
+        self.job_keys = {}      # job id -> normalized value
+        self.counts = {}        # normalized value -> active jobs
+        self.labels = {}        # normalized value -> value as first entered
+        self.entries = []       # sorted (word-start suffix, normalized value)
+        # wide prefix -> [floor, sorted [(-count, normalized value)]]: values not in the list rank at
+        # or below floor (None = the list holds every match), so the part above floor is exact
+        self.top_cache = {}
+        self.version = 0
+        self.loading = False    # bulk build: append entries, sort once in finish_loading()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.counts)
+
+    @staticmethod
+    def suffixes(key: str) -> set:
+        words = key.split(' ')
+        return {' '.join(words[i:]) for i in range(len(words))}
+
+    def add(self, job_id: int, value: str):
+        key = normalize_value(value)
+        with self.lock:
+            old = self.job_keys.get(job_id)
+            if old == key:
+                return
+            if old is not None:
+                self._change(old, -1, None)
+            if key:
+                self.job_keys[job_id] = key
+                self._change(key, 1, ' '.join(value.split())[:MAX_VALUE_LENGTH])
+            else:
+                self.job_keys.pop(job_id, None)
+
+    def remove(self, job_id: int):
+        with self.lock:
+            old = self.job_keys.pop(job_id, None)
+            if old is not None:
+                self._change(old, -1, None)
+
+    def finish_loading(self):
+        """Sort the bulk-loaded entries and rank the wide prefixes up front"""
+        self.entries.sort()
+        self.loading = False
+        self._warm('', 0, len(self.entries))
+
+    def _warm(self, prefix: str, lo: int, hi: int):
+        if hi - lo <= self.scan_limit:
+            return
+        self._fill(prefix, lo, hi)
+        depth = len(prefix)
+        while lo < hi:
+            suffix = self.entries[lo][0]
+            if len(suffix) <= depth:
+                lo += 1
+                continue
+            child = suffix[:depth + 1]
+            child_hi = bisect_left(self.entries, (child + '\U0010ffff',), lo, hi)
+            self._warm(child, lo, child_hi)
+            lo = child_hi
+
+    def _change(self, key: str, delta: int, label):
+        self.version += 1
+        count = self.counts.get(key, 0) + delta
+        suffixes = self.suffixes(key)
+        if count > 0:
+            self.counts[key] = count
+        else:
+            self.counts.pop(key, None)
+            self.labels.pop(key, None)
+            for suffix in suffixes:
+                i = bisect_left(self.entries, (suffix, key))
+                if i < len(self.entries) and self.entries[i] == (suffix, key):
+                    del self.entries[i]
+        if count == 1 and delta > 0:
+            self.labels[key] = label
+            for suffix in suffixes:
+                if self.loading:
+                    self.entries.append((suffix, key))
+                else:
+                    insort(self.entries, (suffix, key))
+
+        if not self.top_cache:
+            return
+        prefixes = {suffix[:i] for suffix in suffixes for i in range(len(suffix) + 1)}
+        for prefix in prefixes.intersection(self.top_cache):
+            self._update_top(self.top_cache[prefix], key, count)
+
+    def _update_top(self, cached: list, key: str, count: int):
+        floor, top = cached
+        position = next((i for i, item in enumerate(top) if item[1] == key), None)
+        if position is not None:
+            del top[position]
+        elif count <= 0 or (floor is not None and (-count, key) >= floor):
+            # Still ranks at or below floor: nothing above it changes
+            return
+        if count > 0:
+            insort(top, (-count, key))
+        if len(top) > self.cache_size:
+            dropped = top.pop()
+            cached[0] = dropped if floor is None else min(floor, dropped)
+
+    def _range(self, prefix: str) -> tuple:
+        return bisect_left(self.entries, (prefix,)), bisect_left(self.entries, (prefix + '\U0010ffff',))
+
+    def _rank(self, lo: int, hi: int, k: int) -> list:
+        keys = {entry[1] for entry in self.entries[lo:hi]}
+        counts = self.counts
+        return heapq.nsmallest(k, ((-counts.get(key, 0), key) for key in keys)), len(keys)
+
+    def _fill(self, prefix: str, lo: int, hi: int) -> list:
+        version = self.version
+        top, matches = self._rank(lo, hi, self.cache_size)
+        floor = top[-1] if matches > len(top) else None
+        with self.lock:
+            if self.version == version:
+                self.top_cache[prefix] = [floor, top]
+        return top
+
+    def top(self, prefix: str, k: int) -> list:
+        """[(value, count)] of values with a word starting with prefix, most frequent first"""
+        prefix = normalize_value(prefix)
+        lo, hi = self._range(prefix)
+        if hi - lo <= self.scan_limit:
+            ranked, _ = self._rank(lo, hi, k)
+        else:
+            cached = self.top_cache.get(prefix)
+            ranked = None
+            if cached is not None:
+                floor, ranked = cached
+                if floor is not None and bisect_left(ranked, floor) < k:
+                    ranked = None
+            if ranked is None:
+                ranked = self._fill(prefix, lo, hi)
+        labels = self.labels
+        return [(labels[key], -count) for count, key in ranked[:k] if count < 0 and key in labels]
+
+class SuggestIndex:
+    """Title and location prefix indexes over the same active jobs"""
+
+    def __init__(self, scan_limit: int, cache_size: int):
+        self.fields = {
+            'title': PrefixIndex(scan_limit, cache_size),
+            'location': PrefixIndex(scan_limit, cache_size),
+        }
+        self.watermark = None       # newest updated_at applied
+        self.synced_at = 0.0
+        self.built_at = time.monotonic()
+
+    def add(self, job_id: int, title: str, location: str):
+        self.fields['title'].add(job_id, title)
+        self.fields['location'].add(job_id, location)
+
+    def remove(self, job_id: int):
+        for index in self.fields.values():
+            index.remove(job_id)
+
+class JobSuggest:
+    """
+    Per-process autocomplete indexes for job titles and locations, one
+    per engine, built and synced by the IndexWorker. Commits in this
+    process update them right away; changes from other processes are
+    picked up by updated_at every SYNC_SECONDS. Jobs hard-deleted by
+    another process are dropped by the worker's full rebuild every
+    REBUILD_SECONDS.
+    """
+
+    FIELDS = ('title', 'location')
+    MAX_LIMIT = 20
+    MAX_PREFIX = 100
+    # Prefix ranges up to this many entries are ranked on the fly; wider ones keep a cached top-N
+    SCAN_LIMIT = int(os.environ.get('SUGGEST_SCAN_LIMIT', 2000))
+    CACHE_SIZE = 50
+    SYNC_SECONDS = float(os.environ.get('SUGGEST_SYNC_SECONDS', 10))
+    # Re-read this far behind the watermark: transactions commit out of updated_at order
+    SYNC_OVERLAP = timedelta(seconds=float(os.environ.get('SUGGEST_SYNC_OVERLAP', 60)))
+    REBUILD_SECONDS = float(os.environ.get('SUGGEST_REBUILD_SECONDS', 900))
+
+    _indexes = weakref.WeakKeyDictionary()   # engine -> SuggestIndex
+    _lock = threading.Lock()
+
+    COLUMNS = (Job.id, Job.title, Job.location, Job.is_active, Job.updated_at)
+
+    @staticmethod
+    def apply_rows(index: SuggestIndex, rows):
+        for row in rows:
+            if row.is_active:
+                index.add(row.id, row.title, row.location)
+            else:
+                index.remove(row.id)
+            if row.updated_at is not None and (index.watermark is None or row.updated_at > index.watermark):
+                index.watermark = row.updated_at
+
+    @staticmethod
+    def build(engine) -> SuggestIndex:
+        index = SuggestIndex(JobSuggest.SCAN_LIMIT, JobSuggest.CACHE_SIZE)
+        for prefix_index in index.fields.values():
+            prefix_index.loading = True
+        stmt = select(*JobSuggest.COLUMNS).where(Job.is_active == 1)
+        with engine.connect() as conn:
+            result = conn.execution_options(yield_per=10000).execute(stmt)
+            for batch in result.partitions():
+                JobSuggest.apply_rows(index, batch)
+        for prefix_index in index.fields.values():
+            prefix_index.finish_loading()
+        index.synced_at = time.monotonic()
+        return index
+
+    @staticmethod
+    def get_index(dbsession) -> SuggestIndex:
+        """Index for this session's primary engine (see IndexWorker.current)"""
+        return IndexWorker.current(JobSuggest, JobSearch.index_engine(dbsession))
+
+    @staticmethod
+    def sync(engine, index: SuggestIndex):
+        """Apply jobs changed since the watermark (other workers, bulk imports)"""
+        index.synced_at = time.monotonic()
+        stmt = select(*JobSuggest.COLUMNS)
+        if index.watermark is not None:
+            stmt = stmt.where(Job.updated_at >= index.watermark - JobSuggest.SYNC_OVERLAP)
+        with engine.connect() as conn:
+            JobSuggest.apply_rows(index, conn.execute(stmt))
+
+    @staticmethod
+    def invalidate(engine):
+        JobSuggest._indexes.pop(engine, None)
+
+    @staticmethod
+    def suggest(dbsession, field: str, prefix: str, limit: int) -> list:
+        """[{'value', 'count'}] for field values with a word starting with prefix"""
+        index = JobSuggest.get_index(dbsession).fields[field]
+        return [{'value': value, 'count': count} for value, count in index.top(prefix, limit)]
+
+@event.listens_for(Session, 'after_flush')
+def _stage_suggest_changes(session, flush_context):
+    """Remember flushed job changes until the transaction commits"""
+    staged = session.info.setdefault('suggest_changes', {})
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, Job):
+            staged[obj.id] = (obj.title, obj.location) if obj.is_active else None
+    for obj in session.deleted:
+        if isinstance(obj, Job):
+            staged[obj.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def _apply_suggest_changes(session):
+    staged = session.info.pop('suggest_changes', None)
+    if not staged:
+        return
+    index = JobSuggest._indexes.get(JobSearch.index_engine(session))
+    if index is None:
+        return
+    for job_id, fields in staged.items():
+        if fields is None:
+            index.remove(job_id)
+        else:
+            index.add(job_id, *fields)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_suggest_changes(session):
+    session.info.pop('suggest_changes', None)
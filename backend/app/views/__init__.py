@@ -2,9 +2,13 @@ from .auth import auth_views
 from .jobs import job_views
 from .applications import application_views
 from .profiles import profile_views
+from .candidates import candidate_views
+from .internal import internal_views
 
 def includeme(config):
     config.include(auth_views)
     config.include(job_views)
     config.include(application_views)
     config.include(profile_views)
+    config.include(candidate_views)
+    config.include(internal_views)
@@ -1,24 +1,34 @@
 from pyramid.view import view_config
 from pyramid.httpexceptions import HTTPBadRequest, HTTPUnauthorized, HTTPForbidden, HTTPNotFound
+from sqlalchemy import select, update
 from sqlalchemy.orm import joinedload
 import json
+import os
 
-from ..models import Application, Job, JobSeeker, Employer, User
+from ..models import Application, Job, JobSeeker, User
 from ..models.user import UserRole
 from ..models.application import ApplicationStatus
 from ..utils.auth import require_auth, require_role
 from ..utils.validators import Validators
+from ..utils.pagination import Pagination
+from ..utils.count_cache import CountCache
+from ..utils.fast_json import FastJSON
+from ..utils.row_stream import RowStream
 
 def application_views(config):
     config.add_route('applications_list', '/applications')
     config.add_route('applications_create', '/jobs/{job_id}/apply')
-    config.add_route('applications_detail', '/applications/{app_id}')
-    config.add_route('applications_update', '/applications/{app_id}')
+    config.add_route('applications_bulk', '/applications/bulk', request_method='PUT')
+    config.add_route('applications_export', '/applications/export', request_method='GET')
+    config.add_route('applications_detail', '/applications/{app_id}', request_method='GET')
+    config.add_route('applications_update', '/applications/{app_id}', request_method='PUT')
     
     config.add_view(list_applications, route_name='applications_list', request_method='GET', renderer='json')
     config.add_view(create_application, route_name='applications_create', request_method='POST', renderer='json')
     config.add_view(get_application, route_name='applications_detail', request_method='GET', renderer='json')
     config.add_view(update_application, route_name='applications_update', request_method='PUT', renderer='json')
+    config.add_view(bulk_update_applications, route_name='applications_bulk', request_method='PUT', renderer='json')
+    config.add_view(export_applications, route_name='applications_export', request_method='GET')
 
 @require_auth
 def list_applications(request):
@@ -29,40 +39,84 @@ def list_applications(request):
     """
     try:
         dbsession = request.dbsession
-        user = dbsession.query(User).filter_by(id=request.user_id).first()
+        principal = request.principal
         
-        page = int(request.GET.get('page', 1))
-        per_page = int(request.GET.get('per_page', 10))
+        cursor = request.GET.get('cursor')
+        per_page = Pagination.get_per_page(request)
         status = request.GET.get('status')
         
         query = dbsession.query(Application)
         
-        if user.role.value == 'employer':
-            # Get employer's job IDs
-            employer = dbsession.query(Employer).filter_by(user_id=user.id).first()
-            job_ids = [job.id for job in employer.jobs]
-            query = query.filter(Application.job_id.in_(job_ids))
+        if principal.role == 'employer':
+            # Applications for any job owned by this employer (single subquery)
+            employer_job_ids = select(Job.id).where(Job.employer_id == principal.profile_id)
+            query = query.filter(Application.job_id.in_(employer_job_ids))
         else:
             # Get job seeker's applications
-            job_seeker = dbsession.query(JobSeeker).filter_by(user_id=user.id).first()
-            query = query.filter_by(job_seeker_id=job_seeker.id)
+            query = query.filter_by(job_seeker_id=principal.profile_id)
         
         if status:
             query = query.filter_by(status=ApplicationStatus[status.upper()])
         
-        total = query.count()
-        applications = query.offset((page - 1) * per_page).limit(per_page).all()
+        # Cursor pagination (keyset on applied_at, id)
+        if cursor is not None:
+            rows, next_cursor = Pagination.keyset_page(
+                app_rows_query(query), Application.applied_at, Application.id, cursor, per_page
+            )
+            return {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'applications': FastJSON.rows_to_dicts(rows)
+            }
+        
+        # Offset pagination (legacy clients); listings are per-user, so totals are always exact
+        page = Pagination.get_page(request)
+        count_key = CountCache.make_key('applications', user_id=principal.user_id, status=status)
+        total = CountCache.get_or_count(count_key, query.count)
+        rows = app_rows_query(query) \
+            .order_by(Application.applied_at.desc(), Application.id.desc()) \
+            .offset((page - 1) * per_page).limit(per_page).all()
         
         return {
             'total': total,
+            'total_exact': True,
             'page': page,
             'per_page': per_page,
-            'applications': [app_to_dict(app) for app in applications]
+            'applications': FastJSON.rows_to_dicts(rows)
         }
     
     except Exception as e:
         raise HTTPBadRequest(detail=str(e))
 
+@require_auth
+@require_role('employer')
+def export_applications(request):
+    """
+    Download every application for the employer's jobs as CSV or NDJSON.
+    Rows are streamed from the database while the response is written.
+    """
+    fmt = request.GET.get('format', 'csv').lower()
+    if fmt not in RowStream.CONTENT_TYPES:
+        raise HTTPBadRequest(detail='format must be csv or ndjson')
+    
+    try:
+        dbsession = request.dbsession
+        employer_job_ids = select(Job.id).where(Job.employer_id == request.principal.profile_id)
+        query = dbsession.query(Application).filter(Application.job_id.in_(employer_job_ids))
+        
+        job_id = request.GET.get('job_id')
+        if job_id:
+            query = query.filter(Application.job_id == int(job_id))
+        status = request.GET.get('status')
+        if status:
+            query = query.filter_by(status=ApplicationStatus[status.upper()])
+        
+        stmt = app_rows_query(query).order_by(Application.id).statement
+        return RowStream.response(dbsession.get_bind(), stmt, fmt, 'applications')
+    
+    except Exception as e:
+        raise HTTPBadRequest(detail=str(e))
+
 @require_auth
 @require_role('job_seeker')
 def create_application(request):
@@ -80,12 +134,12 @@ def create_application(request):
         if not job:
             raise HTTPNotFound(detail='Job not found')
         
-        job_seeker = dbsession.query(JobSeeker).filter_by(user_id=request.user_id).first()
+        job_seeker_id = request.principal.profile_id
         
         # Check if already applied
         existing = dbsession.query(Application).filter_by(
             job_id=job_id,
-            job_seeker_id=job_seeker.id
+            job_seeker_id=job_seeker_id
         ).first()
         
         if existing:
@@ -93,13 +147,14 @@ def create_application(request):
         
         application = Application(
             job_id=job_id,
-            job_seeker_id=job_seeker.id,
+            job_seeker_id=job_seeker_id,
             cover_letter=data.get('cover_letter', '').strip(),
             status=ApplicationStatus.APPLIED
         )
         
         dbsession.add(application)
         dbsession.commit()
+        CountCache.invalidate('applications')
         
         return {
             'message': 'Application submitted successfully',
@@ -118,7 +173,7 @@ def get_application(request):
         app_id = int(request.matchdict['app_id'])
         dbsession = request.dbsession
         
-        application = dbsession.query(Application).filter_by(id=app_id).first()
+        application = dbsession.query(Application).options(*APP_DICT_LOADERS).filter_by(id=app_id).first()
         if not application:
             raise HTTPNotFound(detail='Application not found')
         
@@ -146,26 +201,27 @@ def update_application(request):
         raise HTTPBadRequest(detail='Invalid JSON or app_id')
     
     status = data.get('status', '').upper()
-    valid_statuses = ['REVIEWED', 'SHORTLISTED', 'REJECTED', 'ACCEPTED']
     
-    if status not in valid_statuses:
-        raise HTTPBadRequest(detail=f'Invalid status. Must be one of: {", ".join(valid_statuses)}')
+    if status not in EMPLOYER_STATUSES:
+        raise HTTPBadRequest(detail=f'Invalid status. Must be one of: {", ".join(EMPLOYER_STATUSES)}')
     
     try:
         dbsession = request.dbsession
-        application = dbsession.query(Application).filter_by(id=app_id).first()
+        application = dbsession.query(Application).options(joinedload(Application.job)) \
+            .filter_by(id=app_id).first()
         
         if not application:
             raise HTTPNotFound(detail='Application not found')
         
         # Check if user is the employer of the job
-        if application.job.employer.user_id != request.user_id:
+        if application.job.employer_id != request.principal.profile_id:
             raise HTTPForbidden(detail='Not authorized to update this application')
         
         application.status = ApplicationStatus[status]
         application.notes = data.get('notes', '')
         
         dbsession.commit()
+        CountCache.invalidate('applications')
         
         return {
             'message': 'Application updated successfully',
@@ -178,6 +234,91 @@ def update_application(request):
         dbsession.rollback()
         raise HTTPBadRequest(detail=str(e))
 
+@require_auth
+@require_role('employer')
+def bulk_update_applications(request):
+    """
+    Employer sets one status (and optionally notes) on many applications.
+    Ownership is checked with one join; owned rows change in one UPDATE.
+    """
+    try:
+        data = json.loads(request.body)
+        ids = list(dict.fromkeys(int(app_id) for app_id in data['ids']))
+    except:
+        raise HTTPBadRequest(detail='Invalid JSON or ids')
+    
+    if not ids:
+        raise HTTPBadRequest(detail='ids must not be empty')
+    if len(ids) > BULK_MAX_IDS:
+        raise HTTPBadRequest(detail=f'At most {BULK_MAX_IDS} ids per request')
+    
+    status = str(data.get('status', '')).upper()
+    if status not in EMPLOYER_STATUSES:
+        raise HTTPBadRequest(detail=f'Invalid status. Must be one of: {", ".join(EMPLOYER_STATUSES)}')
+    
+    try:
+        dbsession = request.dbsession
+        
+        # Owner of each requested application, in one round trip
+        owners = dict(dbsession.execute(
+            select(Application.id, Job.employer_id)
+            .join(Job, Application.job_id == Job.id)
+            .where(Application.id.in_(ids))
+        ).all())
+        
+        employer_id = request.principal.profile_id
+        updated = [app_id for app_id in ids if owners.get(app_id) == employer_id]
+        forbidden = [app_id for app_id in ids if app_id in owners and owners[app_id] != employer_id]
+        not_found = [app_id for app_id in ids if app_id not in owners]
+        
+        if updated:
+            values = {'status': ApplicationStatus[status]}
+            if 'notes' in data:
+                values['notes'] = data['notes'] or ''
+            dbsession.execute(
+                update(Application).where(Application.id.in_(updated)).values(**values),
+                execution_options={'synchronize_session': False}
+            )
+            dbsession.commit()
+            CountCache.invalidate('applications')
+        
+        return {
+            'message': f'{len(updated)} applications updated',
+            'status': ApplicationStatus[status].value,
+            'updated': updated,
+            'forbidden': forbidden,
+            'not_found': not_found
+        }
+    
+    except Exception as e:
+        dbsession.rollback()
+        raise HTTPBadRequest(detail=str(e))
+
+# Statuses an employer may move an application to
+EMPLOYER_STATUSES = ['REVIEWED', 'SHORTLISTED', 'REJECTED', 'ACCEPTED']
+
+BULK_MAX_IDS = int(os.environ.get('APPLICATION_BULK_MAX_IDS', 1000))
+
+# Relationships read by app_to_dict; list/detail queries must eager-load them
+APP_DICT_LOADERS = (
+    joinedload(Application.job),
+    joinedload(Application.job_seeker).joinedload(JobSeeker.user),
+)
+
+# Same fields as app_to_dict, selected as plain columns for list pages (no ORM hydration)
+APP_ROW_COLUMNS = (
+    Application.id, Application.job_id, Job.title.label('job_title'), Application.job_seeker_id,
+    User.full_name.label('seeker_name'), User.email.label('seeker_email'), Application.status,
+    Application.cover_letter, Application.notes, Application.applied_at, Application.updated_at,
+)
+
+def app_rows_query(query):
+    """Turn a filtered Application query into a column select of APP_ROW_COLUMNS"""
+    return query.with_entities(*APP_ROW_COLUMNS) \
+        .join(Job, Application.job_id == Job.id) \
+        .join(JobSeeker, Application.job_seeker_id == JobSeeker.id) \
+        .join(User, JobSeeker.user_id == User.id)
+
 def app_to_dict(application):
     """Convert application object to dictionary"""
     return {
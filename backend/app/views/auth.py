@@ -1,5 +1,5 @@
 from pyramid.view import view_config
-from pyramid.httpexceptions import HTTPBadRequest, HTTPConflict, HTTPUnauthorized
+from pyramid.httpexceptions import HTTPBadRequest, HTTPConflict, HTTPUnauthorized, HTTPServiceUnavailable
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 import json
@@ -11,6 +11,7 @@ from ..utils.auth import AuthManager
 from ..utils.validators import Validators
 from ..utils.password import PasswordManager
 from ..utils.email import EmailService
+from ..utils.email_outbox import EmailOutboxWorker
 
 def auth_views(config):
     config.add_route('auth_register', '/auth/register')
@@ -77,11 +78,12 @@ def register(request):
             job_seeker = JobSeeker(user_id=user.id)
             dbsession.add(job_seeker)
         
-        dbsession.commit()
-        
-        # Send verification email
+        # Queue verification email in the same transaction; delivered in background
         frontend_url = request.registry.settings.get('frontend_url', 'http://localhost:3000')
-        EmailService.send_verification_email(email, verification_token, frontend_url)
+        EmailService.queue_verification_email(dbsession, email, verification_token, frontend_url)
+        
+        dbsession.commit()
+        EmailOutboxWorker.wake()
         
         return {
             'message': 'Registration successful. Please check your email to verify.',
@@ -93,6 +95,9 @@ def register(request):
     except IntegrityError:
         dbsession.rollback()
         raise HTTPConflict(detail='Email already registered')
+    except (HTTPConflict, HTTPServiceUnavailable):
+        dbsession.rollback()
+        raise
     except Exception as e:
         dbsession.rollback()
         raise HTTPBadRequest(detail=str(e))
@@ -121,8 +126,15 @@ def login(request):
         if not user.is_email_verified:
             raise HTTPUnauthorized(detail='Please verify your email first')
         
-        # Generate token
-        token = AuthManager.generate_token(user.id, user.role.value)
+        # Upgrade hashes made with an old cost factor while we have the plain password
+        if PasswordManager.needs_rehash(user.password_hash):
+            user.password_hash = PasswordManager.hash_password(password)
+            dbsession.commit()
+        
+        # Generate token (profile_id claim lets require_auth skip profile lookups)
+        profile_model = Employer if user.role == UserRole.EMPLOYER else JobSeeker
+        profile_id = dbsession.query(profile_model.id).filter_by(user_id=user.id).scalar()
+        token = AuthManager.generate_token(user.id, user.role.value, profile_id)
         
         return {
             'message': 'Login successful',
@@ -135,7 +147,7 @@ def login(request):
             }
         }
     
-    except HTTPUnauthorized:
+    except (HTTPUnauthorized, HTTPServiceUnavailable):
         raise
     except Exception as e:
         raise HTTPBadRequest(detail=str(e))
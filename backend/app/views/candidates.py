@@ -0,0 +1,90 @@
+from pyramid.httpexceptions import HTTPBadRequest, HTTPServiceUnavailable
+
+from ..models import JobSeeker, User
+from ..utils.auth import require_auth, require_role
+from ..utils.pagination import Pagination
+from ..utils.fast_json import FastJSON
+from ..utils.skills import SkillIndex, normalize_skill, SKILL_SPLIT
+
+def candidate_views(config):
+    config.add_route('candidates_search', '/candidates', request_method='GET')
+
+    config.add_view(search_candidates, route_name='candidates_search', request_method='GET', renderer='json')
+
+CANDIDATE_COLUMNS = (
+    JobSeeker.id, User.full_name, JobSeeker.skills, JobSeeker.experience_years,
+    JobSeeker.location, JobSeeker.cv_url, JobSeeker.bio,
+)
+
+@require_auth
+@require_role('employer')
+def search_candidates(request):
+    """
+    Search job seekers by skill (Employer only).
+    match=all: every skill required; match=any: at least one, most matches first.
+    """
+    names = list(dict.fromkeys(
+        name for name in (normalize_skill(part) for part in SKILL_SPLIT.split(request.GET.get('skills', ''))) if name
+    ))
+    if not names:
+        raise HTTPBadRequest(detail='skills is required, e.g. skills=python,react')
+    if len(names) > SkillIndex.MAX_PER_QUERY:
+        raise HTTPBadRequest(detail=f'At most {SkillIndex.MAX_PER_QUERY} skills per search')
+
+    match = request.GET.get('match', 'all').lower()
+    if match not in ('all', 'any'):
+        raise HTTPBadRequest(detail='match must be all or any')
+
+    try:
+        min_experience = int(request.GET.get('min_experience', 0))
+        page = Pagination.get_page(request)
+        per_page = Pagination.get_per_page(request)
+    except ValueError:
+        raise HTTPBadRequest(detail='min_experience, page and per_page must be integers')
+
+    try:
+        dbsession = request.dbsession
+        skills = SkillIndex.resolve(dbsession, names)
+        skill_ids = [skills[name].id for name in names if name in skills]
+
+        total, ranked = 0, []
+        if skill_ids and (match == 'any' or len(skill_ids) == len(names)):
+            index = SkillIndex.get_index(dbsession)
+            total, ranked = index.search(
+                skill_ids, match == 'all', min_experience, (page - 1) * per_page, per_page
+            )
+
+        candidates = []
+        if ranked:
+            rows = dbsession.query(*CANDIDATE_COLUMNS).join(User, JobSeeker.user_id == User.id) \
+                .filter(JobSeeker.id.in_([seeker_id for seeker_id, _ in ranked])).all()
+            by_id = {row['id']: row for row in FastJSON.rows_to_dicts(rows)}
+
+            missing = [seeker_id for seeker_id, _ in ranked if seeker_id not in by_id]
+            if missing:
+                SkillIndex.forget(dbsession, missing)
+
+            labels = {skill.id: skill.label for skill in skills.values()}
+            for seeker_id, match_count in ranked:
+                candidate = by_id.get(seeker_id)
+                if candidate is None:
+                    continue
+                seeker_skills = index.seeker_skills.get(seeker_id, ())
+                candidate['match_count'] = match_count
+                candidate['matched_skills'] = [labels[skill_id] for skill_id in skill_ids if skill_id in seeker_skills]
+                candidates.append(candidate)
+
+        return {
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'match': match,
+            'skills': [skills[name].label for name in names if name in skills],
+            'unknown_skills': [name for name in names if name not in skills],
+            'candidates': candidates
+        }
+
+    except HTTPServiceUnavailable:
+        raise
+    except Exception as e:
+        raise HTTPBadRequest(detail=str(e))
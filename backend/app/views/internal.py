@@ -0,0 +1,37 @@
+import os
+from pyramid.response import Response
+
+from ..utils.auth import require_internal
+from ..utils.metrics import Metrics
+from ..utils.pool_stats import InstrumentedQueuePool
+
+def internal_views(config):
+    config.add_route('internal_pool', '/internal/pool', request_method='GET')
+    config.add_route('internal_startup', '/internal/startup', request_method='GET')
+    config.add_route('metrics', '/metrics', request_method='GET')
+    
+    config.add_view(pool_status, route_name='internal_pool', request_method='GET', renderer='json')
+    config.add_view(startup_report, route_name='internal_startup', request_method='GET', renderer='json')
+    config.add_view(metrics, route_name='metrics', request_method='GET')
+
+@require_internal
+def pool_status(request):
+    """Live connection pool statistics for this worker process"""
+    stats = InstrumentedQueuePool.snapshot(request.registry.dbengine)
+    stats['pid'] = os.getpid()
+    replica = getattr(request.registry, 'dbreplica', None)
+    if replica is not None:
+        stats['replica'] = InstrumentedQueuePool.snapshot(replica)
+    return stats
+
+@require_internal
+def startup_report(request):
+    """Boot phase timings of this worker process"""
+    report = getattr(request.registry, 'startup_report', None)
+    return report.as_dict() if report is not None else {'pid': os.getpid()}
+
+@require_internal
+def metrics(request):
+    """Prometheus text metrics, summed over the workers sharing metrics_dir"""
+    body = Metrics.render(request.registry.dbengine)
+    return Response(body, content_type='text/plain', charset='utf-8')
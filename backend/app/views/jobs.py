@@ -1,23 +1,39 @@
 from pyramid.view import view_config
-from pyramid.httpexceptions import HTTPBadRequest, HTTPUnauthorized, HTTPForbidden, HTTPNotFound
+from pyramid.httpexceptions import HTTPBadRequest, HTTPUnauthorized, HTTPForbidden, HTTPNotFound, HTTPServiceUnavailable
+from sqlalchemy import func, select
 from sqlalchemy.orm import joinedload
 import json
 
-from ..models import Job, Employer, User
+from ..models import Job, Employer, JobSeeker
 from ..models.user import UserRole
 from ..models.job import JobType
 from ..utils.auth import require_auth, require_role
 from ..utils.validators import Validators
+from ..utils.pagination import Pagination
+from ..utils.search import JobSearch
+from ..utils.count_cache import CountCache
+from ..utils.facets import Facets
+from ..utils.http_cache import HttpCache
+from ..utils.fast_json import FastJSON
+from ..utils.job_import import JobImport
+from ..utils.recommend import Recommender
+from ..utils.suggest import JobSuggest
 
 def job_views(config):
-    config.add_route('jobs_list', '/jobs')
-    config.add_route('jobs_create', '/jobs')
-    config.add_route('jobs_detail', '/jobs/{job_id}')
-    config.add_route('jobs_update', '/jobs/{job_id}')
-    config.add_route('jobs_delete', '/jobs/{job_id}')
+    config.add_route('jobs_list', '/jobs', request_method='GET')
+    config.add_route('jobs_create', '/jobs', request_method='POST')
+    config.add_route('jobs_bulk', '/jobs/bulk', request_method='POST')
+    config.add_route('jobs_recommended', '/jobs/recommended', request_method='GET')
+    config.add_route('jobs_suggest', '/jobs/suggest', request_method='GET')
+    config.add_route('jobs_detail', '/jobs/{job_id}', request_method='GET')
+    config.add_route('jobs_update', '/jobs/{job_id}', request_method='PUT')
+    config.add_route('jobs_delete', '/jobs/{job_id}', request_method='DELETE')
     
     config.add_view(list_jobs, route_name='jobs_list', request_method='GET', renderer='json')
     config.add_view(create_job, route_name='jobs_create', request_method='POST', renderer='json')
+    config.add_view(import_jobs, route_name='jobs_bulk', request_method='POST', renderer='json')
+    config.add_view(recommended_jobs, route_name='jobs_recommended', request_method='GET', renderer='json')
+    config.add_view(suggest_jobs, route_name='jobs_suggest', request_method='GET', renderer='json')
     config.add_view(get_job_detail, route_name='jobs_detail', request_method='GET', renderer='json')
     config.add_view(update_job, route_name='jobs_update', request_method='PUT', renderer='json')
     config.add_view(delete_job, route_name='jobs_delete', request_method='DELETE', renderer='json')
@@ -29,15 +45,24 @@ def list_jobs(request):
         dbsession = request.dbsession
         
         # Query parameters
+        q = request.GET.get('q', '').strip()
         title = request.GET.get('title', '')
         location = request.GET.get('location', '')
         salary_min = request.GET.get('salary_min')
         salary_max = request.GET.get('salary_max')
         job_type = request.GET.get('job_type', '')
-        page = int(request.GET.get('page', 1))
-        per_page = int(request.GET.get('per_page', 10))
+        cursor = request.GET.get('cursor')
+        count_mode = request.GET.get('count', 'exact')
+        facet_names = Facets.parse(request.GET.get('facets', ''))
+        per_page = Pagination.get_per_page(request)
         
         query = dbsession.query(Job).filter_by(is_active=1)
+        count_key = CountCache.make_key(
+            'jobs', q=q, title=title, location=location, job_type=job_type,
+            salary_min=float(salary_min) if salary_min else None,
+            salary_max=float(salary_max) if salary_max else None
+        )
+        is_filtered = len(count_key[1]) > 0
         
         # Filters
         if title:
@@ -51,16 +76,77 @@ def list_jobs(request):
         if job_type:
             query = query.filter_by(job_type=JobType[job_type.upper()])
         
-        # Pagination
-        total = query.count()
-        jobs = query.offset((page - 1) * per_page).limit(per_page).all()
+        # Facet counts for the same filters: one grouped query, cached per filter set (seeds the total too)
+        facets = None
+        if facet_names:
+            facet_query, ids = JobSearch.filter_matches(query, dbsession, q) if q else (query, None)
+            facets = Facets.get_or_compute(dbsession, facet_query, facet_names, count_key, ids)
+        
+        # Full-text search, ordered by relevance
+        if q:
+            if cursor is not None:
+                raise HTTPBadRequest(detail='Cursor pagination is not supported with q')
+            page = Pagination.get_page(request)
+            generation = CountCache.generation('jobs')
+            total, jobs = JobSearch.search_page(
+                query, dbsession, q, (page - 1) * per_page, per_page, JOB_DICT_LOADERS,
+                total=CountCache.get(count_key)
+            )
+            CountCache.set(count_key, total, generation)
+            return with_facets({
+                'total': total,
+                'total_exact': True,
+                'page': page,
+                'per_page': per_page,
+                'jobs': [job_to_dict(job) for job in jobs]
+            }, facets)
+        
+        # Cursor pagination (keyset on created_at, id)
+        if cursor is not None:
+            rows, next_cursor = Pagination.keyset_page(
+                job_rows_query(query), Job.created_at, Job.id, cursor, per_page
+            )
+            return with_facets({
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'jobs': FastJSON.rows_to_dicts(rows)
+            }, facets)
+        
+        # Offset pagination (legacy clients)
+        page = Pagination.get_page(request)
+        total = None
+        if count_mode == 'estimate' and not is_filtered:
+            total = CountCache.estimate(dbsession, query)
+        total_exact = total is None
+        if total_exact:
+            total = CountCache.get_or_count(count_key, query.count)
+        
+        # Conditional GET: probe latest job/employer change before loading rows. ETag only:
+        # deletes lower max(updated_at), so a Last-Modified date could answer 304 for a stale
+        # list, while the exact total in the ETag changes. An estimated total may not, so no
+        # validators then
+        if total_exact:
+            jobs_updated_at, employers_updated_at = query.with_entities(
+                func.max(Job.updated_at),
+                select(func.max(Employer.updated_at)).scalar_subquery()
+            ).one()
+            etag = HttpCache.make_etag(
+                'jobs', count_key, count_mode, facet_names, page, per_page, total, jobs_updated_at, employers_updated_at
+            )
+            not_modified = HttpCache.conditional(request, etag)
+            if not_modified:
+                return not_modified
+        
+        rows = job_rows_query(query).order_by(Job.created_at.desc(), Job.id.desc()) \
+            .offset((page - 1) * per_page).limit(per_page).all()
         
-        return {
+        return with_facets({
             'total': total,
+            'total_exact': total_exact,
             'page': page,
             'per_page': per_page,
-            'jobs': [job_to_dict(job) for job in jobs]
-        }
+            'jobs': FastJSON.rows_to_dicts(rows)
+        }, facets)
     
     except Exception as e:
         raise HTTPBadRequest(detail=str(e))
@@ -81,11 +167,9 @@ def create_job(request):
     
     try:
         dbsession = request.dbsession
-        user = dbsession.query(User).filter_by(id=request.user_id).first()
-        employer = dbsession.query(Employer).filter_by(user_id=user.id).first()
         
         job = Job(
-            employer_id=employer.id,
+            employer_id=request.principal.profile_id,
             title=data['title'].strip(),
             description=data['description'].strip(),
             requirements=data.get('requirements', '').strip(),
@@ -98,6 +182,7 @@ def create_job(request):
         
         dbsession.add(job)
         dbsession.commit()
+        CountCache.invalidate('jobs')
         
         return {'message': 'Job created successfully', 'job': job_to_dict(job)}
     
@@ -105,13 +190,110 @@ def create_job(request):
         dbsession.rollback()
         raise HTTPBadRequest(detail=str(e))
 
+@require_auth
+@require_role('employer')
+def import_jobs(request):
+    """
+    Bulk create jobs from a streamed NDJSON or CSV body (Employer only).
+    Invalid rows are skipped and reported; valid rows are inserted in chunks.
+    """
+    fmt = JobImport.detect_format(request)
+    if fmt is None:
+        raise HTTPBadRequest(detail='Body must be CSV (text/csv) or NDJSON (application/x-ndjson)')
+    
+    dbsession = request.dbsession
+    try:
+        report = JobImport.run(dbsession, request.body_file, fmt, request.principal.profile_id)
+    except Exception as e:
+        dbsession.rollback()
+        raise HTTPBadRequest(detail=str(e))
+    finally:
+        # Chunks commit independently, so totals change even when a later chunk fails
+        CountCache.invalidate('jobs')
+    
+    report['message'] = f"Imported {report['created']} jobs, {report['failed']} failed"
+    return report
+
+@require_auth
+@require_role('job_seeker')
+def recommended_jobs(request):
+    """Active jobs ranked by fit with the seeker's skills, location and experience (Job Seeker only)"""
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), Recommender.MAX_LIMIT)
+    except ValueError:
+        raise HTTPBadRequest(detail='limit must be an integer')
+    
+    try:
+        dbsession = request.dbsession
+        seeker = dbsession.get(JobSeeker, request.principal.profile_id)
+        if not seeker:
+            raise HTTPNotFound(detail='Profile not found')
+        if not (seeker.skills or '').strip():
+            return {'jobs': [], 'message': 'Add skills to your profile to get recommendations'}
+        
+        # Over-fetch a little: jobs deleted by another process may still be in the index
+        ranked = Recommender.recommend(dbsession, seeker, limit + 10)
+        scores = dict(ranked)
+        rows = job_rows_query(dbsession.query(Job)) \
+            .filter(Job.id.in_(list(scores)), Job.is_active == 1).all()
+        jobs = FastJSON.rows_to_dicts(rows)
+        
+        found = {job['id'] for job in jobs}
+        missing = [job_id for job_id in scores if job_id not in found]
+        if missing:
+            Recommender.forget(dbsession, missing)
+        
+        for job in jobs:
+            job['score'] = scores[job['id']]
+        jobs.sort(key=lambda job: (-job['score'], -job['id']))
+        return {'jobs': jobs[:limit]}
+    
+    except (HTTPNotFound, HTTPServiceUnavailable):
+        raise
+    except Exception as e:
+        raise HTTPBadRequest(detail=str(e))
+
+def suggest_jobs(request):
+    """Autocomplete for the search box: active job titles or locations by prefix, most frequent first"""
+    field = request.GET.get('field', 'title')
+    if field not in JobSuggest.FIELDS:
+        raise HTTPBadRequest(detail=f'field must be one of: {", ".join(JobSuggest.FIELDS)}')
+    prefix = request.GET.get('prefix', '')
+    if len(prefix) > JobSuggest.MAX_PREFIX:
+        raise HTTPBadRequest(detail=f'prefix must be at most {JobSuggest.MAX_PREFIX} characters')
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), JobSuggest.MAX_LIMIT)
+    except ValueError:
+        raise HTTPBadRequest(detail='limit must be an integer')
+    
+    try:
+        suggestions = JobSuggest.suggest(request.dbsession, field, prefix, limit)
+        return {'field': field, 'prefix': prefix, 'suggestions': suggestions}
+    
+    except HTTPServiceUnavailable:
+        raise
+    except Exception as e:
+        raise HTTPBadRequest(detail=str(e))
+
 def get_job_detail(request):
     """Get single job detail"""
     try:
         job_id = int(request.matchdict['job_id'])
         dbsession = request.dbsession
         
-        job = dbsession.query(Job).filter_by(id=job_id).first()
+        # Conditional GET: compare timestamps before hydrating the job
+        versions = dbsession.query(Job.updated_at, Employer.updated_at) \
+            .join(Employer, Job.employer_id == Employer.id).filter(Job.id == job_id).first()
+        if not versions:
+            raise HTTPNotFound(detail='Job not found')
+        
+        not_modified = HttpCache.conditional(
+            request, HttpCache.make_etag('job', job_id, *versions), HttpCache.last_modified(*versions)
+        )
+        if not_modified:
+            return not_modified
+        
+        job = dbsession.query(Job).options(*JOB_DICT_LOADERS).filter_by(id=job_id).first()
         if not job:
             raise HTTPNotFound(detail='Job not found')
         
@@ -140,7 +322,7 @@ def update_job(request):
             raise HTTPNotFound(detail='Job not found')
         
         # Check if user is the employer
-        if job.employer.user_id != request.user_id:
+        if job.employer_id != request.principal.profile_id:
             raise HTTPForbidden(detail='Not authorized to update this job')
         
         # Update fields
@@ -160,6 +342,7 @@ def update_job(request):
             job.job_type = JobType[data['job_type'].upper()]
         
         dbsession.commit()
+        CountCache.invalidate('jobs')
         return {'message': 'Job updated successfully', 'job': job_to_dict(job)}
     
     except (HTTPNotFound, HTTPForbidden):
@@ -181,11 +364,12 @@ def delete_job(request):
         if not job:
             raise HTTPNotFound(detail='Job not found')
         
-        if job.employer.user_id != request.user_id:
+        if job.employer_id != request.principal.profile_id:
             raise HTTPForbidden(detail='Not authorized to delete this job')
         
         dbsession.delete(job)
         dbsession.commit()
+        CountCache.invalidate('jobs', 'applications')
         
         return {'message': 'Job deleted successfully'}
     
@@ -195,6 +379,26 @@ def delete_job(request):
         dbsession.rollback()
         raise HTTPBadRequest(detail=str(e))
 
+# Relationships read by job_to_dict; list/detail queries must eager-load them
+JOB_DICT_LOADERS = (joinedload(Job.employer),)
+
+# Same fields as job_to_dict, selected as plain columns for list pages (no ORM hydration)
+JOB_ROW_COLUMNS = (
+    Job.id, Job.title, Job.description, Job.requirements, Job.salary_min, Job.salary_max,
+    Job.location, Job.job_type, Employer.company_name, Job.employer_id, Job.is_active,
+    Job.created_at, Job.updated_at,
+)
+
+def with_facets(body: dict, facets) -> dict:
+    """Add the facets block to a listing response when it was requested"""
+    if facets is not None:
+        body['facets'] = facets
+    return body
+
+def job_rows_query(query):
+    """Turn a filtered Job query into a column select of JOB_ROW_COLUMNS"""
+    return query.with_entities(*JOB_ROW_COLUMNS).join(Employer, Job.employer_id == Employer.id)
+
 def job_to_dict(job):
     """Convert job object to dictionary"""
     return {
@@ -1,14 +1,17 @@
 from pyramid.view import view_config
 from pyramid.httpexceptions import HTTPBadRequest, HTTPNotFound, HTTPForbidden
+from sqlalchemy.orm import joinedload
 import json
 
 from ..models import User, JobSeeker, Employer
 from ..models.user import UserRole
-from ..utils.auth import require_auth, require_role
+from ..utils.auth import require_auth, require_role, PrincipalCache
+from ..utils.http_cache import HttpCache
+from ..utils.skills import SkillIndex
 
 def profile_views(config):
-    config.add_route('profile_get', '/profile')
-    config.add_route('profile_update', '/profile')
+    config.add_route('profile_get', '/profile', request_method='GET')
+    config.add_route('profile_update', '/profile', request_method='PUT')
     config.add_route('profile_get_employer', '/employers/{employer_id}')
     
     config.add_view(get_profile, route_name='profile_get', request_method='GET', renderer='json')
@@ -20,21 +23,19 @@ def get_profile(request):
     """Get current user profile"""
     try:
         dbsession = request.dbsession
-        user = dbsession.query(User).filter_by(id=request.user_id).first()
+        profile = load_own_profile(request)
         
-        if not user:
+        if not profile:
             raise HTTPNotFound(detail='User not found')
         
-        if user.role == UserRole.JOB_SEEKER:
-            profile = dbsession.query(JobSeeker).filter_by(user_id=user.id).first()
+        if request.principal.role == 'job_seeker':
             return {
-                'user': user_to_dict(user),
+                'user': user_to_dict(profile.user),
                 'profile': job_seeker_to_dict(profile)
             }
         else:
-            profile = dbsession.query(Employer).filter_by(user_id=user.id).first()
             return {
-                'user': user_to_dict(user),
+                'user': user_to_dict(profile.user),
                 'profile': employer_to_dict(profile)
             }
     
@@ -51,10 +52,11 @@ def update_profile(request):
     
     try:
         dbsession = request.dbsession
-        user = dbsession.query(User).filter_by(id=request.user_id).first()
+        profile = load_own_profile(request)
         
-        if not user:
+        if not profile:
             raise HTTPNotFound(detail='User not found')
+        user = profile.user
         
         # Update user fields
         if 'full_name' in data:
@@ -65,9 +67,11 @@ def update_profile(request):
         
         # Update role-specific profile
         if user.role == UserRole.JOB_SEEKER:
-            profile = dbsession.query(JobSeeker).filter_by(user_id=user.id).first()
             if 'skills' in data:
-                profile.skills = data['skills']
+                try:
+                    SkillIndex.assign(dbsession, profile, data['skills'] or '')
+                except ValueError as e:
+                    raise HTTPBadRequest(detail=str(e))
             if 'experience_years' in data:
                 profile.experience_years = int(data['experience_years'])
             if 'phone' in data:
@@ -79,7 +83,6 @@ def update_profile(request):
             if 'cv_url' in data:
                 profile.cv_url = data['cv_url']
         else:
-            profile = dbsession.query(Employer).filter_by(user_id=user.id).first()
             if 'company_name' in data:
                 company_name = data['company_name'].strip()
                 if len(company_name) < 2:
@@ -97,6 +100,7 @@ def update_profile(request):
                 profile.location = data['location'].strip()
         
         dbsession.commit()
+        PrincipalCache.invalidate(user.id)
         
         return {
             'message': 'Profile updated successfully',
@@ -116,7 +120,19 @@ def get_employer_profile(request):
         employer_id = int(request.matchdict['employer_id'])
         dbsession = request.dbsession
         
-        employer = dbsession.query(Employer).filter_by(id=employer_id).first()
+        # Conditional GET: compare timestamps before hydrating the profile
+        versions = dbsession.query(Employer.updated_at, User.updated_at) \
+            .join(User, Employer.user_id == User.id).filter(Employer.id == employer_id).first()
+        if not versions:
+            raise HTTPNotFound(detail='Employer not found')
+        
+        not_modified = HttpCache.conditional(
+            request, HttpCache.make_etag('employer', employer_id, *versions), HttpCache.last_modified(*versions)
+        )
+        if not_modified:
+            return not_modified
+        
+        employer = dbsession.query(Employer).options(joinedload(Employer.user)).filter_by(id=employer_id).first()
         if not employer:
             raise HTTPNotFound(detail='Employer not found')
         
@@ -130,6 +146,12 @@ def get_employer_profile(request):
     except Exception as e:
         raise HTTPBadRequest(detail=str(e))
 
+def load_own_profile(request):
+    """Load the caller's Employer/JobSeeker profile together with its user"""
+    model = Employer if request.principal.role == 'employer' else JobSeeker
+    return request.dbsession.query(model).options(joinedload(model.user)) \
+        .filter_by(id=request.principal.profile_id).first()
+
 def user_to_dict(user):
     """Convert user to dictionary"""
     return {
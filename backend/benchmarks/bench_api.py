@@ -0,0 +1,207 @@
+"""
+Benchmark: end-to-end API latency per route and concurrency level.
+
+Builds the app through app.main against a local database, seeds it with
+the dataset generator (app.scripts.generate_data), then drives each scenario in-process
+(WSGI, no sockets) at every concurrency level and reports p50/p95/p99,
+req/s and SQL statements per request (median, so the odd cache miss on a
+parameter value the warm-up did not hit does not count).
+
+--baseline compares against a saved run and exits 1 on regression: more
+SQL statements per request than the baseline, or any error response. The
+committed baseline's latencies come from one machine, so p95 and req/s
+(worse than --tolerance, plus --slack-ms for tiny latencies) are only
+checked with --check-latency, against a baseline saved on the same machine.
+
+Usage:
+    python -m benchmarks.bench_api --db-url sqlite:///bench_api.db
+    python -m benchmarks.bench_api --baseline benchmarks/baseline_api.json
+    python -m benchmarks.bench_api --save-baseline benchmarks/baseline_api.json
+    python -m benchmarks.bench_api --baseline local_baseline.json --check-latency
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from webob import Request
+
+from app import main as app_factory
+from app.scripts import generate_data
+from app.utils.auth import AuthManager
+from app.utils.password import PasswordManager
+
+PASSWORD = 'BenchPass123'
+LOCATIONS = ['Jakarta', 'Bandung', 'Surabaya', 'Medan', 'Yogyakarta', 'Bali', 'Remote']
+TERMS = ['python', 'data engineer', 'remote', 'kubernetes', 'react developer']
+
+def seed(db_url, employers, seekers, jobs, applications, rounds):
+    """Deterministic dataset from the generator; ids are contiguous so scenarios can address rows directly"""
+    generate_data.main([
+        '--db-url', db_url, '--reset', '--quiet', '--password', PASSWORD, '--bcrypt-rounds', str(rounds),
+        '--employers', str(employers), '--seekers', str(seekers),
+        '--jobs', str(jobs), '--applications', str(applications),
+    ])
+    # Applications per seeker are skewed and may be 0; use the first seeker with some
+    engine = create_engine(db_url)
+    with engine.connect() as conn:
+        seeker_id = conn.execute(text('SELECT min(job_seeker_id) FROM applications')).scalar() or 1
+    engine.dispose()
+    return seeker_id
+
+def scenarios(jobs, employers, seeker_id):
+    """name -> function(rng) returning (method, path, headers, body)"""
+    # Employer 1 is the largest employer (rank 1 of the Zipf curve)
+    employer = {'Authorization': 'Bearer ' + AuthManager.generate_token(1, 'employer', 1)}
+    seeker = {'Authorization': 'Bearer ' + AuthManager.generate_token(employers + seeker_id, 'job_seeker', seeker_id)}
+    login = json.dumps({'email': 'seeker1@example.test', 'password': PASSWORD}).encode('utf-8')
+    return {
+        'jobs_list': lambda rng: ('GET', f'/jobs?page={rng.randrange(1, 11)}', {}, None),
+        'jobs_filter': lambda rng: ('GET', f'/jobs?location={rng.choice(LOCATIONS)}&salary_min=10000000', {}, None),
+        'jobs_search': lambda rng: ('GET', f'/jobs?q={rng.choice(TERMS).replace(" ", "+")}', {}, None),
+        'jobs_cursor': lambda rng: ('GET', '/jobs?cursor=&per_page=20', {}, None),
+        'job_detail': lambda rng: ('GET', f'/jobs/{rng.randrange(1, jobs + 1)}', {}, None),
+        'applications_employer': lambda rng: ('GET', '/applications', employer, None),
+        'applications_seeker': lambda rng: ('GET', '/applications', seeker, None),
+        'profile': lambda rng: ('GET', '/profile', seeker, None),
+        'login': lambda rng: ('POST', '/auth/login', {'Content-Type': 'application/json'}, login),
+    }
+
+def call(app, method, path, headers, body):
+    request = Request.blank(path, method=method, headers=headers)
+    if body is not None:
+        request.body = body
+    start = time.perf_counter()
+    response = request.get_response(app)
+    elapsed = (time.perf_counter() - start) * 1000
+    return response.status_int, elapsed, int(response.headers.get('X-SQL-Count', 0))
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def run_scenario(app, build, concurrency, requests):
+    latencies, statements, errors, shed = [], [], 0, 0
+    lock = threading.Lock()
+    per_thread = max(1, requests // concurrency)
+
+    def worker(seed):
+        nonlocal errors, shed
+        rng = random.Random(seed)
+        for _ in range(per_thread):
+            status, ms, sql = call(app, *build(rng))
+            with lock:
+                latencies.append(ms)
+                statements.append(sql)
+                # 503 + Retry-After is deliberate load shedding (bcrypt queue bound), not a failure
+                shed += status == 503
+                errors += status >= 400 and status != 503
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    return {
+        'p50': round(pct(latencies, 50), 3),
+        'p95': round(pct(latencies, 95), 3),
+        'p99': round(pct(latencies, 99), 3),
+        'rps': round(len(latencies) / wall, 1),
+        'sql': pct(statements, 50),
+        'errors': errors,
+        'shed': shed,
+    }
+
+def compare(results, baseline, tolerance, slack_ms, check_latency=False):
+    """Return list of regression messages"""
+    failures = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if check_latency and current['p95'] > base['p95'] * (1 + tolerance) + slack_ms:
+            failures.append(f'{key}: p95 {current["p95"]:.2f} ms vs baseline {base["p95"]:.2f} ms')
+        if check_latency and current['rps'] < base['rps'] * (1 - tolerance):
+            failures.append(f'{key}: {current["rps"]:.1f} req/s vs baseline {base["rps"]:.1f} req/s')
+        if current['sql'] > base['sql']:
+            failures.append(f'{key}: {current["sql"]} SQL statements/request vs baseline {base["sql"]}')
+        if current['errors']:
+            failures.append(f'{key}: {current["errors"]} error responses')
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db-url', default='sqlite:///bench_api.db')
+    parser.add_argument('--employers', type=int, default=50)
+    parser.add_argument('--seekers', type=int, default=500)
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--applications', type=int, default=20000)
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--requests', type=int, default=400, help='requests per scenario and concurrency level')
+    parser.add_argument('--scenarios', default='', help='comma-separated subset (default: all)')
+    parser.add_argument('--rounds', type=int, default=4, help='bcrypt cost for seeded users / login')
+    parser.add_argument('--baseline', help='fail (exit 1) on regression against this file')
+    parser.add_argument('--save-baseline', help='write results to this file')
+    parser.add_argument('--check-latency', action='store_true',
+                        help='also fail on p95 / req/s regressions (baseline from this machine)')
+    parser.add_argument('--tolerance', type=float, default=0.5)
+    parser.add_argument('--slack-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    PasswordManager.ROUNDS = args.rounds
+    start = time.perf_counter()
+    seeker_id = seed(args.db_url, args.employers, args.seekers, args.jobs, args.applications, args.rounds)
+    print(f'seed: {time.perf_counter() - start:.1f}s ({args.jobs} jobs, {args.applications} applications)')
+
+    # Limiter off: every login scenario request uses one email from one address (bench_login measures the limiter)
+    app = app_factory({}, db_url=args.db_url, email_outbox_worker='false', debug_sql_count='true', rate_limit='false')
+    if app.registry.index_worker is not None:
+        app.registry.index_worker.wait_ready()
+    all_scenarios = scenarios(args.jobs, args.employers, seeker_id)
+    names = [n for n in args.scenarios.split(',') if n] or list(all_scenarios)
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    results = {}
+    print(f'{"scenario":<24}{"conc":>5}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"req/s":>9}{"sql":>5}{"err":>5}{"503":>5}')
+    for name in names:
+        build = all_scenarios[name]
+        run_scenario(app, build, 1, 20)  # warm caches / indexes
+        for concurrency in levels:
+            r = run_scenario(app, build, concurrency, args.requests)
+            results[f'{name}@{concurrency}'] = r
+            print(f'{name:<24}{concurrency:>5}{r["p50"]:>9.2f}{r["p95"]:>9.2f}{r["p99"]:>9.2f}'
+                  f'{r["rps"]:>9.1f}{r["sql"]:>5}{r["errors"]:>5}{r["shed"]:>5}')
+    PasswordManager.shutdown()
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({
+                'meta': {
+                    'db': make_url(args.db_url).get_backend_name(), 'python': platform.python_version(), 'machine': platform.machine(),
+                    'jobs': args.jobs, 'applications': args.applications, 'requests': args.requests,
+                },
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+        print(f'baseline written to {args.save_baseline}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        failures = compare(results, baseline, args.tolerance, args.slack_ms, args.check_latency)
+        if failures:
+            print('\nREGRESSIONS:')
+            for failure in failures:
+                print('  ' + failure)
+            sys.exit(1)
+        print('\nno regressions against baseline')
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from wsgiref.simple_server import make_server
+from waitress import serve
 from pyramid.config import Configurator
 from pyramid.response import Response
 from sqlalchemy.orm import scoped_session
@@ -6,6 +6,7 @@ import json
 
 from app.config import DatabaseConfig
 from app.models import Base
+from app.utils.schema_check import SchemaCheck
 from app import views
 
 def main(global_config, **settings):
@@ -15,8 +16,8 @@ def main(global_config, **settings):
     engine = DatabaseConfig.get_engine(settings)
     session_factory = DatabaseConfig.get_session(engine)
     
-    # Create tables
-    Base.metadata.create_all(engine)
+    # Create tables only when the stored schema fingerprint differs
+    SchemaCheck.ensure(engine, Base.metadata, DatabaseConfig.get_setting(settings, 'schema_check', 'fingerprint'))
     
     config = Configurator(settings=settings)
     
@@ -85,6 +86,8 @@ if __name__ == '__main__':
     }
     
     app = main({}, **settings)
-    server = make_server('0.0.0.0', 6543, app)
+    # Threaded development server, one thread per pooled DB connection.
+    # Production: job-portal-serve (forked workers, graceful restarts)
+    pool = DatabaseConfig.get_pool_options(settings)
     print('Server started on http://localhost:6543')
-    server.serve_forever()
+    serve(app, host='0.0.0.0', port=6543, threads=pool['pool_size'] + pool['max_overflow'])
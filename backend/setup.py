@@ -19,5 +19,9 @@ setup(
         'paste.app_factory': [
             'main = app:main',
         ],
+        'console_scripts': [
+            'job-portal-generate = app.scripts.generate_data:main',
+            'job-portal-serve = app.scripts.serve:main',
+        ],
     },
 )
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine, select
+from webtest import TestApp
+
+from app import main
+from app.models import Application, Employer, Job, JobSeeker
+from app.scripts import generate_data
+from app.utils.auth import AuthManager, PrincipalCache
+from app.utils.count_cache import CountCache
+
+@pytest.fixture(scope='session')
+def db_url(tmp_path_factory):
+    """Small generated dataset in a SQLite file, shared by the whole run"""
+    url = f'sqlite:///{tmp_path_factory.mktemp("db") / "job_portal.db"}'
+    generate_data.main([
+        '--db-url', url, '--reset', '--quiet', '--bcrypt-rounds', '4',
+        '--employers', '5', '--seekers', '20', '--jobs', '60', '--applications', '200',
+    ])
+    return url
+
+@pytest.fixture(scope='session')
+def app(db_url):
+    return main(
+        {}, db_url=db_url, email_outbox_worker='false', index_worker='false', rate_limit='false', metrics='false'
+    )
+
+@pytest.fixture
+def testapp(app):
+    # Per-process caches would make statement counts depend on test order
+    CountCache._entries.clear()
+    PrincipalCache._entries.clear()
+    return TestApp(app)
+
+@pytest.fixture(scope='session')
+def sample(db_url):
+    """Ids of one employer with applications, one of its applications and that application's job seeker"""
+    engine = create_engine(db_url)
+    with engine.connect() as conn:
+        application = conn.execute(
+            select(Application.id, Application.job_seeker_id, Job.employer_id, Employer.user_id.label('employer_user_id'),
+                   JobSeeker.user_id.label('seeker_user_id'))
+            .join(Job, Application.job_id == Job.id)
+            .join(Employer, Job.employer_id == Employer.id)
+            .join(JobSeeker, Application.job_seeker_id == JobSeeker.id)
+            .order_by(Application.id).limit(1)
+        ).one()
+    engine.dispose()
+    return application
+
+def bearer(user_id, role, profile_id):
+    return {'Authorization': f'Bearer {AuthManager.generate_token(user_id, role, profile_id)}'}
+
+@pytest.fixture
+def employer_headers(sample):
+    return bearer(sample.employer_user_id, 'employer', sample.employer_id)
+
+@pytest.fixture
+def seeker_headers(sample):
+    return bearer(sample.seeker_user_id, 'job_seeker', sample.job_seeker_id)
@@ -0,0 +1,78 @@
+"""
+EmailOutboxWorker against an in-process SMTP server: delivery over the
+real EmailService.connect path, and lease renewal when a slow server
+makes the batch outlive CLAIM_LEASE.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import Base, EmailOutbox
+from app.models.email_outbox import EmailStatus
+from app.utils.email import EmailService
+from app.utils.email_outbox import EmailOutboxWorker
+
+from .smtp_server import SMTPServer
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "outbox.db"}')
+    Base.metadata.create_all(engine, tables=[EmailOutbox.__table__])
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    with SMTPServer() as server:
+        monkeypatch.setattr(EmailService, 'SMTP_SERVER', '127.0.0.1')
+        monkeypatch.setattr(EmailService, 'SMTP_PORT', server.port)
+        monkeypatch.setattr(EmailService, 'SMTP_USE_TLS', False)
+        monkeypatch.setattr(EmailService, 'SENDER_PASSWORD', '')
+        yield server
+
+def queue(engine, count: int):
+    with Session(engine) as dbsession:
+        for n in range(count):
+            dbsession.add(EmailOutbox(recipient=f'user{n}@example.test', subject=f'Message {n}', body_html='<p>Hi</p>'))
+        dbsession.commit()
+
+def outbox_rows(engine) -> list:
+    with Session(engine) as dbsession:
+        return dbsession.query(EmailOutbox).order_by(EmailOutbox.id).all()
+
+def test_delivers_batch_over_one_connection(engine, smtp_server):
+    queue(engine, 3)
+    worker = EmailOutboxWorker(engine)
+    try:
+        assert worker.run_once() == 3
+    finally:
+        worker.close_smtp()
+
+    assert [message['To'] for message in smtp_server.messages] == [f'user{n}@example.test' for n in range(3)]
+    assert all(row.status == EmailStatus.SENT and row.attempts == 1 for row in outbox_rows(engine))
+    assert worker.run_once() == 0
+
+def test_renews_lease_while_server_is_slow(engine, smtp_server, monkeypatch):
+    # Five messages at 0.2s each against a 0.5s lease: the batch outlives the first lease
+    monkeypatch.setattr(EmailOutboxWorker, 'CLAIM_LEASE', 0.5)
+    smtp_server.delay = 0.2
+    queue(engine, 5)
+
+    # Another worker polling the outbox while the batch is sent must find nothing to claim
+    other = EmailOutboxWorker(engine)
+    stolen = []
+    smtp_server.on_message = lambda message: stolen.extend(other.claim_batch()[0])
+
+    worker = EmailOutboxWorker(engine)
+    renewals = []
+    renew_lease = worker.renew_lease
+    monkeypatch.setattr(worker, 'renew_lease', lambda *args: renewals.append(args) or renew_lease(*args))
+    try:
+        assert worker.run_once() == 5
+    finally:
+        worker.close_smtp()
+
+    assert renewals
+    assert stolen == []
+    assert len(smtp_server.messages) == 5
+    assert all(row.status == EmailStatus.SENT and row.attempts == 1 for row in outbox_rows(engine))
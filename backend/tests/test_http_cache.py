@@ -0,0 +1,28 @@
+"""
+Conditional GET on the job list: a deleted job never moves the list's
+latest updated_at forward, so only the ETag (which carries the total) may
+answer 304.
+"""
+import time
+from email.utils import formatdate
+
+JOB = {
+    'title': 'Short Lived Posting',
+    'description': 'Created and deleted again by the conditional GET test.',
+    'location': 'Bandung',
+}
+
+def test_jobs_list_after_delete_is_not_stale(testapp, employer_headers):
+    job_id = testapp.post_json('/jobs', JOB, headers=employer_headers).json['job']['id']
+    response = testapp.get('/jobs?per_page=100')
+    assert job_id in [job['id'] for job in response.json['jobs']]
+    assert 'Last-Modified' not in response.headers
+    etag, date = response.headers['ETag'], formatdate(time.time() + 60, usegmt=True)
+
+    assert testapp.get('/jobs?per_page=100', headers={'If-None-Match': etag}).status_int == 304
+
+    testapp.delete(f'/jobs/{job_id}', headers=employer_headers)
+    for headers in ({'If-None-Match': etag}, {'If-Modified-Since': date}):
+        response = testapp.get('/jobs?per_page=100', headers=headers)
+        assert response.status_int == 200
+        assert job_id not in [job['id'] for job in response.json['jobs']]
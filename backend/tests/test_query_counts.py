@@ -0,0 +1,51 @@
+"""
+Statement budgets for the hot read endpoints, so an N+1 (a lazy load per
+row) or an extra round trip shows up as a failing count. Each listing is
+also fetched with a larger page: the count must not grow with the rows.
+"""
+from app.utils.query_counter import QueryCounter
+
+def get_counted(testapp, url, headers=None):
+    with QueryCounter() as counter:
+        response = testapp.get(url, headers=headers or {})
+    return response, counter
+
+def test_jobs_list(testapp):
+    # Total, ETag probe (max updated_at), page rows
+    response, counter = get_counted(testapp, '/jobs?per_page=5')
+    assert len(response.json['jobs']) == 5
+    assert counter.count == 3, counter.statements
+
+    # Total now served from CountCache
+    response, counter = get_counted(testapp, '/jobs?per_page=50')
+    assert len(response.json['jobs']) == 50
+    assert all(job['company_name'] for job in response.json['jobs'])
+    assert counter.count == 2, counter.statements
+
+def test_jobs_list_cursor(testapp):
+    response, counter = get_counted(testapp, '/jobs?per_page=20&cursor=')
+    assert len(response.json['jobs']) == 20
+    assert counter.count == 1, counter.statements
+
+def test_applications_list_employer(testapp, employer_headers):
+    # Total, then rows with job title and seeker name joined in
+    response, counter = get_counted(testapp, '/applications?per_page=1', employer_headers)
+    assert response.json['applications']
+    assert counter.count == 2, counter.statements
+
+    response, counter = get_counted(testapp, '/applications?per_page=100', employer_headers)
+    assert len(response.json['applications']) > 1
+    assert counter.count == 1, counter.statements
+
+def test_applications_list_job_seeker(testapp, seeker_headers):
+    response, counter = get_counted(testapp, '/applications?per_page=100', seeker_headers)
+    assert response.json['applications']
+    assert all(application['job_title'] for application in response.json['applications'])
+    assert counter.count == 2, counter.statements
+
+def test_application_detail(testapp, employer_headers, sample):
+    response, counter = get_counted(testapp, f'/applications/{sample.id}', employer_headers)
+    assert response.json['id'] == sample.id
+    # Job and seeker user come from the same statement, not lazy loads
+    assert response.json['job_title'] and response.json['seeker_email']
+    assert counter.count == 1, counter.statements
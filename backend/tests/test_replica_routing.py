@@ -0,0 +1,99 @@
+"""
+Read replica routing with two SQLite files: the replica is a copy of the
+primary that never receives writes, so which database answered shows in
+the data (and in the X-DB-Bind debug header).
+"""
+import shutil
+import time
+
+import pytest
+from sqlalchemy import create_engine, select
+from webtest import TestApp
+
+from app import main
+from app.models import Employer, Job
+from app.scripts import generate_data
+from app.utils.auth import AuthManager, PrincipalCache
+from app.utils.count_cache import CountCache
+from app.utils.db_routing import ReplicaRouter
+
+JOB = {
+    'title': 'Replica Routing Engineer',
+    'description': 'Checks that reads after a write see the write.',
+    'location': 'Jakarta',
+}
+
+@pytest.fixture(scope='module')
+def databases(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('replica')
+    primary, replica = directory / 'primary.db', directory / 'replica.db'
+    generate_data.main([
+        '--db-url', f'sqlite:///{primary}', '--reset', '--quiet', '--bcrypt-rounds', '4',
+        '--employers', '2', '--seekers', '2', '--jobs', '10', '--applications', '0',
+    ])
+    shutil.copy(primary, replica)
+    return primary, replica
+
+@pytest.fixture(scope='module')
+def app(databases):
+    primary, replica = databases
+    return main(
+        {}, db_url=f'sqlite:///{primary}', db_replica_url=f'sqlite:///{replica}', debug_sql_count='true',
+        email_outbox_worker='false', index_worker='false', rate_limit='false', metrics='false',
+    )
+
+@pytest.fixture
+def testapp(app):
+    CountCache._entries.clear()
+    PrincipalCache._entries.clear()
+    return TestApp(app)
+
+@pytest.fixture(scope='module')
+def employer_headers(databases):
+    engine = create_engine(f'sqlite:///{databases[0]}')
+    with engine.connect() as conn:
+        employer = conn.execute(select(Employer.id, Employer.user_id).order_by(Employer.id).limit(1)).one()
+    engine.dispose()
+    token = AuthManager.generate_token(employer.user_id, 'employer', employer.id)
+    return {'Authorization': f'Bearer {token}'}
+
+def job_exists(path, job_id) -> bool:
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.connect() as conn:
+        found = conn.execute(select(Job.id).where(Job.id == job_id)).first() is not None
+    engine.dispose()
+    return found
+
+def test_reads_go_to_replica(testapp):
+    response = testapp.get('/jobs')
+    assert response.headers['X-DB-Bind'] == 'replica'
+    assert ReplicaRouter.HEADER_NAME not in response.headers
+
+def test_write_goes_to_primary_and_next_read_follows(testapp, databases, employer_headers):
+    primary, replica = databases
+    response = testapp.post_json('/jobs', JOB, headers=employer_headers)
+    job_id = response.json['job']['id']
+    assert job_exists(primary, job_id) and not job_exists(replica, job_id)
+    token = response.headers[ReplicaRouter.HEADER_NAME]
+
+    # Cookie kept by the client
+    response = testapp.get(f'/jobs/{job_id}')
+    assert response.headers['X-DB-Bind'] == 'primary'
+    assert response.json['title'] == JOB['title']
+
+    # Header echoed by a client without cookies (cross-origin frontend); any worker can check it
+    other = TestApp(testapp.app)
+    response = other.get(f'/jobs/{job_id}', headers={ReplicaRouter.HEADER_NAME: token})
+    assert response.headers['X-DB-Bind'] == 'primary'
+
+    # Clients that did not write still read the replica, which lacks the job
+    response = TestApp(testapp.app).get(f'/jobs/{job_id}', expect_errors=True)
+    assert response.headers['X-DB-Bind'] == 'replica'
+    assert response.status_int == 404
+
+def test_expired_or_forged_token_reads_replica(testapp):
+    expired = ReplicaRouter.sign(int((time.time() - 1) * 1000))
+    forged = f'{int((time.time() + 60) * 1000)}.{"0" * 32}'
+    for token in (expired, forged, 'garbage'):
+        response = testapp.get('/jobs', headers={ReplicaRouter.HEADER_NAME: token})
+        assert response.headers['X-DB-Bind'] == 'replica'
@@ -0,0 +1,66 @@
+"""
+SchemaCheck fingerprint mode on SQLite: a changed fingerprint only creates
+missing tables, and drift in an existing table stops the boot instead of
+being recorded as the new fingerprint.
+"""
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, event, inspect
+
+from app.utils.schema_check import SchemaCheck
+
+def models(extra_column: bool = False, extra_table: bool = False) -> MetaData:
+    metadata = MetaData()
+    columns = [Column('id', Integer, primary_key=True), Column('name', String(60))]
+    if extra_column:
+        columns.append(Column('email', String(120)))
+    Table('accounts', metadata, *columns)
+    if extra_table:
+        Table('audit_log', metadata, Column('id', Integer, primary_key=True))
+    return metadata
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "schema.db"}')
+    yield engine
+    engine.dispose()
+
+def test_fresh_database_then_match(engine):
+    assert SchemaCheck.ensure(engine, models()) == 'fingerprint changed, created 1 tables'
+    assert SchemaCheck.ensure(engine, models()) == 'fingerprint match'
+
+def test_new_table_is_created_and_recorded(engine):
+    SchemaCheck.ensure(engine, models())
+    assert SchemaCheck.ensure(engine, models(extra_table=True)) == 'fingerprint changed, created 1 tables'
+    assert 'audit_log' in inspect(engine).get_table_names()
+    assert SchemaCheck.ensure(engine, models(extra_table=True)) == 'fingerprint match'
+
+def test_changed_table_refuses_to_start(engine):
+    SchemaCheck.ensure(engine, models())
+    stored = SchemaCheck.stored_fingerprints(engine)
+
+    with pytest.raises(RuntimeError, match='accounts.*alembic upgrade head'):
+        SchemaCheck.ensure(engine, models(extra_column=True, extra_table=True))
+
+    # Nothing created, nothing recorded: the next boot raises again
+    assert SchemaCheck.stored_fingerprints(engine) == stored
+    assert 'audit_log' not in inspect(engine).get_table_names()
+    with pytest.raises(RuntimeError):
+        SchemaCheck.ensure(engine, models(extra_column=True))
+
+def test_database_without_stored_fingerprint(engine):
+    # Tables made by an older create_all: matching names are adopted, missing columns are not
+    models().create_all(engine)
+    with pytest.raises(RuntimeError, match='accounts'):
+        SchemaCheck.ensure(engine, models(extra_column=True))
+    assert SchemaCheck.ensure(engine, models()) == 'fingerprint changed, created 0 tables'
+    assert SchemaCheck.ensure(engine, models()) == 'fingerprint match'
+
+def test_function_hooks_change_the_fingerprint(engine):
+    plain, hooked = models(), models()
+
+    def backfill(target, connection, **kw):
+        pass
+
+    event.listen(hooked.tables['accounts'], 'after_create', backfill)
+    assert SchemaCheck.fingerprint(plain, engine.dialect) != SchemaCheck.fingerprint(hooked, engine.dialect)
+    assert SchemaCheck.table_digests(plain, engine.dialect) == SchemaCheck.table_digests(hooked, engine.dialect)
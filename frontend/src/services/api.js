@@ -9,18 +9,29 @@ const api = axios.create({
   },
 })
 
+// Read-your-writes: after a write the API returns a short-lived token; echo it so reads hit the primary DB
+let primaryUntil = null
+
 // Add token to requests
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem("token")
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+  if (primaryUntil && Number(primaryUntil.split(".")[0]) > Date.now()) {
+    config.headers["X-DB-Primary-Until"] = primaryUntil
+  }
   return config
 })
 
 // Handle response errors
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    if (response.headers["x-db-primary-until"]) {
+      primaryUntil = response.headers["x-db-primary-until"]
+    }
+    return response
+  },
   (error) => {
     if (error.response?.status === 401) {
       localStorage.removeItem("token")